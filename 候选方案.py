@@ -0,0 +1,184 @@
+"""批量生成候选座位方案
+
+老师想比较几种座位方案时，原来每个方案都要完整调用一次 随机分配座位()。
+这里一次生成K个合法方案，全部用NumPy在整数编号上向量化计算：
+- 学生用在学生名单中的下标表示，座位用在 布局.座位列表 中的下标表示
+- 指定排数安排编译为 允许[受限学生, 排] 的布尔掩码
+- 受限学生：K条随机交换链并行运行（与 匹配求解.随机化安排() 相同的对称提议，在座位层面进行），
+  每一步对K个方案同时做一次掩码判断和交换，得到均匀随机的合法安排
+- 其余学生：对每个方案的剩余空座位做一次随机排列（argsort随机键）
+
+结果是形状为 (K, 学生数) 的 int32 数组，方案[k, i] 为第k个方案中第i名学生的座位下标，
+K=10000、34名学生时内存不到2MB。浏览时用 方案视图() 把其中一行包装为 座位向量，不复制数据。
+
+numpy为可选依赖，只有使用本模块时才需要安装。
+"""
+import numpy as np
+
+import 匹配求解
+import 座位分配引擎 as 引擎
+from 后台任务 import 检查取消
+from 座位分配表 import 座位分配表
+from 座位向量 import 名单索引, 座位向量
+
+进度报告间隔 = 64  # 随机交换每隔多少步报告一次进度并检查取消
+
+
+def 编译约束(学生名单, 布局, 指定排数安排):
+    """把特殊安排编译为数组
+
+    返回:
+        tuple: (受限下标, 允许, 座位排)
+        - 受限下标: int数组，有指定排数的学生在学生名单中的下标
+        - 允许: bool数组 (受限学生数, 排数)，允许[j, v] 表示第j个受限学生可以坐第v排
+        - 座位排: int数组，每个座位所在排的序号（排号列表中的下标）
+    """
+    排序号 = {排: 序号 for 序号, 排 in enumerate(布局.排号列表)}
+    座位排 = np.array([排序号[行] for 行, _ in 布局.座位列表], dtype=np.intp)
+    学生下标 = {学生: 序号 for 序号, 学生 in enumerate(学生名单)}
+    受限学生 = [学生 for 学生 in 指定排数安排 if 学生 in 学生下标]
+    允许 = np.zeros((len(受限学生), len(布局.排号列表)), dtype=bool)
+    for j, 学生 in enumerate(受限学生):
+        for 排 in 指定排数安排[学生]:
+            if 排 in 排序号:
+                允许[j, 排序号[排]] = True
+    受限下标 = np.array([学生下标[学生] for 学生 in 受限学生], dtype=np.intp)
+    return 受限下标, 允许, 座位排
+
+
+def _初始座位(允许, 座位排, 排容量):
+    """用最大匹配得到受限学生的一个合法座位安排，作为所有链的起点"""
+    邻接 = [np.flatnonzero(行).tolist() for 行 in 允许]
+    匹配, _ = 匹配求解.最大匹配(邻接, 排容量)
+    排内座位 = [np.flatnonzero(座位排 == v).tolist() for v in range(len(排容量))]
+    已用 = [0] * len(排容量)
+    初始 = []
+    for v in 匹配:
+        初始.append(排内座位[v][已用[v]])
+        已用[v] += 1
+    return np.array(初始, dtype=np.intp)
+
+
+def 生成候选方案(学生名单, 布局, 指定排数安排=None, 数量=100, 种子=None, 步数=None,
+              进度回调=None, 取消事件=None):
+    """一次生成多个合法的随机座位方案
+
+    参数:
+        学生名单: 学生姓名列表（不能重复），数组的列与之一一对应
+        布局: 座位布局对象
+        指定排数安排: {学生: 排数列表}，可选
+        数量: 方案数K
+        种子: 随机种子，相同输入和种子得到相同结果
+        步数: 随机交换步数，默认与 匹配求解.随机化安排() 相同
+        进度回调: 可选，进度回调(说明, 完成, 总数)
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+
+    返回:
+        numpy.ndarray: 形状 (数量, 学生数) 的int32数组，元素为 布局.座位列表 的下标
+
+    异常:
+        分配失败错误: 特殊安排无法满足或座位不足
+    """
+    指定排数安排 = 指定排数安排 or {}
+    可行, 错误信息 = 引擎.验证特殊安排(学生名单, 布局, 指定排数安排)
+    if not 可行:
+        raise 引擎.分配失败错误(f"特殊安排无法满足: {错误信息}")
+
+    随机源 = np.random.default_rng(种子)
+    学生数 = len(学生名单)
+    座位数 = 布局.座位数
+    受限下标, 允许, 座位排 = 编译约束(学生名单, 布局, 指定排数安排)
+    受限数 = len(受限下标)
+    方案 = np.empty((数量, 学生数), dtype=np.int32)
+
+    # 受限学生：K条链从同一个合法安排出发，并行做随机交换
+    # 位置[k, j] 为第k个方案中受限学生j的座位，占用[k, 座位] 为座位上的受限学生（空为-1）；
+    # 热循环中按展平后的一维下标读写，每一步只对提议可行的方案继续计算
+    行号 = np.arange(数量)
+    if 受限数:
+        允许座位 = 允许[:, 座位排].ravel()  # 允许座位[j*座位数 + 座位]: 受限学生j能否坐该座位
+        位置 = np.tile(_初始座位(允许, 座位排, 布局.排容量), (数量, 1))
+        占用 = np.full((数量, 座位数), -1, dtype=np.intp)
+        占用[行号[:, None], 位置] = np.arange(受限数)
+        位置表, 占用表 = 位置.ravel(), 占用.ravel()
+        位置基址, 占用基址 = 行号 * 受限数, 行号 * 座位数
+        if 步数 is None:
+            步数 = 4 * 受限数 * (受限数.bit_length() + 1)
+        for 步 in range(步数):
+            if 步 % 进度报告间隔 == 0:
+                检查取消(取消事件)
+                if 进度回调:
+                    进度回调("随机交换", 步, 步数)
+            # 一个随机数同时决定学生s和座位：提议 = s*座位数 + 座位
+            提议 = 随机源.integers(受限数 * 座位数, size=数量)
+            k = np.flatnonzero(允许座位[提议])
+            s, 座位 = np.divmod(提议[k], 座位数)
+            位置下标, 占用下标 = 位置基址[k], 占用基址[k]
+            t = 占用表[占用下标 + 座位]
+            原座位 = 位置表[位置下标 + s]
+
+            # 座位空着：s移过去
+            m = np.flatnonzero(t < 0)
+            占用表[占用下标[m] + 原座位[m]] = -1
+            占用表[占用下标[m] + 座位[m]] = s[m]
+            位置表[位置下标[m] + s[m]] = 座位[m]
+
+            # 座位上是其他受限学生t，且t能坐s原来的座位：两人交换
+            m = np.flatnonzero(t >= 0)
+            m = m[(t[m] != s[m]) & 允许座位[t[m] * 座位数 + 原座位[m]]]
+            s, t, 座位, 原座位 = s[m], t[m], 座位[m], 原座位[m]
+            位置表[位置下标[m] + s] = 座位
+            位置表[位置下标[m] + t] = 原座位
+            占用表[占用下标[m] + 座位] = s
+            占用表[占用下标[m] + 原座位] = t
+        方案[:, 受限下标] = 位置
+
+    # 其余学生：受限学生占用的座位随机键设为2，排序后剩余空座位排在前面且顺序随机
+    检查取消(取消事件)
+    if 进度回调:
+        进度回调("分配座位", 0, 1)
+    其余 = np.ones(学生数, dtype=bool)
+    其余[受限下标] = False
+    if 其余.any():
+        随机键 = 随机源.random((数量, 座位数))
+        if 受限数:
+            随机键[行号[:, None], 位置] = 2.0
+        方案[:, 其余] = np.argsort(随机键, axis=1)[:, :int(其余.sum())]
+    return 方案
+
+
+def 检查方案(方案, 学生名单, 布局, 指定排数安排=None):
+    """向量化检查每个方案是否合法（座位不重复且满足指定排数）
+
+    返回:
+        numpy.ndarray: 长度为K的bool数组
+    """
+    指定排数安排 = 指定排数安排 or {}
+    受限下标, 允许, 座位排 = 编译约束(学生名单, 布局, 指定排数安排)
+    排序后 = np.sort(方案, axis=1)
+    合法 = (排序后[:, 1:] != 排序后[:, :-1]).all(axis=1) if 方案.shape[1] > 1 else np.ones(len(方案), bool)
+    合法 &= ((方案 >= 0) & (方案 < 布局.座位数)).all(axis=1)
+    if len(受限下标):
+        受限座位 = np.clip(方案[:, 受限下标], 0, 布局.座位数 - 1)
+        合法 &= 允许[np.arange(len(受限下标)), 座位排[受限座位]].all(axis=1)
+    return 合法
+
+
+def 转为分配表(方案行, 学生名单, 布局):
+    """把数组中的一个方案转换为 座位分配表"""
+    座位列表 = 布局.座位列表
+    分配结果 = 座位分配表()
+    for 学生, 座位 in zip(学生名单, 方案行.tolist()):
+        分配结果.放置(学生, 座位列表[座位])
+    return 分配结果
+
+
+def 方案视图(方案行, 学生名单, 布局):
+    """把数组中的一个方案包装为 座位向量，与数组共用内存
+
+    参数:
+        学生名单: 名单索引，或与数组列对应的学生名单（每次调用都会建立新的名单索引）
+    """
+    if not isinstance(学生名单, 名单索引):
+        学生名单 = 名单索引(学生名单)
+    return 座位向量(学生名单, 布局, 方案行)
@@ -0,0 +1,204 @@
+"""基于二分图匹配的特殊安排求解
+
+把"学生只能坐在某几排"的约束看作 学生 -> 排 的二分图，每一排的容量为该排的座位数。
+- 使用带容量的 Hopcroft–Karp 算法一次性判定约束是否可满足
+- 不可满足时，根据霍尔定理找出"学生数多于座位数"的排集合
+- 可满足时，从匹配结果出发做随机交换（对称提议的马尔可夫链），
+  其平稳分布是所有合法安排上的均匀分布，从而得到均匀随机的座位安排
+"""
+from collections import deque
+
+import 运行指标
+from 后台任务 import 检查取消
+
+无穷 = float("inf")
+进度报告间隔 = 4096  # 随机游走每隔多少步报告一次进度并检查取消
+
+
+def 最大匹配(邻接, 容量):
+    """带容量的 Hopcroft–Karp 最大匹配
+
+    参数:
+        邻接: 列表，邻接[u] 为左侧顶点u（学生）可以连接的右侧顶点（排）列表
+        容量: 列表，容量[v] 为右侧顶点v最多可匹配的左侧顶点数
+
+    返回:
+        tuple: (匹配, 右侧匹配)
+        - 匹配: 列表，匹配[u] 为u匹配到的右侧顶点，未匹配为None
+        - 右侧匹配: 列表，右侧匹配[v] 为匹配到v的左侧顶点列表
+    """
+    左侧数 = len(邻接)
+    匹配 = [None] * 左侧数
+    右侧匹配 = [[] for _ in 容量]
+    距离 = [无穷] * 左侧数
+
+    def 广度优先():
+        队列 = deque()
+        for u in range(左侧数):
+            if 匹配[u] is None:
+                距离[u] = 0
+                队列.append(u)
+            else:
+                距离[u] = 无穷
+        找到增广路 = False
+        while 队列:
+            u = 队列.popleft()
+            for v in 邻接[u]:
+                if len(右侧匹配[v]) < 容量[v]:
+                    找到增广路 = True
+                    continue
+                for w in 右侧匹配[v]:
+                    if 距离[w] == 无穷:
+                        距离[w] = 距离[u] + 1
+                        队列.append(w)
+        return 找到增广路
+
+    def 深度优先(u):
+        for v in 邻接[u]:
+            if len(右侧匹配[v]) < 容量[v]:
+                右侧匹配[v].append(u)
+                匹配[u] = v
+                return True
+            for 序号, w in enumerate(右侧匹配[v]):
+                if 距离[w] == 距离[u] + 1 and 深度优先(w):
+                    # w 已改配到其他排，u 顶替 w 在 v 中的位置
+                    右侧匹配[v][序号] = u
+                    匹配[u] = v
+                    return True
+        距离[u] = 无穷
+        return False
+
+    while 广度优先():
+        for u in range(左侧数):
+            if 匹配[u] is None:
+                深度优先(u)
+
+    return 匹配, 右侧匹配
+
+
+def 查找霍尔违例(邻接, 容量, 匹配, 右侧匹配):
+    """根据最大匹配找出违反霍尔条件的集合
+
+    从每个未匹配的学生出发，沿"任意边到排、匹配边回到学生"的交错路径扩展，
+    得到的学生集合X只能坐在排集合N(X)中，而N(X)的座位已全部占满，故|X| > 容量(N(X))。
+
+    返回:
+        list: [(排集合, 学生序号列表, 座位数), ...]，每个元素是一个互不重叠的违例
+        （没有任何可选排的学生合并为一个排集合为空的违例）
+    """
+    已访问学生 = set()
+    违例列表 = []
+    for 起点 in range(len(邻接)):
+        if 匹配[起点] is not None or 起点 in 已访问学生:
+            continue
+        学生集合 = {起点}
+        排集合 = set()
+        队列 = deque([起点])
+        while 队列:
+            u = 队列.popleft()
+            for v in 邻接[u]:
+                if v in 排集合:
+                    continue
+                排集合.add(v)
+                for w in 右侧匹配[v]:
+                    if w not in 学生集合:
+                        学生集合.add(w)
+                        队列.append(w)
+        已访问学生 |= 学生集合
+
+        # 与已有违例共用某些排时合并（两个违例集合的并集仍违反霍尔条件）
+        剩余违例 = []
+        for 已有排, 已有学生 in 违例列表:
+            if 已有排 & 排集合 or not (已有排 or 排集合):
+                排集合 |= 已有排
+                学生集合 |= 已有学生
+            else:
+                剩余违例.append((已有排, 已有学生))
+        剩余违例.append((排集合, 学生集合))
+        违例列表 = 剩余违例
+    return [(排集合, sorted(学生集合), sum(容量[v] for v in 排集合))
+            for 排集合, 学生集合 in 违例列表]
+
+
+def 随机化安排(邻接, 容量, 匹配, 随机源, 步数=None, 进度回调=None, 取消事件=None):
+    """从一个合法的 学生->排 安排出发，随机游走得到均匀随机的合法安排
+
+    每一步均匀地选一个受限学生s和教室中的一个座位（按排容量加权地选排、再选排内位置）：
+    - 座位空着（未被受限学生占用）且s可以坐这一排，则把s移过去
+    - 座位上是受限学生t，且两人互换后都满足约束，则交换两人
+    提议是对称的，因此平稳分布是座位层面上所有合法安排的均匀分布。
+
+    参数:
+        邻接: 每个受限学生允许的排列表
+        容量: 每一排的座位数
+        匹配: 最大匹配给出的初始安排（必须是完全匹配）
+        随机源: random.Random实例或random模块
+        步数: 随机游走步数，默认随学生数增长
+        进度回调: 可选，进度回调(说明, 完成步数, 总步数)
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+
+    返回:
+        list: 每个受限学生最终所在的排
+    """
+    学生数 = len(邻接)
+    当前排 = list(匹配)
+    if 学生数 == 0:
+        return 当前排
+
+    允许 = [set(排列表) for 排列表 in 邻接]
+    排内学生 = [[] for _ in 容量]
+    排内位置 = [0] * 学生数
+    for u, v in enumerate(当前排):
+        排内位置[u] = len(排内学生[v])
+        排内学生[v].append(u)
+
+    # 座位按排连续编号，便于由座位序号O(1)定位到排和排内位置
+    座位所在排 = []
+    排起点 = []
+    for v, 座位数 in enumerate(容量):
+        排起点.append(len(座位所在排))
+        座位所在排.extend([v] * 座位数)
+    总座位数 = len(座位所在排)
+
+    if 步数 is None:
+        步数 = 4 * 学生数 * (学生数.bit_length() + 1)
+
+    # 热循环中用 random() 取整代替 randrange()，开销约为后者的三分之一
+    随机数 = 随机源.random
+    移动数 = 0
+    for 步 in range(步数):
+        if 步 % 进度报告间隔 == 0:
+            检查取消(取消事件)
+            if 进度回调:
+                进度回调("随机交换", 步, 步数)
+        s = int(随机数() * 学生数)
+        座位序号 = int(随机数() * 总座位数)
+        v = 座位所在排[座位序号]
+        if v not in 允许[s]:
+            continue
+        原排 = 当前排[s]
+        位置 = 座位序号 - 排起点[v]
+        if 位置 < len(排内学生[v]):
+            t = 排内学生[v][位置]
+            if t == s or 原排 not in 允许[t]:
+                continue
+            # 交换s和t
+            排内学生[原排][排内位置[s]], 排内学生[v][排内位置[t]] = t, s
+            排内位置[s], 排内位置[t] = 排内位置[t], 排内位置[s]
+            当前排[s], 当前排[t] = v, 原排
+            移动数 += 1
+        elif v != 原排:
+            # 从原排中交换删除s，再放入v
+            末尾 = 排内学生[原排].pop()
+            if 末尾 != s:
+                排内学生[原排][排内位置[s]] = 末尾
+                排内位置[末尾] = 排内位置[s]
+            排内位置[s] = len(排内学生[v])
+            排内学生[v].append(s)
+            当前排[s] = v
+            移动数 += 1
+    # 每一步查看一个座位
+    运行指标.计数("随机交换步数", 步数)
+    运行指标.计数("有效交换数", 移动数)
+    运行指标.计数("扫描座位数", 步数)
+    return 当前排
@@ -0,0 +1,246 @@
+"""从Excel、CSV或JSON读取学生名单
+
+学籍系统导出的名单通常是几千到几万行的表格，除姓名外还有班级、性别、身高等列。
+这里逐行读取表格（Excel用openpyxl的只读模式，CSV用csv模块），不把整张表读入内存，
+姓名以外的非空列作为学生属性（考试模式按属性分组）。CSV中的值都是文本；Excel中的整数、日期
+分别读为整数和 "2010-09-23" 形式的文本。
+
+表格第一行为表头，姓名所在的列名为 "姓名"（也可以是 "学生" 或 "名字"），其余列名即属性名。
+空行跳过；有内容但没有姓名的行、重复的姓名都报告为错误，一次列出全部错误。
+
+解析结果按 (路径, 修改时间, 大小) 缓存到用户缓存目录（见 启动缓存），同一文件再次读取时只读缓存，
+文件被修改或本模块更新后自动重新解析。
+
+命令行用法:
+    python 名单导入.py 名单.xlsx [-o 学生名单.json] [--check] [--no-cache]
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import sys
+
+import 启动缓存
+import 运行指标
+import 座位分配引擎 as 引擎
+from 后台任务 import 检查取消
+
+姓名列 = ("姓名", "学生", "名字")
+表格扩展名 = (".csv", ".xlsx", ".xlsm")
+报告间隔 = 1000  # 每读取这么多行报告一次进度、检查一次取消
+最多错误数 = 20  # 错误信息中最多列出的错误条数
+
+
+def 缓存路径(路径):
+    """名单文件的解析缓存路径，按文件的绝对路径区分"""
+    名称 = hashlib.sha256(os.path.abspath(路径).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.dirname(启动缓存.默认缓存路径()), "名单缓存", f"{名称}.pickle")
+
+
+def _整理值(值):
+    """单元格的值：去掉首尾空白，整数值的小数转为整数，日期转为文本；空值返回None"""
+    if 值 is None:
+        return None
+    if isinstance(值, str):
+        值 = 值.strip()
+        return 值 or None
+    if isinstance(值, float) and 值.is_integer():
+        return int(值)
+    if isinstance(值, datetime.datetime) and 值.time() == datetime.time():
+        return 值.date().isoformat()  # Excel的日期单元格读出为零点的datetime
+    if isinstance(值, (datetime.date, datetime.time)):
+        return 值.isoformat()
+    return 值
+
+
+def _读取CSV(路径):
+    """逐行返回CSV中的 (行号, 表头, 行)，Excel另存的GBK编码文件也能读取"""
+    for 编码 in ("utf-8-sig", "gb18030"):
+        已读 = False
+        try:
+            with open(路径, "r", encoding=编码, newline="") as f:
+                读取器 = csv.reader(f)
+                表头 = next(读取器, [])
+                for 行号, 行 in enumerate(读取器, 2):
+                    已读 = True
+                    yield 行号, 表头, 行
+            return
+        except UnicodeDecodeError:
+            # 文件按块解码，编码不对时读第一块就会出错；已经产生过行时不能换编码重读
+            if 已读 or 编码 == "gb18030":
+                raise ValueError(f"CSV文件编码无法识别（应为UTF-8或GBK）: {路径}") from None
+
+
+def _读取Excel(路径):
+    """逐行返回第一个工作表中的 (行号, 表头, 行)"""
+    try:
+        import openpyxl  # 可选依赖，只在读取Excel时需要
+    except ImportError:
+        raise ValueError("读取Excel文件需要安装openpyxl") from None
+    wb = openpyxl.load_workbook(路径, read_only=True, data_only=True)
+    try:
+        行迭代 = wb.worksheets[0].iter_rows(values_only=True)
+        表头 = next(行迭代, ())
+        for 行号, 行 in enumerate(行迭代, 2):
+            yield 行号, 表头, 行
+    finally:
+        wb.close()
+
+
+def _总行数(路径):
+    """Excel工作表记录的行数，用于报告进度；CSV和未知时为0"""
+    if os.path.splitext(路径)[1].lower() == ".csv":
+        return 0
+    try:
+        import openpyxl
+        wb = openpyxl.load_workbook(路径, read_only=True)
+        try:
+            return max(0, (wb.worksheets[0].max_row or 1) - 1)
+        finally:
+            wb.close()
+    except Exception:
+        return 0
+
+
+def 读取表格名单(路径, 进度回调=None, 取消事件=None):
+    """逐行读取CSV或Excel名单
+
+    参数:
+        进度回调: 可选，进度回调(说明, 已读行数, 总行数)，总行数未知时为0
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+
+    返回:
+        tuple: (姓名列表, {姓名: {属性: 值}})
+
+    异常:
+        ValueError: 缺少姓名列、有没有姓名的行或重复的姓名
+        OSError: 文件无法读取
+    """
+    扩展名 = os.path.splitext(路径)[1].lower()
+    if 扩展名 not in 表格扩展名:
+        raise ValueError(f"不支持的名单文件类型: {扩展名 or 路径}（支持 .json、.csv、.xlsx）")
+    行迭代 = _读取CSV(路径) if 扩展名 == ".csv" else _读取Excel(路径)
+    总数 = _总行数(路径) if 进度回调 else 0
+
+    名单 = []
+    属性 = {}
+    首次出现 = {}  # 姓名 -> 行号
+    错误列表 = []
+    列名 = None
+    for 行号, 表头, 行 in 行迭代:
+        if 列名 is None:
+            列名 = [str(_整理值(名称) or "") for 名称 in 表头]
+            姓名序号 = next((列名.index(名称) for 名称 in 姓名列 if 名称 in 列名), None)
+            if 姓名序号 is None:
+                raise ValueError(f"名单表头中没有姓名列（{'、'.join(姓名列)}之一）: {路径}")
+            属性列 = [(序号, 名称) for 序号, 名称 in enumerate(列名) if 名称 and 序号 != 姓名序号]
+        if 行号 % 报告间隔 == 0:
+            检查取消(取消事件)
+            if 进度回调:
+                进度回调("读取学生名单", 行号 - 1, 总数)
+
+        姓名 = _整理值(行[姓名序号]) if 姓名序号 < len(行) else None
+        其他 = {}
+        for 序号, 名称 in 属性列:
+            值 = _整理值(行[序号]) if 序号 < len(行) else None
+            if 值 is not None:
+                其他[名称] = 值
+        if 姓名 is None:
+            if 其他:
+                错误列表.append(f"第{行号}行没有姓名")
+            continue
+        姓名 = str(姓名)
+        if 姓名 in 首次出现:
+            错误列表.append(f"第{行号}行: {姓名}与第{首次出现[姓名]}行重复")
+            continue
+        首次出现[姓名] = 行号
+        名单.append(姓名)
+        if 其他:
+            属性[姓名] = 其他
+
+    if 列名 is None:
+        raise ValueError(f"名单文件是空的: {路径}")
+    if 错误列表:
+        多余 = len(错误列表) - 最多错误数
+        raise ValueError(f"名单中有{len(错误列表)}处错误: " + "；".join(错误列表[:最多错误数])
+                         + (f"；等{多余}处" if 多余 > 0 else ""))
+    运行指标.计数("名单行数", len(名单))
+    return 名单, 属性
+
+
+def 读取名单(路径, 使用缓存=True, 进度回调=None, 取消事件=None):
+    """读取JSON、CSV或Excel名单，表格的解析结果按文件签名缓存
+
+    参数:
+        使用缓存: 为False时总是重新解析，也不写入缓存
+        进度回调, 取消事件: 见 读取表格名单()
+
+    返回:
+        tuple: (姓名列表, {姓名: {属性: 值}})
+
+    异常:
+        ValueError: 名单格式错误
+        OSError: 文件无法读取
+    """
+    if os.path.splitext(路径)[1].lower() == ".json":
+        # JSON本身就是解析后的格式，直接读取比读缓存更快
+        return 引擎.读取学生名单(路径, 包含属性=True)
+    if not os.path.exists(路径):
+        raise FileNotFoundError(f"名单文件不存在: {路径}")
+
+    # 本模块的签名也作为依赖，解析规则改变后旧缓存自动失效
+    源文件列表 = [路径, __file__]
+    if 使用缓存:
+        with 运行指标.阶段("读取名单缓存"):
+            缓存 = 启动缓存.读取(源文件列表, 缓存路径(路径))
+        if 缓存 is not None:
+            运行指标.计数("名单缓存命中")
+            return 缓存
+    with 运行指标.阶段("解析名单表格"):
+        结果 = 读取表格名单(路径, 进度回调, 取消事件)
+    if 使用缓存:
+        启动缓存.写入(源文件列表, 结果, 缓存路径(路径))
+    return 结果
+
+
+def 名单数据(名单, 属性):
+    """转为 学生名单.json 的格式：没有属性的学生为姓名，有属性的为对象"""
+    return [dict({"姓名": 学生}, **属性[学生]) if 学生 in 属性 else 学生 for 学生 in 名单]
+
+
+def 写入名单(路径, 名单, 属性):
+    """把名单写成 学生名单.json 格式，先写临时文件再替换"""
+    临时路径 = 路径 + ".tmp"
+    with open(临时路径, "w", encoding="utf-8") as f:
+        json.dump(名单数据(名单, 属性), f, ensure_ascii=False, indent=4)
+    os.replace(临时路径, 路径)
+
+
+def 主程序(参数列表=None):
+    """命令行入口：检查名单表格并转换为 学生名单.json"""
+    解析器 = argparse.ArgumentParser(description="从Excel或CSV读取学生名单")
+    解析器.add_argument("名单文件", help="名单文件（.xlsx、.csv、.json）")
+    解析器.add_argument("-o", "--output", default=引擎.学生名单文件, help="输出的学生名单JSON文件")
+    解析器.add_argument("--check", action="store_true", help="只检查，不写入")
+    解析器.add_argument("--no-cache", action="store_true", help="不使用、也不写入解析缓存")
+    参数 = 解析器.parse_args(参数列表)
+
+    try:
+        名单, 属性 = 读取名单(参数.名单文件, not 参数.no_cache)
+    except (OSError, ValueError) as e:
+        print(f"读取失败: {e}", file=sys.stderr)
+        return 1
+    属性名 = sorted({名称 for 值 in 属性.values() for 名称 in 值})
+    说明 = f"{len(名单)}名学生" + (f"，属性: {'、'.join(属性名)}" if 属性名 else "")
+    if 参数.check:
+        print(f"检查通过，共{说明}")
+        return 0
+    写入名单(参数.output, 名单, 属性)
+    print(f"已写入{说明} -> {参数.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(主程序())
@@ -0,0 +1,114 @@
+"""后台任务
+
+在工作线程中执行耗时操作（座位分配、Excel导出），避免Tk主线程卡住、窗口"未响应"。
+- 工作线程只通过队列传回进度和结果，不直接操作任何控件
+- 主线程用 root.after() 定时轮询队列，在主线程中调用回调更新界面
+- 取消是协作式的：任务函数收到一个threading.Event，定期检查，被取消时抛出 任务已取消
+
+本模块不导入tkinter，分配引擎和导出模块也可以使用 任务已取消 和 检查取消()。
+"""
+import queue
+import threading
+import time
+
+
+class 任务已取消(Exception):
+    """任务被用户取消时抛出"""
+
+
+def 检查取消(取消事件):
+    """取消事件已设置时抛出 任务已取消，取消事件为None时不做任何事"""
+    if 取消事件 is not None and 取消事件.is_set():
+        raise 任务已取消()
+
+
+class 后台任务:
+    """在工作线程中运行一个函数，并在Tk主线程中回调
+
+    任务函数的签名为 函数(进度回调, 取消事件)，其中 进度回调(说明, 完成, 总数)。
+
+    主要方法：
+    - 开始(): 启动工作线程并开始轮询
+    - 取消(): 请求取消任务
+    - 已用时间(): 任务开始以来的秒数
+    """
+    def __init__(self, root, 函数, 完成回调, 失败回调=None, 进度回调=None, 取消回调=None,
+                 轮询间隔=50):
+        """初始化后台任务
+
+        参数:
+            root: 用于 after() 轮询的tk对象
+            函数: 在工作线程中执行的任务函数
+            完成回调: 完成回调(结果, 耗时秒)，在主线程中调用
+            失败回调: 失败回调(异常)，在主线程中调用
+            进度回调: 进度回调(说明, 完成, 总数)，在主线程中调用
+            取消回调: 取消回调()，任务确认取消后在主线程中调用
+            轮询间隔: 轮询队列的间隔（毫秒）
+        """
+        self.root = root
+        self.函数 = 函数
+        self.完成回调 = 完成回调
+        self.失败回调 = 失败回调
+        self.进度回调 = 进度回调
+        self.取消回调 = 取消回调
+        self.轮询间隔 = 轮询间隔
+        self.取消事件 = threading.Event()
+        self._队列 = queue.Queue()
+        self._线程 = None
+        self._开始时间 = None
+        self.运行中 = False
+
+    def 开始(self):
+        """启动工作线程并开始轮询结果"""
+        self._开始时间 = time.perf_counter()
+        self.运行中 = True
+        self._线程 = threading.Thread(target=self._运行, daemon=True)
+        self._线程.start()
+        self.root.after(self.轮询间隔, self._轮询)
+
+    def 已用时间(self):
+        """返回任务开始以来的秒数"""
+        return time.perf_counter() - self._开始时间
+
+    def 取消(self):
+        """请求取消任务，任务在下一次检查取消时停止"""
+        self.取消事件.set()
+
+    def _报告进度(self, 说明, 完成, 总数):
+        self._队列.put(("进度", (说明, 完成, 总数)))
+
+    def _运行(self):
+        """工作线程入口"""
+        try:
+            结果 = self.函数(self._报告进度, self.取消事件)
+        except 任务已取消:
+            self._队列.put(("取消", None))
+        except Exception as e:
+            self._队列.put(("失败", e))
+        else:
+            # 在工作线程中记录耗时，不包含等待轮询的时间
+            self._队列.put(("完成", (结果, self.已用时间())))
+
+    def _轮询(self):
+        """在主线程中处理队列中的所有消息"""
+        最新进度 = None
+        while True:
+            try:
+                类型, 内容 = self._队列.get_nowait()
+            except queue.Empty:
+                break
+            if 类型 == "进度":
+                最新进度 = 内容  # 只显示最新的进度，避免频繁刷新界面
+                continue
+            self.运行中 = False
+            if 类型 == "完成":
+                self.完成回调(*内容)
+            elif 类型 == "失败" and self.失败回调:
+                self.失败回调(内容)
+            elif 类型 == "取消" and self.取消回调:
+                self.取消回调()
+            return
+
+        if 最新进度 is not None and self.进度回调:
+            self.进度回调(*最新进度)
+        self.root.after(self.轮询间隔, self._轮询)
@@ -0,0 +1,86 @@
+"""启动缓存
+
+界面每次启动都要读取并解析 学生名单.json、特殊安排.json 和 配置.json，再编译座位布局。
+这里把解析和编译的结果连同各源文件的签名（修改时间和大小）保存为用户缓存目录中的一个文件，
+下次启动时只要源文件都没有变化，就只读这一个文件。任何源文件被修改、创建或删除，缓存都会失效。
+
+单文件打包（PyInstaller --onefile）时，资源文件每次启动都会解压到新的临时目录，
+修改时间和路径每次都不同；但它们的内容只取决于exe本身，因此这类文件改用exe的签名。
+
+缓存只是加速手段：读取失败、格式不符都当作没有缓存，写入失败则忽略。
+"""
+import os
+import pickle
+import sys
+
+缓存版本 = 4
+缓存文件名 = "启动缓存.pickle"
+
+
+def 默认缓存路径():
+    """返回用户缓存目录中的缓存文件路径"""
+    if sys.platform == "win32":
+        基础目录 = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        基础目录 = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(基础目录, "座位分配系统", 缓存文件名)
+
+
+def 文件签名(路径):
+    """返回文件的签名，文件不存在时修改时间和大小为None
+
+    返回:
+        tuple: (名称, 修改时间纳秒, 大小)
+    """
+    路径 = os.path.abspath(路径)
+    解压目录 = getattr(sys, "_MEIPASS", None)
+    if 解压目录 and 路径.startswith(os.path.abspath(解压目录) + os.sep):
+        名称 = "exe:" + os.path.relpath(路径, 解压目录)
+        路径 = sys.executable
+    else:
+        名称 = 路径
+    try:
+        状态 = os.stat(路径)
+    except OSError:
+        return 名称, None, None
+    return 名称, 状态.st_mtime_ns, 状态.st_size
+
+
+def 读取(源文件列表, 缓存路径=None):
+    """源文件都没有变化时返回缓存的内容，否则返回None
+
+    参数:
+        源文件列表: 缓存内容所依赖的文件路径列表
+        缓存路径: 缓存文件，默认为 默认缓存路径()
+    """
+    缓存路径 = 缓存路径 or 默认缓存路径()
+    try:
+        with open(缓存路径, "rb") as f:
+            数据 = pickle.load(f)
+    except Exception:
+        # 文件不存在、损坏或由不兼容的版本写入
+        return None
+    if not isinstance(数据, dict) or 数据.get("版本") != 缓存版本:
+        return None
+    if 数据.get("签名") != [文件签名(路径) for 路径 in 源文件列表]:
+        return None
+    return 数据.get("内容")
+
+
+def 写入(源文件列表, 内容, 缓存路径=None):
+    """保存内容和源文件签名，先写临时文件再替换，失败时忽略
+
+    返回:
+        bool: 是否写入成功
+    """
+    缓存路径 = 缓存路径 or 默认缓存路径()
+    数据 = {"版本": 缓存版本, "签名": [文件签名(路径) for 路径 in 源文件列表], "内容": 内容}
+    临时路径 = 缓存路径 + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(缓存路径), exist_ok=True)
+        with open(临时路径, "wb") as f:
+            pickle.dump(数据, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(临时路径, 缓存路径)
+        return True
+    except OSError:
+        return False
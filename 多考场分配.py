@@ -0,0 +1,295 @@
+"""多考场座位分配
+
+把一份大名单按容量和约束分到多个考场，再用进程池并行为每个考场分配座位。
+
+流程:
+1. 划分考场: 有指定考场或指定排数的学生，用带容量的最大匹配分到 (考场, 排)，
+   保证每个考场内的特殊安排都可满足；其余学生按各考场容量比例分配
+2. 并行求解: 每个考场调用 座位分配引擎.分配座位()，在ProcessPoolExecutor中并行执行
+3. 每个考场使用由 (种子, 考场名) 派生的独立随机源，结果与进程数和执行顺序无关，可复现
+4. 指定 --separate 时各考场改用 考试模式.分配考试座位()，按名单中的属性（如班级、试卷）让同组学生不相邻
+
+结果为 [(考场名, 布局, 分配结果), ...]，可直接交给 座位表导出.导出座位表()。
+各考场的分配结果以 座位向量 从工作进程传回，每人只占一个整数座位下标。
+
+命令行用法:
+    python 多考场分配.py 考场配置.json 学生名单.json [--special 特殊安排.json]
+                         [--seed 种子] [--jobs 进程数] [-o 结果.json] [--excel 座位表.xlsx]
+                         [--separate 属性 ...]
+
+考场配置.json 格式:
+    {
+        "座位布局": {...},                      # 可选，各考场的默认布局
+        "考场": [
+            {"名称": "101"},
+            {"名称": "102", "座位布局": {...}}  # 可单独指定布局
+        ]
+    }
+特殊安排.json 在原有 "指定排数安排" 之外可包含 "指定考场安排": {学生: [考场名, ...]}。
+"""
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import 匹配求解
+import 座位分配引擎 as 引擎
+from 座位向量 import 名单索引, 座位向量
+from 座位布局 import 座位布局, 默认布局配置
+
+
+def 读取考场配置(路径):
+    """读取考场配置文件
+
+    返回:
+        list: [(考场名, 布局), ...]
+    """
+    with open(路径, "r", encoding="utf-8") as f:
+        配置 = json.load(f)
+    默认配置 = 配置.get("座位布局", 默认布局配置)
+    考场列表 = []
+    for 考场 in 配置.get("考场", []):
+        布局 = 座位布局.从配置创建(考场.get("座位布局", 默认配置))
+        考场列表.append((str(考场["名称"]), 布局))
+    if not 考场列表:
+        raise ValueError(f"考场配置中没有考场: {路径}")
+    return 考场列表
+
+
+def 读取考场特殊安排(路径):
+    """读取特殊安排文件中的指定排数安排和指定考场安排，文件不存在时都为空
+
+    返回:
+        tuple: (指定排数安排, 指定考场安排)
+    """
+    if not 路径 or not os.path.exists(路径):
+        return {}, {}
+    with open(路径, "r", encoding="utf-8") as f:
+        数据 = json.load(f)
+    return dict(数据.get("指定排数安排", {})), dict(数据.get("指定考场安排", {}))
+
+
+def 考场种子(种子, 考场名):
+    """由总种子和考场名派生考场的随机种子，与进程和执行顺序无关"""
+    return f"{种子}:{考场名}"
+
+
+def 划分考场(学生名单, 考场列表, 指定排数安排=None, 指定考场安排=None, 随机源=None):
+    """把学生分到各个考场
+
+    参数:
+        学生名单: 全部学生
+        考场列表: [(考场名, 布局), ...]
+        指定排数安排: {学生: 排数列表}，在所分到的考场内生效
+        指定考场安排: {学生: 考场名列表}
+        随机源: random.Random实例
+
+    返回:
+        list: 与考场列表对应的每个考场的学生名单
+
+    异常:
+        分配失败错误: 总容量不足或约束无法满足
+    """
+    指定排数安排 = 指定排数安排 or {}
+    指定考场安排 = 指定考场安排 or {}
+    随机源 = 随机源 or random
+
+    总容量 = sum(布局.座位数 for _, 布局 in 考场列表)
+    if len(学生名单) > 总容量:
+        raise 引擎.分配失败错误(f"学生人数({len(学生名单)})超过考场总座位数({总容量})")
+
+    # 右侧顶点为 (考场, 排)，容量为该排座位数，这样考场内的指定排数也能一并保证
+    右侧 = []
+    容量 = []
+    右侧序号 = {}
+    考场排 = []
+    for 考场序号, (_, 布局) in enumerate(考场列表):
+        本考场 = []
+        for 排, 座位数 in zip(布局.排号列表, 布局.排容量):
+            右侧序号[(考场序号, 排)] = len(右侧)
+            本考场.append(len(右侧))
+            右侧.append((考场序号, 排))
+            容量.append(座位数)
+        考场排.append(本考场)
+    考场序号表 = {名称: 序号 for 序号, (名称, _) in enumerate(考场列表)}
+
+    受限学生 = [学生 for 学生 in dict.fromkeys(学生名单)
+            if 学生 in 指定排数安排 or 学生 in 指定考场安排]
+    邻接 = []
+    for 学生 in 受限学生:
+        if 学生 in 指定考场安排:
+            可选考场 = [考场序号表[名称] for 名称 in 指定考场安排[学生] if 名称 in 考场序号表]
+        else:
+            可选考场 = range(len(考场列表))
+        if 学生 in 指定排数安排:
+            可选排 = set(指定排数安排[学生])
+            边 = [右侧序号[(考场, 排)] for 考场 in 可选考场 for 排 in 可选排
+                 if (考场, 排) in 右侧序号]
+        else:
+            边 = [v for 考场 in 可选考场 for v in 考场排[考场]]
+        # 打乱邻接顺序，使受限学生随机落在可选考场中
+        随机源.shuffle(边)
+        邻接.append(边)
+
+    匹配, 右侧匹配 = 匹配求解.最大匹配(邻接, 容量)
+    if None in 匹配:
+        描述 = []
+        for 排集合, 学生序号, 座位数 in 匹配求解.查找霍尔违例(邻接, 容量, 匹配, 右侧匹配):
+            姓名 = [受限学生[i] for i in 学生序号]
+            姓名文本 = "、".join(姓名[:5]) + ("等" if len(姓名) > 5 else "")
+            描述.append(f"{姓名文本}共{len(姓名)}名学生可选的考场和排只有{座位数}个座位")
+        raise 引擎.分配失败错误("特殊安排无法满足: " + "；".join(描述))
+
+    考场学生 = [[] for _ in 考场列表]
+    for 序号, v in enumerate(匹配):
+        考场学生[右侧[v][0]].append(受限学生[序号])
+
+    # 其余学生按考场容量比例分配，先取整，再按差额最大的考场逐个补足
+    受限集合 = set(受限学生)
+    其余学生 = [学生 for 学生 in dict.fromkeys(学生名单) if 学生 not in 受限集合]
+    随机源.shuffle(其余学生)
+    总人数 = len(受限学生) + len(其余学生)
+    目标 = [总人数 * 布局.座位数 / 总容量 for _, 布局 in 考场列表]
+    名额 = [max(0, min(布局.座位数 - len(考场学生[i]), int(目标[i]) - len(考场学生[i])))
+          for i, (_, 布局) in enumerate(考场列表)]
+    差额 = len(其余学生) - sum(名额)
+    if 差额 > 0:
+        堆 = [(len(考场学生[i]) + 名额[i] - 目标[i], i) for i in range(len(考场列表))]
+        heapq.heapify(堆)
+        while 差额 > 0:
+            _, i = heapq.heappop(堆)
+            if len(考场学生[i]) + 名额[i] >= 考场列表[i][1].座位数:
+                continue  # 考场已满
+            名额[i] += 1
+            差额 -= 1
+            heapq.heappush(堆, (len(考场学生[i]) + 名额[i] - 目标[i], i))
+    elif 差额 < 0:
+        堆 = [(目标[i] - len(考场学生[i]) - 名额[i], i) for i in range(len(考场列表)) if 名额[i]]
+        heapq.heapify(堆)
+        while 差额 < 0:
+            _, i = heapq.heappop(堆)
+            名额[i] -= 1
+            差额 += 1
+            if 名额[i]:
+                heapq.heappush(堆, (目标[i] - len(考场学生[i]) - 名额[i], i))
+
+    起点 = 0
+    for i, 数量 in enumerate(名额):
+        考场学生[i].extend(其余学生[起点:起点 + 数量])
+        起点 += 数量
+    return 考场学生
+
+
+def _求解考场(任务):
+    """进程池中执行的单个考场分配，必须是模块级函数以便序列化"""
+    考场名, 布局, 学生名单, 指定排数安排, 种子, 学生属性, 分组依据 = 任务
+    if 分组依据:
+        import 考试模式
+        分配结果 = 考试模式.分配考试座位(学生名单, 布局, 学生属性, 分组依据, 指定排数安排, random.Random(种子))
+    else:
+        分配结果 = 引擎.分配座位(学生名单, 布局, 指定排数安排, random.Random(种子))
+    # 以座位向量返回，传回主进程的数据只有名单和每人一个座位下标
+    return 考场名, 布局, 座位向量.从分配表(分配结果, 布局, 名单索引(学生名单))
+
+
+def 多考场分配(学生名单, 考场列表, 指定排数安排=None, 指定考场安排=None, 种子=None, 进程数=None,
+          学生属性=None, 分组依据=None):
+    """为多个考场分配座位
+
+    参数:
+        学生名单: 全部学生
+        考场列表: [(考场名, 布局), ...]
+        指定排数安排: {学生: 排数列表}
+        指定考场安排: {学生: 考场名列表}
+        种子: 随机种子，相同输入和种子得到相同结果；为None时随机生成
+        进程数: 并行进程数，默认为CPU核数；为1时在当前进程中依次求解
+        学生属性: {学生: {属性: 值}}，见 引擎.整理学生名单()
+        分组依据: 属性名列表，给出时考场内这些属性相同的学生互不相邻
+
+    返回:
+        list: [(考场名, 布局, 分配结果), ...]，顺序与考场列表一致；分配结果为 座位向量
+    """
+    指定排数安排 = 指定排数安排 or {}
+    学生属性 = 学生属性 or {}
+    分组依据 = list(分组依据) if 分组依据 else None
+    if 种子 is None:
+        种子 = random.randrange(2 ** 32)
+    考场学生 = 划分考场(学生名单, 考场列表, 指定排数安排, 指定考场安排,
+                   random.Random(考场种子(种子, "划分")))
+
+    任务列表 = [
+        (考场名, 布局, 名单, {学生: 指定排数安排[学生] for 学生 in 名单 if 学生 in 指定排数安排},
+         考场种子(种子, 考场名), {学生: 学生属性[学生] for 学生 in 名单 if 学生 in 学生属性}, 分组依据)
+        for (考场名, 布局), 名单 in zip(考场列表, 考场学生)
+    ]
+
+    进程数 = 进程数 or os.cpu_count() or 1
+    if 进程数 == 1 or len(任务列表) == 1:
+        return [_求解考场(任务) for 任务 in 任务列表]
+
+    # 每个进程一次领取多个考场，减少进程间通信次数
+    每批数量 = max(1, len(任务列表) // (进程数 * 4))
+    with ProcessPoolExecutor(max_workers=进程数) as 进程池:
+        return list(进程池.map(_求解考场, 任务列表, chunksize=每批数量))
+
+
+def 合并结果(考场结果):
+    """把各考场结果合并为 {学生: (考场名, 行, 列)}"""
+    return {学生: (考场名, 行, 列)
+            for 考场名, _, 分配结果 in 考场结果
+            for 学生, (行, 列) in 分配结果.items()}
+
+
+def 主程序(参数列表=None):
+    """命令行入口"""
+    解析器 = argparse.ArgumentParser(description="多考场座位分配")
+    解析器.add_argument("考场配置", help="考场配置JSON文件")
+    解析器.add_argument("学生名单", help="学生名单JSON文件")
+    解析器.add_argument("--special", default=None, help="特殊安排JSON文件")
+    解析器.add_argument("--seed", type=int, default=None, help="随机种子，用于复现结果")
+    解析器.add_argument("--jobs", type=int, default=None, help="并行进程数，默认为CPU核数")
+    解析器.add_argument("-o", "--output", default="多考场座位表.json", help="结果JSON文件")
+    解析器.add_argument("--excel", default=None, metavar="文件路径", help="同时导出Excel（需要openpyxl）")
+    解析器.add_argument("--separate", nargs="+", default=None, metavar="属性",
+                        help="考场内这些属性（如 班级 试卷）相同的学生互不相邻，属性来自学生名单中的对象")
+    参数 = 解析器.parse_args(参数列表)
+
+    try:
+        考场列表 = 读取考场配置(参数.考场配置)
+        学生名单, 学生属性 = 引擎.读取学生名单(参数.学生名单, 包含属性=True)
+        指定排数安排, 指定考场安排 = 读取考场特殊安排(参数.special)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"读取输入失败: {e}", file=sys.stderr)
+        return 1
+
+    种子 = 参数.seed if 参数.seed is not None else random.randrange(2 ** 32)
+    开始时间 = time.perf_counter()
+    try:
+        考场结果 = 多考场分配(学生名单, 考场列表, 指定排数安排, 指定考场安排, 种子, 参数.jobs,
+                      学生属性, 参数.separate)
+    except 引擎.分配失败错误 as e:
+        print(e, file=sys.stderr)
+        return 1
+    耗时 = time.perf_counter() - 开始时间
+
+    with open(参数.output, "w", encoding="utf-8") as f:
+        json.dump({"种子": 种子,
+                   "座位表": {学生: list(位置) for 学生, 位置 in 合并结果(考场结果).items()}},
+                  f, ensure_ascii=False, indent=4)
+    print(f"已为{len(学生名单)}名学生分配{len(考场列表)}个考场 ({耗时:.2f} s, 种子 {种子}) -> {参数.output}")
+
+    if 参数.excel:
+        import 座位表导出  # openpyxl为可选依赖，只在需要时导入
+        座位表导出.导出座位表(参数.excel, 考场结果)
+        print(f"已导出Excel -> {参数.excel}")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 兼容PyInstaller打包后的多进程
+    sys.exit(主程序())
@@ -0,0 +1,213 @@
+"""在现有座位上做最少移动的调整
+
+有学生加入或离开、管理员新增或修改了指定排数时，重新随机分配会让全班都换座位。
+这里从当前的分配结果出发，只移动必要的学生：
+- 离开的学生直接让出座位
+- 加入的学生、不再满足指定排数的学生需要（重新）入座
+- 能直接坐空座位就坐空座位；所在排都坐满时，沿"学生 -> 排"做广度优先搜索，
+  找一条最短的挪位链：新学生坐进A的座位，A挪到允许的另一排坐进B的座位……最后一人坐空座位
+
+这与 匹配求解.最大匹配() 中的增广路相同：已入座的受限学生本身就是一个合法的匹配，
+找不到增广路说明特殊安排确实无法满足。搜索只展开被挪动学生允许的排，没有指定排数的学生
+可以挪到任何空座位，所以通常在第一排就结束，耗时与变化的人数成正比，而不是与座位数成正比。
+"""
+import random
+from collections import deque
+
+import 运行指标
+import 座位分配引擎 as 引擎
+
+
+def 修复座位(分配结果, 布局, 加入=(), 离开=(), 指定排数安排=None, 变化学生=None, 随机源=None):
+    """在分配结果上做最少移动的调整，直接修改传入的分配表
+
+    参数:
+        分配结果: 座位分配表，当前的座位
+        布局: 座位布局
+        加入: 新加入、需要入座的学生（已有座位的忽略）
+        离开: 离开的学生（没有座位的忽略）
+        指定排数安排: {学生: 排数列表}，修改后的完整安排
+        变化学生: 可选，指定排数有变化的学生，只检查这些学生是否需要换排；默认检查安排中的全部学生
+        随机源: random.Random实例，可选，用于复现结果
+
+    返回:
+        list: [(学生, 原座位, 新座位), ...]，每名位置有变化的学生一项；
+        加入的学生原座位为None，离开的学生新座位为None
+
+    异常:
+        分配失败错误: 座位不足或特殊安排无法满足，此时分配结果保持不变
+    """
+    指定排数安排 = 指定排数安排 or {}
+    随机源 = 随机源 or random
+    原座位 = {}  # 本次调整中动过的学生 -> 调整前的座位（没有座位为None）
+
+    def 移动(学生, 座位):
+        if 学生 not in 原座位:
+            原座位[学生] = 分配结果.get(学生)
+        if 座位 is None:
+            分配结果.移除(学生)
+        else:
+            分配结果.放置(学生, 座位)
+
+    with 运行指标.阶段("修复座位"):
+        try:
+            已释放 = []
+            for 学生 in 离开:
+                if 学生 in 分配结果:
+                    已释放.append(分配结果[学生])
+                    移动(学生, None)
+
+            # 需要入座的学生：新加入的，以及坐的排不再符合指定排数的
+            待入座 = [学生 for 学生 in dict.fromkeys(加入) if 学生 not in 分配结果]
+            for 学生 in 指定排数安排 if 变化学生 is None else 变化学生:
+                if 学生 in 分配结果 and 学生 in 指定排数安排 and 分配结果[学生][0] not in 指定排数安排[学生]:
+                    已释放.append(分配结果[学生])
+                    移动(学生, None)
+                    待入座.append(学生)
+            if len(分配结果) + len(待入座) > 布局.座位数:
+                raise 引擎.分配失败错误(
+                    f"学生人数({len(分配结果) + len(待入座)})超过可用座位数({布局.座位数})")
+
+            # 可选排少的学生先入座
+            待入座.sort(key=lambda 学生: len(指定排数安排.get(学生, 布局.排号列表)))
+            搜索 = _挪位搜索(分配结果, 布局, 指定排数安排, 已释放, 随机源)
+            for 学生 in 待入座:
+                链 = 搜索.最短挪位链(学生)
+                if 链 is None:
+                    raise 引擎.分配失败错误(f"无法为{学生}安排座位：{_失败原因(学生, 分配结果, 布局, 指定排数安排, 待入座)}")
+                # 从链尾开始挪，每一步的目标座位都已空出
+                for 挪动学生, 座位 in reversed(链):
+                    移动(挪动学生, 座位)
+                运行指标.计数("挪位链长度", len(链))
+        except BaseException:
+            _恢复(分配结果, 原座位)
+            raise
+
+    移动列表 = [(学生, 座位, 分配结果.get(学生)) for 学生, 座位 in 原座位.items()
+            if 座位 != 分配结果.get(学生)]
+    运行指标.计数("修复移动数", len(移动列表))
+    return 移动列表
+
+
+class _挪位搜索:
+    """在当前分配结果上查找最短挪位链
+
+    每一排的座位在第一次用到时才列出；空座位优先用刚释放的座位，
+    没有时从随机的一排开始依次查找，通常只需查看很少几排。
+    """
+    def __init__(self, 分配结果, 布局, 指定排数安排, 已释放, 随机源):
+        self.分配结果 = 分配结果
+        self.布局 = 布局
+        self.指定排数安排 = 指定排数安排
+        self.已释放 = 已释放
+        self.随机源 = 随机源
+        self._排座位 = {}
+
+    def 排座位(self, 排):
+        """某一排的全部座位"""
+        座位列表 = self._排座位.get(排)
+        if 座位列表 is None:
+            布局 = self.布局
+            座位列表 = []
+            if 0 <= 排 < 布局.行数:
+                起点 = 排 * 布局.列数
+                座位列表 = [(排, 列) for 列, 序号 in enumerate(布局.座位序号[起点:起点 + 布局.列数]) if 序号 >= 0]
+            self._排座位[排] = 座位列表
+        return 座位列表
+
+    def 排内空座位列表(self, 排):
+        """某一排当前的全部空座位"""
+        return [座位 for 座位 in self.排座位(排) if self.分配结果.座位上的学生(座位) is None]
+
+    def 排内空座位(self, 排):
+        """随机返回某一排的一个空座位，没有返回None"""
+        空座位 = self.排内空座位列表(排)
+        return self.随机源.choice(空座位) if 空座位 else None
+
+    def 任意空座位(self):
+        """返回任意一个空座位，没有返回None
+
+        候选空座位用完时从随机的一排开始逐排查找，找到的一排空座位全部加入候选，供之后使用。
+        """
+        if len(self.分配结果) >= self.布局.座位数:
+            return None
+        排号列表 = self.布局.排号列表
+        起点 = self.随机源.randrange(len(排号列表))
+        序号 = 0
+        while True:
+            while self.已释放:
+                座位 = self.已释放.pop(self.随机源.randrange(len(self.已释放)))
+                if self.分配结果.座位上的学生(座位) is None:
+                    return 座位
+            if 序号 >= len(排号列表):
+                return None
+            self.已释放 = self.排内空座位列表(排号列表[(起点 + 序号) % len(排号列表)])
+            序号 += 1
+
+    def 最短挪位链(self, 学生):
+        """为没有座位的学生找最短挪位链
+
+        返回:
+            list: [(学生, 目标座位), ...]，第一项是要入座的学生，之后每人坐进前一人让出的座位；
+            找不到时返回None
+        """
+        if 学生 not in self.指定排数安排:
+            座位 = self.任意空座位()
+            return None if 座位 is None else [(学生, 座位)]
+
+        可选排 = list(dict.fromkeys(self.指定排数安排[学生]))
+        self.随机源.shuffle(可选排)
+        # 前驱[排] = (上一排, 从上一排挪到这一排的学生, 该学生在上一排让出的座位)
+        前驱 = {排: None for 排 in 可选排}
+        队列 = deque(可选排)
+        while 队列:
+            排 = 队列.popleft()
+            座位 = self.排内空座位(排)
+            if 座位 is not None:
+                return self._还原链(学生, 前驱, 排, 座位)
+            座位列表 = list(self.排座位(排))
+            self.随机源.shuffle(座位列表)
+            for 座位 in 座位列表:
+                占用者 = self.分配结果.座位上的学生(座位)
+                if 占用者 is None:
+                    continue
+                if 占用者 not in self.指定排数安排:
+                    # 没有指定排数的学生可以挪到任何空座位，这一排坐满说明空座位在别的排
+                    空座位 = self.任意空座位()
+                    if 空座位 is None:
+                        return None
+                    return self._还原链(学生, 前驱, 排, 座位) + [(占用者, 空座位)]
+                for 下一排 in self.指定排数安排[占用者]:
+                    if 下一排 not in 前驱:
+                        前驱[下一排] = (排, 占用者, 座位)
+                        队列.append(下一排)
+        return None
+
+    @staticmethod
+    def _还原链(学生, 前驱, 排, 座位):
+        """沿前驱回溯，得到 [(学生, 目标座位), ...]"""
+        链 = []
+        while 前驱[排] is not None:
+            上一排, 挪动学生, 让出座位 = 前驱[排]
+            链.append((挪动学生, 座位))
+            排, 座位 = 上一排, 让出座位
+        链.append((学生, 座位))
+        链.reverse()
+        return 链
+
+
+def _失败原因(学生, 分配结果, 布局, 指定排数安排, 待入座):
+    """用最大匹配找出违反霍尔条件的排，说明无法满足的原因"""
+    学生名单 = list(分配结果) + [学生 for 学生 in 待入座 if 学生 not in 分配结果]
+    可行, 错误信息 = 引擎.验证特殊安排(学生名单, 布局, 指定排数安排)
+    return 错误信息 if not 可行 else "没有可用的空座位"
+
+
+def _恢复(分配结果, 原座位):
+    """把动过的学生放回调整前的座位"""
+    for 学生 in 原座位:
+        if 学生 in 分配结果:
+            分配结果.移除(学生)
+    for 学生, 座位 in 原座位.items():
+        if 座位 is not None:
+            分配结果.放置(学生, 座位)
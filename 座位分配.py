@@ -1,18 +1,48 @@
-import random
+import sys
+import time
+
+# 启动计时从这里开始；带 --startup-profile 启动时记录此后每个模块的导入耗时
+启动开始时间 = time.perf_counter()
+if __name__ == "__main__" and "--startup-profile" in sys.argv:
+    import 运行指标
+    停止记录导入 = 运行指标.开始记录导入()
+else:
+    停止记录导入 = None
+
 import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog
+from tkinter import messagebox, simpledialog, filedialog, ttk
 import json
 import os
-import sys
 import datetime
-try:
-    import openpyxl
-    from openpyxl.styles import Alignment, PatternFill, Border, Side
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
+import functools
+import importlib.util
+import 座位分配引擎 as 引擎
+from 座位分配表 import 座位分配表
+from 座位布局 import 座位布局, 默认布局
+from 画布座位视图 import 画布座位视图
+from 后台任务 import 后台任务
+import 运行指标
+import 启动缓存
+import 座位约束
+import 状态日志
+import 座位向量
+import 种子安排
+import 撤销记录
+
+# openpyxl导入需要约0.3秒，启动时只检查是否安装，第一次导出时才导入座位表导出模块
+EXCEL_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+# 批量生成候选方案需要numpy，同样只在第一次使用时导入
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# 一次生成候选方案的默认数量和上限
+默认方案数 = 20
+最大方案数 = 100000
+
+# 座位数超过该值时使用画布视图，而不是每个座位一个标签
+画布视图阈值 = 100
 
 # 获取资源路径，兼容PyInstaller打包后的情况
+@functools.lru_cache(maxsize=None)
 def 获取资源路径(相对路径):
     """获取资源文件的绝对路径，兼容开发环境和打包后的环境"""
     if getattr(sys, 'frozen', False):
@@ -37,8 +67,20 @@ class 座位分配:
     - 随机分配座位(): 执行随机座位分配算法
     - 导出到Excel(): 将当前座位表导出为Excel文件
     - 设置指定排数(): 设置学生必须坐在指定排数
+    - 设置成对约束(): 设置两名学生同桌、分开或一组学生分散
     - 清除设置(): 清除所有特殊安排设置
+    - 显示调试面板(): 显示最近一次运行的阶段耗时和计数（Ctrl+Alt+D）
+    - 生成多个方案(): 一次生成多个候选座位方案并逐个浏览
+    - 记录座位历史(): 把当前座位记入历史，之后的分配会避开最近几周的排和同桌
+    - 考试模式: 名单中有班级、试卷等属性时，可让同组学生互不相邻
+    - 按名单调整座位(): 名单有学生加入或离开时，只移动必要的学生
+    - 批量导入约束(): 从CSV、JSON或Excel一次导入多条指定排数和成对约束
+    - 撤销()、重做()、跳到操作(): 撤销或重做互换和调整座位（Ctrl+Z、Ctrl+Y）
+    - 核对座位表(): 读回手工修改过的座位表，核对名单和特殊安排，并与当前座位对比
     """
+    # 名单、特殊安排、布局和密码没有变化时，启动时直接使用上次解析好的结果
+    使用启动缓存 = True
+    
     def __init__(self, root):
         """初始化座位分配系统
         
@@ -50,34 +92,71 @@ class 座位分配:
         self.root.geometry("650x480")  # 调整窗口尺寸，保持美观比例
         self.root.resizable(False, False)  # 禁止调整窗口大小，保持布局美观
         
-        # 设置学生名单
-        self.学生名单 = self.加载学生名单()
+        # 启动过程也记录各阶段耗时，可在调试面板中查看
+        with 运行指标.记录运行("启动") as self.启动记录:
+            self.初始化()
+    
+    def 初始化(self):
+        """加载名单、布局、特殊安排和配置，并创建界面"""
+        # 加载学生名单、座位布局、特殊安排和管理员密码
+        self.加载启动数据()
+        self.座位行数 = self.布局.行数
+        self.座位列数 = self.布局.列数
+        
+        # 大教室改用可滚动、可缩放的画布视图，窗口允许调整大小
+        self.使用画布视图 = self.布局.座位数 > 画布视图阈值
+        if self.使用画布视图:
+            self.root.geometry("1000x680")
+            self.root.resizable(True, True)
         
-        # 座位布局：6列，左右两列各5人，中间4列各6人
-        self.座位行数 = 6  # 最多的列有6行
-        self.座位列数 = 6  # 总共6列
+        # 记录当前分配结果
+        self.当前分配结果 = 座位分配表()  # 学生 <-> (行, 列)，可按座位O(1)查学生
+        # 互换和调整座位的撤销记录，只保存每一步移动的学生，换成新的座位时清空
+        self.撤销栈 = 撤销记录.撤销栈(self.当前分配结果, self.布局)
+        # 当前座位由种子生成时为 (种子安排, 名单索引, 求解内容)，互换座位时追加到种子安排中
+        self.种子来源 = None
         
-        # 初始化特殊安排
-        self.指定排数安排 = {}  # 格式: {学生: 排数列表}
+        # 候选方案：(K, 学生数) 的座位下标数组及对应的学生名单，当前浏览的方案序号
+        self.候选方案 = None
+        self.候选方案名单 = None
+        self.当前方案序号 = 0
+        self.候选方案种子 = None  # 整批方案的种子，相同名单、布局、安排和种子得到相同的一批方案
+        # 浏览中的候选方案只在互换、调整、导出或关闭时才写入日志，浏览本身不写磁盘
+        self.方案待记录 = False
         
-        # 记录当前分配结果
-        self.当前分配结果 = {}  # 学生 -> (行, 列)
+        # 正在运行的后台任务（分配或导出）
+        self.当前任务 = None
+        
+        # 座位历史库，第一次分配或记录时才打开
+        self.座位历史 = None
+        
+        # 考试模式：同一班级或同一套试卷的学生互不相邻（名单中有属性时才显示）
+        self.考试模式 = tk.BooleanVar(value=False)
+        
+        # 调试面板及是否在下次运行时启用cProfile性能分析
+        self.调试面板 = None
+        self.启用性能分析 = tk.BooleanVar(value=False)
         
         # 用于记录点击状态
         self.第一次点击 = None  # 记录第一次点击的学生和位置
         self.第二次点击 = None  # 记录第二次点击的学生和位置
         
-        # 加载特殊安排
-        self.加载特殊安排()
-        
-        # 加载管理员密码
-        self.管理员密码 = self.加载管理员密码()
-        
         # 创建UI元素
-        self.创建界面()
+        with 运行指标.阶段("创建界面"):
+            self.创建界面()
         
         # 绑定快捷键
         self.root.bind("<Control-Alt-s>", self.显示设置按钮)
+        self.root.bind("<Control-Alt-d>", self.显示调试面板)
+        self.root.bind("<Control-z>", lambda e: self.撤销())
+        self.root.bind("<Control-y>", lambda e: self.重做())
+        
+        # 关闭窗口时把日志压缩为快照
+        self.root.protocol("WM_DELETE_WINDOW", self.关闭)
+        
+        # 恢复上次关闭时的座位
+        if self.恢复座位:
+            self.恢复上次座位()
     
     def 创建界面(self):
         # 创建标题
@@ -106,36 +185,95 @@ class 座位分配:
                                 font=("微软雅黑", 10))
             self.导出按钮.grid(row=0, column=1, padx=5)
         
+        # 批量生成候选方案按钮，生成后在第二行显示浏览按钮
+        if NUMPY_AVAILABLE:
+            self.方案按钮 = tk.Button(self.控制面板, text="生成多个方案", command=self.生成多个方案,
+                                font=("微软雅黑", 10))
+            self.方案按钮.grid(row=0, column=6, padx=5)
+            self.上一个方案按钮 = tk.Button(self.控制面板, text="◀ 上一个", command=self.上一个方案,
+                                    font=("微软雅黑", 9))
+            self.方案标签 = tk.Label(self.控制面板, text="", font=("微软雅黑", 9))
+            self.下一个方案按钮 = tk.Button(self.控制面板, text="下一个 ▶", command=self.下一个方案,
+                                    font=("微软雅黑", 9))
+        
+        # 把当前座位记入历史，之后的分配避开最近几周的排和同桌
+        self.记录历史按钮 = tk.Button(self.控制面板, text="记录本周座位", command=self.记录座位历史,
+                              font=("微软雅黑", 10))
+        self.记录历史按钮.grid(row=0, column=7, padx=5)
+        
+        # 撤销、重做互换和调整座位，"操作记录"可跳到任意一步
+        self.撤销按钮 = tk.Button(self.控制面板, text="撤销", command=self.撤销, font=("微软雅黑", 10))
+        self.撤销按钮.grid(row=0, column=8, padx=5)
+        self.重做按钮 = tk.Button(self.控制面板, text="重做", command=self.重做, font=("微软雅黑", 10))
+        self.重做按钮.grid(row=0, column=9, padx=5)
+        self.操作记录按钮 = tk.Button(self.控制面板, text="操作记录", command=self.跳到操作,
+                              font=("微软雅黑", 9))
+        self.操作记录按钮.grid(row=1, column=9, padx=5, pady=(2, 0))
+        
+        # 读回老师手工修改过的座位表（只读取xlsx中的单元格，不需要openpyxl）
+        self.核对按钮 = tk.Button(self.控制面板, text="核对座位表", command=self.核对座位表,
+                            font=("微软雅黑", 10))
+        self.核对按钮.grid(row=0, column=10, padx=5)
+        
+        # 名单中有属性时显示考试模式开关
+        if self.学生属性:
+            self.考试模式开关 = tk.Checkbutton(self.控制面板, text="考试模式(同组不相邻)",
+                                        variable=self.考试模式, font=("微软雅黑", 9))
+            self.考试模式开关.grid(row=1, column=4, columnspan=2, padx=5, pady=(2, 0))
+        
         # 创建设置按钮（默认隐藏）
         self.设置排数按钮 = tk.Button(self.控制面板, text="设置指定排数", command=self.设置指定排数, 
                              font=("微软雅黑", 10))
         self.清除设置按钮 = tk.Button(self.控制面板, text="清除所有设置", command=self.清除设置, 
                              font=("微软雅黑", 10))
+        self.成对约束按钮 = tk.Button(self.控制面板, text="设置成对约束", command=self.设置成对约束,
+                              font=("微软雅黑", 10))
+        self.调整座位按钮 = tk.Button(self.控制面板, text="按名单调整座位", command=self.按名单调整座位,
+                              font=("微软雅黑", 10))
+        self.导入约束按钮 = tk.Button(self.控制面板, text="批量导入约束", command=self.批量导入约束,
+                              font=("微软雅黑", 10))
         
         # 创建座位显示区域
         self.座位框架 = tk.Frame(self.root, bd=2, relief=tk.GROOVE)
-        self.座位框架.pack(pady=5, padx=10)  # 减少上下间距
+        if self.使用画布视图:
+            self.座位框架.pack(pady=5, padx=10, fill=tk.BOTH, expand=True)
+            self.创建画布视图()
+        else:
+            self.座位框架.pack(pady=5, padx=10)  # 减少上下间距
+            self.创建标签网格()
+        
+        # 添加底部状态栏
+        状态栏 = tk.Frame(self.root, height=20)  # 减少状态栏高度
+        状态栏.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.状态标签 = tk.Label(状态栏, text="", font=("微软雅黑", 9))
+        self.状态标签.pack(side=tk.RIGHT, padx=10, pady=2)  # 减少状态栏内边距
         
+        # 后台任务的进度条和取消按钮（任务运行时才显示）
+        self.进度条 = ttk.Progressbar(状态栏, length=160, mode="determinate")
+        self.取消按钮 = tk.Button(状态栏, text="取消", command=self.取消当前任务,
+                              font=("微软雅黑", 9))
+    
+    def 创建标签网格(self):
+        """为每个座位创建一个标签，适用于普通教室"""
         # 添加讲台标识（移到上方）
         讲台标签 = tk.Label(self.座位框架, text="讲台", font=("微软雅黑", 10, "bold"), 
                         relief=tk.RAISED)
-        讲台标签.grid(row=0, column=2, columnspan=2, pady=3)  # 减少讲台上下间距
-        
-        # 初始化座位标签
-        self.座位标签 = []
-        for i in range(self.座位行数):
-            行标签 = []
-            for j in range(self.座位列数):
-                # 最左边和最右边的列只有5个座位，中间空出第6个
-                if (j == 0 or j == 5) and i == 5:
-                    标签 = tk.Label(self.座位框架, text="", width=9, height=2)
-                else:
-                    标签 = tk.Label(self.座位框架, text="空座位", width=9, height=2,
-                             relief="solid", borderwidth=1, font=("微软雅黑", 9))
-                    标签.grid(row=i+1, column=j, padx=2, pady=1)  # 减少座位之间的间距
-                    标签.bind("<Button-1>", lambda e, row=i, col=j: self.处理座位点击(row, col))
-                行标签.append(标签)
-            self.座位标签.append(行标签)
+        讲台标签.grid(row=0, column=self.布局.讲台起始列, columnspan=self.布局.讲台列数,
+                    pady=3)  # 减少讲台上下间距
+        
+        # 过道列只占一点宽度
+        for 列 in self.布局.过道列:
+            tk.Frame(self.座位框架, width=20).grid(row=1, column=列)
+        
+        # 初始化座位标签 - 只为布局中的座位创建标签，没有座位的格子为None
+        self.座位标签 = [[None] * self.座位列数 for _ in range(self.座位行数)]
+        for i, j in self.布局.座位列表:
+            标签 = tk.Label(self.座位框架, text="空座位", width=9, height=2,
+                     relief="solid", borderwidth=1, font=("微软雅黑", 9))
+            标签.grid(row=i+1, column=j, padx=2, pady=1)  # 减少座位之间的间距
+            标签.bind("<Button-1>", lambda e, row=i, col=j: self.处理座位点击(row, col))
+            self.座位标签[i][j] = 标签
         
         # 添加方向标识
         窗户标签 = tk.Label(self.座位框架, text="窗户", font=("微软雅黑", 10))
@@ -143,93 +281,401 @@ class 座位分配:
         
         门标签 = tk.Label(self.座位框架, text="门", font=("微软雅黑", 10))
         门标签.grid(row=self.座位行数+1, column=self.座位列数-1, pady=3)  # 减少间距
+    
+    def 创建画布视图(self):
+        """用单个画布显示座位，适用于上千座位的大教室
         
-        # 添加底部状态栏
-        状态栏 = tk.Frame(self.root, height=20)  # 减少状态栏高度
-        状态栏.pack(side=tk.BOTTOM, fill=tk.X)
+        画布只绘制可见区域，点击位置按坐标换算成座位；
+        self.座位标签中保存的是与标签接口兼容的显示对象，其余代码无需区分两种视图。
+        """
+        self.座位视图 = 画布座位视图(self.座位框架, self.布局, self.处理座位点击)
+        self.座位视图.pack(fill=tk.BOTH, expand=True)
+        self.座位标签 = [[self.座位视图.标签(i, j) for j in range(self.座位列数)]
+                      for i in range(self.座位行数)]
         
-        self.状态标签 = tk.Label(状态栏, text="", font=("微软雅黑", 9))
-        self.状态标签.pack(side=tk.RIGHT, padx=10, pady=2)  # 减少状态栏内边距
+        # 缩放按钮
+        self.放大按钮 = tk.Button(self.控制面板, text="放大", command=lambda: self.座位视图.缩放(1.25),
+                              font=("微软雅黑", 10))
+        self.放大按钮.grid(row=0, column=4, padx=5)
+        self.缩小按钮 = tk.Button(self.控制面板, text="缩小", command=lambda: self.座位视图.缩放(0.8),
+                              font=("微软雅黑", 10))
+        self.缩小按钮.grid(row=0, column=5, padx=5)
+        
+        # 添加方向标识
+        方向框架 = tk.Frame(self.座位框架)
+        方向框架.pack(fill=tk.X)
+        tk.Label(方向框架, text="窗户", font=("微软雅黑", 10)).pack(side=tk.LEFT, padx=10, pady=3)
+        tk.Label(方向框架, text="门", font=("微软雅黑", 10)).pack(side=tk.RIGHT, padx=10, pady=3)
     
     def 随机分配座位(self):
         """执行随机座位分配算法
         
         功能:
         - 根据座位布局和特殊安排随机分配座位
-        - 优先满足有特殊安排的学生
-        - 尝试最多100次分配，直到满足所有条件
-        - 更新UI显示分配结果
+        - 通过最大匹配一次判定特殊安排能否满足，无需反复重试
+        - 有座位历史时避开最近几周坐过的排，并尽量不与最近几周的同桌相邻
+        - 有成对约束时通过交换座位尽量满足（同桌、分开、分散）
+        - 勾选考试模式时改为让同组学生互不相邻（不考虑成对约束和座位历史）
+        - 每次分配使用新的随机种子并记下，记录座位历史时只需保存种子，之后可以重现
+        - 在后台线程中计算，界面显示进度并可取消
+        - 完成后更新UI显示分配结果
         
         返回:
             无返回值，但会更新UI显示和当前分配结果
         """
-        # 创建座位列表 - 生成所有可能的座位坐标
-        座位 = []
-        for i in range(self.座位行数):
-            for j in range(self.座位列数):
-                # 最左边和最右边的列只有5个座位(跳过第6行)
-                if (j == 0 or j == 5) and i == 5:
-                    continue
-                座位.append((i, j))
-        
-        # 检查特殊安排是否可行 - 确保特殊安排不会超过可用座位数
-        验证结果, 错误信息 = self.验证特殊安排()
-        if not 验证结果:
-            messagebox.showerror("错误", f"特殊安排无法满足: {错误信息}\n请修改后重试")
-            return
-        
-        # 尝试多次分配 - 由于随机性，可能需要多次尝试才能满足所有特殊安排
-        最大尝试次数 = 100
-        for _ in range(最大尝试次数):
-            # 复制学生名单和座位列表 - 每次尝试都从原始状态开始
-            剩余学生 = self.学生名单.copy()
-            剩余座位 = 座位.copy()
-            分配结果 = {}  # 学生 -> (行, 列)
-            
-            # 先处理有指定排数的学生 - 确保特殊安排优先满足
-            for 学生, 排数列表 in self.指定排数安排.items():
-                if 学生 not in 剩余学生:
-                    continue  # 学生可能已被分配
-                
-                # 找出指定排数的所有可用座位
-                可用座位 = [座位 for 座位 in 剩余座位 if 座位[0] in 排数列表]
-                if not 可用座位:
-                    continue  # 没有可用座位，跳过此学生
-                
-                # 随机选择一个座位并分配
-                座位 = random.choice(可用座位)
-                分配结果[学生] = 座位
-                剩余座位.remove(座位)
-                剩余学生.remove(学生)
+        if self.当前任务 is not None and self.当前任务.运行中:
+            return
+        
+        # 在主线程中取快照，工作线程只读取这些副本
+        学生名单 = list(self.学生名单)
+        指定排数安排 = dict(self.指定排数安排)
+        成对约束 = 座位约束.解析成对约束(self.成对约束)
+        布局 = self.布局
+        # 历史库只在主线程中访问，工作线程只使用计数的快照
+        轮换 = self.读取轮换约束()
+        种子 = 种子安排.新种子()
+        
+        def 种子求解(内容, 进度回调, 取消事件):
+            分配结果, 记录 = 种子安排.生成(学生名单, 布局, 内容, 种子, 进度回调, 取消事件)
+            return 分配结果, (记录, 座位向量.名单索引(学生名单), 内容)
+        
+        def 完成(结果, 耗时):
+            分配结果, 种子来源 = 结果
+            self.显示分配结果(分配结果, 耗时, 种子来源)
+        
+        if self.考试模式.get():
+            学生属性 = dict(self.学生属性)
             
-            # 随机分配剩余学生 - 无特殊安排的学生随机分配
-            random.shuffle(剩余学生)
-            for 学生 in 剩余学生:
-                if not 剩余座位:
-                    break  # 座位已用完
-                座位 = random.choice(剩余座位)
-                分配结果[学生] = 座位
-                剩余座位.remove(座位)
+            def 考试任务(进度回调, 取消事件):
+                import 考试模式
+                内容 = 种子安排.求解内容(布局, 指定排数安排, 学生属性=学生属性,
+                                    分组依据=考试模式.分组字段(学生属性))
+                return 种子求解(内容, 进度回调, 取消事件)
             
-            # 检查是否成功分配所有学生
-            if len(分配结果) == len(self.学生名单):
-                # 重置所有座位的背景色
-                for i in range(self.座位行数):
-                    for j in range(self.座位列数):
-                        if not ((j == 0 or j == 5) and i == 5):  # 跳过角落的空座位
-                            self.座位标签[i][j].config(bg="white")
-                
-                # 更新UI显示 - 在座位标签上显示学生姓名
-                for 学生, (行, 列) in 分配结果.items():
-                    self.座位标签[行][列].config(text=学生, font=("微软雅黑", 9, "bold"))
-                
-                # 保存当前分配结果 - 用于后续导出操作
-                self.当前分配结果 = 分配结果.copy()
-                
-                return  # 分配成功，退出方法
+            self.启动后台任务("正在分配考试座位", 考试任务, 完成, 记录名="考试模式")
+            return
+        
+        # 调用分配引擎 - 引擎负责验证特殊安排并生成随机的合法安排
+        def 任务(进度回调, 取消事件):
+            内容 = 种子安排.求解内容(布局, 指定排数安排, 成对约束, 轮换)
+            return 种子求解(内容, 进度回调, 取消事件)
+        
+        self.启动后台任务("正在分配座位", 任务, 完成, 记录名="随机分配")
+    
+    def 更新座位显示(self, 分配结果):
+        """把分配结果显示到座位标签上，并保存为当前分配结果"""
+        # 更新UI显示 - 重置背景色，在座位标签上显示学生姓名，没有学生的座位显示为空座位
+        with 运行指标.阶段("界面更新"):
+            for i, j in self.布局.座位列表:
+                学生 = 分配结果.座位上的学生((i, j))
+                if 学生 is None:
+                    self.座位标签[i][j].config(text="空座位", font=("微软雅黑", 9), bg="white")
+                else:
+                    self.座位标签[i][j].config(text=学生, font=("微软雅黑", 9, "bold"), bg="white")
+        
+        # 保存当前分配结果 - 用于后续导出操作
+        self.当前分配结果 = 分配结果
+        self.种子来源 = None
+        self.撤销栈.重置(分配结果)
+        self.第一次点击 = None
+        self.第二次点击 = None
+    
+    def 记录当前座位(self):
+        """把整个当前座位写入日志，下次启动时恢复；由种子生成时一并记下种子，便于核对
+        
+        候选方案记下整批的种子和方案序号（之后互换过的座位以记下的座位为准）。
+        
+        返回:
+            bool: 是否保存成功
+        """
+        候选方案 = self.方案待记录
+        self.方案待记录 = False
+        座位 = {学生: list(座位) for 学生, 座位 in self.当前分配结果.items()}
+        if self.种子来源 is not None:
+            return self.写入日志(状态日志.设置座位, 座位=座位, 种子=self.种子来源[0].转为字典())
+        if 候选方案:
+            return self.写入日志(状态日志.设置座位, 座位=座位,
+                             候选方案={"种子": self.候选方案种子, "序号": self.当前方案序号})
+        return self.写入日志(状态日志.设置座位, 座位=座位)
+    
+    def 生成多个方案(self):
+        """一次生成多个候选座位方案
+        
+        功能:
+        - 询问方案数量，在后台线程中用 候选方案.生成候选方案() 一次生成全部方案
+        - 生成后显示第一个方案，可用"上一个""下一个"按钮逐个浏览
+        - 浏览到的方案即为当前分配结果，可以直接导出或互换座位
+        """
+        if self.当前任务 is not None and self.当前任务.运行中:
+            return
+        数量 = simpledialog.askinteger("生成多个方案", "请输入要生成的方案数量:", initialvalue=默认方案数,
+                                   minvalue=1, maxvalue=最大方案数)
+        if not 数量:
+            return
+        
+        # 候选方案要求名单不重复，数组的列与去重后的名单对应
+        学生名单 = list(dict.fromkeys(self.学生名单))
+        指定排数安排 = dict(self.指定排数安排)
+        布局 = self.布局
+        轮换 = self.读取轮换约束()
+        种子 = 种子安排.新种子()
+        
+        def 任务(进度回调, 取消事件):
+            import 候选方案  # numpy只在第一次使用时导入
+            安排 = 指定排数安排
+            if 轮换:
+                # 候选方案只避开最近坐过的排，不调整同桌
+                安排 = 引擎.合并轮换约束(学生名单, 布局, 指定排数安排, 轮换)
+            return 候选方案.生成候选方案(学生名单, 布局, 安排, 数量, 种子=种子,
+                                  进度回调=进度回调, 取消事件=取消事件)
+        
+        def 完成(方案, 耗时):
+            self.候选方案 = 方案
+            self.候选方案种子 = 种子
+            self.候选方案名单 = 座位向量.名单索引(学生名单)  # 所有方案共用一份名单索引
+            self.上一个方案按钮.grid(row=1, column=0, padx=5, pady=(2, 0))
+            self.方案标签.grid(row=1, column=1, padx=5, pady=(2, 0))
+            self.下一个方案按钮.grid(row=1, column=6, padx=5, pady=(2, 0))
+            self.显示候选方案(0)
+            状态 = f"已生成{len(方案)}个方案，用时{耗时 * 1000:.1f} ms（种子 {种子}）"
+            if self.成对约束:
+                状态 += "（候选方案只满足指定排数，未考虑成对约束）"
+            self.状态标签.config(text=状态)
+        
+        self.启动后台任务("正在生成方案", 任务, 完成, 记录名="生成多个方案")
+    
+    def 显示候选方案(self, 序号):
+        """显示第 序号 个候选方案（序号从0开始，超出范围时循环）"""
+        import 候选方案
+        self.当前方案序号 = 序号 % len(self.候选方案)
+        # 直接在方案数组的这一行上浏览，互换座位会修改该方案
+        分配结果 = 候选方案.方案视图(self.候选方案[self.当前方案序号], self.候选方案名单, self.布局)
+        self.更新座位显示(分配结果)
+        self.方案待记录 = True
+        self.方案标签.config(text=f"方案 {self.当前方案序号 + 1}/{len(self.候选方案)}")
+        self.状态标签.config(text=f"正在浏览方案 {self.当前方案序号 + 1}（种子 {self.候选方案种子}）")
+    
+    def 上一个方案(self):
+        if self.候选方案 is not None:
+            self.显示候选方案(self.当前方案序号 - 1)
+    
+    def 下一个方案(self):
+        if self.候选方案 is not None:
+            self.显示候选方案(self.当前方案序号 + 1)
+    
+    def 显示分配结果(self, 分配结果, 耗时, 种子来源=None):
+        """在主线程中把后台分配的结果显示到界面上
+        
+        参数:
+            种子来源: 由种子生成时为 (种子安排, 名单索引, 求解内容)
+        """
+        self.更新座位显示(分配结果)
+        self.种子来源 = 种子来源
+        self.记录当前座位()
+        记录 = 运行指标.当前记录()
+        计数器 = 记录.计数器 if 记录 else {}
+        状态 = f"分配完成：求解{计数器.get('尝试次数', 1)}次，用时{耗时 * 1000:.1f} ms"
+        if "轮换罚分" in 计数器:
+            状态 += f"，与最近几周重复{计数器['轮换罚分']}处"
+        if 计数器.get("违反成对约束数"):
+            状态 += f"，有{计数器['违反成对约束数']}条成对约束未满足"
+        if 记录 and 记录.名称 == "考试模式":
+            状态 += "，同组学生互不相邻"
+        if 种子来源 is not None:
+            状态 += f"（种子 {种子来源[0].种子}）"
+        self.状态标签.config(text=状态)
+    
+    def 打开座位历史(self):
+        """打开座位历史库，已打开时直接返回
+        
+        历史库位置和统计周数可在配置.json的"座位轮换"项中设置：
+        {"周数": 4, "历史文件": "座位历史.db"}，默认保存在用户数据目录。
+        
+        返回:
+            座位历史对象，打开失败时提示错误并返回None
+        """
+        if self.座位历史 is not None:
+            return self.座位历史
+        import 座位历史  # sqlite3只在第一次使用时导入
+        设置 = self.加载轮换设置()
+        try:
+            self.座位历史 = 座位历史.座位历史(设置.get("历史文件"), 设置.get("周数"))
+        except Exception as e:
+            messagebox.showerror("错误", f"打开座位历史失败：{str(e)}")
+        return self.座位历史
+    
+    def 读取轮换约束(self):
+        """读取最近几周的排和同桌计数，没有历史时返回None"""
+        历史 = self.打开座位历史()
+        if 历史 is None:
+            return None
+        return 历史.轮换约束() or None
+    
+    def 记录座位历史(self):
+        """把当前座位作为今天的座位记入历史
+        
+        功能:
+        - 同一天再次记录时替换当天的记录
+        - 记录后更新最近几周的排计数和同桌计数，之后的分配会避开
+        """
+        if not self.当前分配结果:
+            messagebox.showerror("错误", "请先进行座位分配")
+            return
+        历史 = self.打开座位历史()
+        if 历史 is None:
+            return
+        日期 = datetime.date.today().isoformat()
+        if not messagebox.askyesno("记录座位", f"把当前座位记录为{日期}的座位？\n同一天已有的记录会被替换。"):
+            return
+        try:
+            if self.种子来源 is not None:
+                # 由种子生成的座位可以只保留种子，窗口以外的旧座位随即归档
+                记录, 名单, 内容 = self.种子来源
+                历史.记录(self.当前分配结果, self.布局, 日期, 记录, 名单.姓名, 内容)
+                历史.归档()
+            else:
+                历史.记录(self.当前分配结果, self.布局, 日期)
+        except Exception as e:
+            messagebox.showerror("错误", f"记录座位历史失败：{str(e)}")
+            return
+        self.状态标签.config(text=f"已记录{日期}的座位，之后的分配将避开最近{历史.周数}周的排和同桌")
+    
+    def 启动后台任务(self, 说明, 函数, 完成回调, 失败回调=None, 记录名=None):
+        """在工作线程中执行函数，期间显示进度条和取消按钮
+        
+        参数:
+            说明: 状态栏显示的任务名称
+            函数: 函数(进度回调, 取消事件)，在工作线程中执行
+            完成回调: 完成回调(结果, 耗时秒)，在主线程中调用
+            失败回调: 失败回调(异常)，默认弹出错误提示
+            记录名: 运行指标记录的名称，默认与说明相同
         
-        # 所有尝试都失败后显示错误
-        messagebox.showerror("错误", "无法满足所有特殊安排，请减少限制条件后重试")
+        工作线程中的计算和主线程中的完成回调记入同一条运行指标记录，结束后显示在调试面板中。
+        """
+        记录 = 运行指标.运行记录(记录名 or 说明, "cprofile" if self.启用性能分析.get() else None)
+        
+        def 带记录的函数(进度回调, 取消事件):
+            with 记录.激活():
+                return 函数(进度回调, 取消事件)
+        
+        def 完成(结果, 耗时):
+            self.结束后台任务()
+            with 记录.激活():
+                完成回调(结果, 耗时)
+            self.结束运行记录(记录)
+        
+        def 失败(异常):
+            self.结束后台任务()
+            self.结束运行记录(记录, 异常)
+            if 失败回调:
+                失败回调(异常)
+            else:
+                messagebox.showerror("错误", str(异常))
+        
+        def 取消():
+            self.结束后台任务()
+            self.结束运行记录(记录, "已取消")
+            self.状态标签.config(text=f"{说明}已取消")
+        
+        self.当前任务 = 后台任务(self.root, 带记录的函数, 完成, 失败, self.显示任务进度, 取消)
+        for 按钮 in self.任务按钮():
+            按钮.config(state=tk.DISABLED)
+        self.进度条.config(value=0, maximum=1)
+        self.进度条.pack(side=tk.LEFT, padx=10, pady=2)
+        self.取消按钮.pack(side=tk.LEFT, pady=2)
+        self.状态标签.config(text=说明)
+        self.当前任务.开始()
+    
+    def 结束后台任务(self):
+        """隐藏进度条和取消按钮，恢复按钮状态"""
+        self.进度条.pack_forget()
+        self.取消按钮.pack_forget()
+        for 按钮 in self.任务按钮():
+            按钮.config(state=tk.NORMAL)
+    
+    def 任务按钮(self):
+        """后台任务运行期间需要禁用的按钮"""
+        按钮列表 = [self.随机分配按钮]
+        if EXCEL_AVAILABLE:
+            按钮列表.append(self.导出按钮)
+        if NUMPY_AVAILABLE:
+            按钮列表 += [self.方案按钮, self.上一个方案按钮, self.下一个方案按钮]
+        按钮列表.append(self.记录历史按钮)
+        return 按钮列表
+    
+    def 显示任务进度(self, 说明, 完成, 总数):
+        """在状态栏显示后台任务的进度"""
+        self.进度条.config(value=完成, maximum=max(总数, 1))
+        耗时 = self.当前任务.已用时间()
+        self.状态标签.config(text=f"{说明} {完成}/{总数}，已用时{耗时:.1f} s")
+    
+    def 结束运行记录(self, 记录, 错误=None):
+        """结束运行指标记录，调试面板打开时立即刷新"""
+        记录.结束(错误)
+        if self.调试面板 is not None:
+            self.刷新调试面板()
+    
+    def 显示调试面板(self, event=None):
+        """按下Ctrl+Alt+D时显示调试面板
+        
+        面板显示最近一次运行（启动、随机分配或导出）的各阶段耗时、计数器和性能分析结果，
+        可勾选在下次运行时启用cProfile，也可把记录保存为JSON文件。
+        """
+        if self.调试面板 is not None:
+            self.调试面板.lift()
+            self.刷新调试面板()
+            return
+        
+        self.调试面板 = tk.Toplevel(self.root)
+        self.调试面板.title("调试信息")
+        self.调试面板.geometry("620x480")
+        self.调试面板.protocol("WM_DELETE_WINDOW", self.关闭调试面板)
+        
+        按钮框架 = tk.Frame(self.调试面板)
+        按钮框架.pack(side=tk.TOP, fill=tk.X, pady=3)
+        tk.Checkbutton(按钮框架, text="下次运行启用性能分析(cProfile)", variable=self.启用性能分析,
+                       font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        tk.Button(按钮框架, text="保存JSON", command=self.保存运行记录,
+                  font=("微软雅黑", 9)).pack(side=tk.RIGHT, padx=5)
+        tk.Button(按钮框架, text="刷新", command=self.刷新调试面板,
+                  font=("微软雅黑", 9)).pack(side=tk.RIGHT, padx=5)
+        
+        self.调试文本 = tk.Text(self.调试面板, font=("Consolas", 9), wrap=tk.NONE)
+        self.调试文本.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        self.刷新调试面板()
+    
+    def 刷新调试面板(self):
+        """在调试面板中显示最近一次运行的记录"""
+        记录 = 运行指标.最近记录()
+        self.调试文本.config(state=tk.NORMAL)
+        self.调试文本.delete("1.0", tk.END)
+        self.调试文本.insert(tk.END, 记录.转为文本() if 记录 else "暂无运行记录")
+        self.调试文本.config(state=tk.DISABLED)
+    
+    def 关闭调试面板(self):
+        self.调试面板.destroy()
+        self.调试面板 = None
+    
+    def 保存运行记录(self):
+        """把最近一次运行的记录保存为JSON文件"""
+        记录 = 运行指标.最近记录()
+        if 记录 is None:
+            return
+        文件路径 = filedialog.asksaveasfilename(
+            parent=self.调试面板, defaultextension=".json", filetypes=[("JSON文件", "*.json")],
+            initialfile=f"运行记录_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        if 文件路径:
+            try:
+                with open(文件路径, "w", encoding="utf-8") as f:
+                    f.write(记录.转为JSON())
+            except OSError as e:
+                messagebox.showerror("错误", f"保存失败：{str(e)}")
+    
+    def 取消当前任务(self):
+        """请求取消正在运行的后台任务"""
+        if self.当前任务 is not None and self.当前任务.运行中:
+            self.当前任务.取消()
+            self.状态标签.config(text="正在取消...")
     
     def 显示设置按钮(self, event=None):
         """按下Ctrl+Alt+S时显示设置按钮"""
@@ -237,48 +683,125 @@ class 座位分配:
         if 密码 == self.管理员密码:
             self.设置排数按钮.grid(row=0, column=2, padx=5)
             self.清除设置按钮.grid(row=0, column=3, padx=5)
+            self.成对约束按钮.grid(row=1, column=2, columnspan=2, padx=5, pady=(2, 0))
+            self.调整座位按钮.grid(row=1, column=7, padx=5, pady=(2, 0))
+            self.导入约束按钮.grid(row=1, column=8, padx=5, pady=(2, 0))
             messagebox.showinfo("成功", "设置按钮已显示")
         else:
             messagebox.showerror("错误", "密码错误")
     
+    def 加载启动数据(self):
+        """加载学生名单、座位布局、特殊安排和管理员密码
+        
+        功能:
+        - 源文件都没有变化时直接使用启动缓存中解析好的结果
+        - 否则逐个读取文件，读取过程没有出错时更新启动缓存
+        
+        返回:
+            无返回值，但会设置 学生名单、学生属性、布局、指定排数安排、成对约束、管理员密码，
+            以及 状态日志 和上次关闭时的座位 恢复座位
+        """
+        特殊安排路径 = 状态日志.默认快照路径()
+        源文件列表 = [self.获取学生名单路径(), 特殊安排路径, 状态日志.日志路径(特殊安排路径),
+                   获取资源路径("特殊安排.json"), 获取资源路径("配置.json"), "配置.json", sys.modules[座位布局.__module__].__file__]
+        if self.使用启动缓存:
+            with 运行指标.阶段("读取启动缓存"):
+                缓存 = 启动缓存.读取(源文件列表)
+            if 缓存 is not None:
+                self.学生名单 = 缓存["学生名单"]
+                self.学生属性 = 缓存["学生属性"]
+                self.布局 = 缓存["布局"]
+                self.指定排数安排 = 缓存["指定排数安排"]
+                self.成对约束 = 缓存["成对约束"]
+                self.恢复座位 = 缓存["恢复座位"]
+                self.状态日志 = 状态日志.状态日志(特殊安排路径, *缓存["日志位置"])
+                self.管理员密码 = 缓存["管理员密码"]
+                return
+        
+        # 读取过程中出错（已提示用户或使用了默认值）时不写入缓存，下次启动仍会提示
+        self.启动数据有误 = False
+        
+        # 设置学生名单
+        self.学生属性 = {}  # 格式: {学生: {属性: 值}}，考试模式使用
+        with 运行指标.阶段("加载学生名单"):
+            self.学生名单 = self.加载学生名单()
+        
+        # 座位布局：从配置文件加载，默认6列，左右两列各5人，中间4列各6人
+        with 运行指标.阶段("加载座位布局"):
+            self.布局 = self.加载座位布局()
+        
+        # 初始化并加载特殊安排
+        self.指定排数安排 = {}  # 格式: {学生: 排数列表}
+        self.成对约束 = []  # 格式: [{"类型": ..., "学生": [...], "权重": ...}, ...]
+        self.恢复座位 = {}  # 格式: {学生: (行, 列)}
+        self.状态日志 = 状态日志.状态日志(特殊安排路径)
+        with 运行指标.阶段("加载特殊安排"):
+            self.加载特殊安排()
+        
+        # 加载管理员密码
+        self.管理员密码 = self.加载管理员密码()
+        
+        if self.使用启动缓存 and not self.启动数据有误:
+            with 运行指标.阶段("写入启动缓存"):
+                启动缓存.写入(源文件列表, {"学生名单": self.学生名单, "学生属性": self.学生属性,
+                                        "布局": self.布局,
+                                        "指定排数安排": self.指定排数安排,
+                                        "成对约束": self.成对约束,
+                                        "恢复座位": self.恢复座位,
+                                        "日志位置": (self.状态日志.序号, self.状态日志.行数,
+                                                 self.状态日志.有效长度),
+                                        "管理员密码": self.管理员密码})
+    
+    def 获取学生名单路径(self):
+        """学生名单文件的路径
+        
+        配置.json 中的 "学生名单文件" 可以指向学籍系统导出的Excel或CSV（见 名单导入），
+        没有设置时使用 学生名单.json。
+        """
+        try:
+            with open("配置.json", "r", encoding="utf-8") as f:
+                路径 = json.load(f).get("学生名单文件")
+            if isinstance(路径, str) and 路径:
+                return 路径
+        except:
+            pass
+        try:
+            return 获取资源路径("学生名单.json")
+        except:
+            return "学生名单.json"
+    
     def 加载学生名单(self):
         """从学生名单文件加载学生列表
         
         功能:
-        - 尝试从学生名单.json文件加载学生列表
-        - 如果文件不存在或格式错误，则使用默认学生名单
+        - 从学生名单.json或配置中指定的Excel、CSV文件加载学生列表
+        - 名单项可以是带属性的对象（如班级、试卷），表格中姓名以外的列，属性保存到self.学生属性
+        - 表格的解析结果按文件签名缓存，文件不变时不再重新解析
+        - 学生名单.json不存在时创建默认名单文件；其他文件不存在或格式错误时提示错误并使用默认学生名单
         
         返回:
             list: 学生名单列表
         """
-        学生名单文件 = "学生名单.json"
-        默认学生名单 = [
-            "敖康涵", "崔子傲", "杜欣怡", "冯禹栋", "弓子航", 
-            "郭奕诚", "李秉锡", "李凡奇", "李其东", "李星哲", 
-            "李一诺", "刘锦溪", "刘睿忱", "刘奕贤", "倪欣彤", 
-            "牛新迪", "唐晚玉", "田煦禾", "王鼎宸", "王柳嘉", 
-            "王培源", "王烁妍", "王一冉", "王子辰", "吴金航", 
-            "许泽玉", "薛旭然", "杨紫斐", "张浩然", "张颀萱", 
-            "张依依", "张译文", "赵鑫炜", "赵一诺"
-        ]
+        默认学生名单 = list(引擎.默认学生名单)
+        学生名单路径 = self.获取学生名单路径()
         
         try:
-            # 尝试获取打包后的路径
-            try:
-                学生名单路径 = 获取资源路径(学生名单文件)
-            except:
-                学生名单路径 = 学生名单文件
-                
+            if os.path.splitext(学生名单路径)[1].lower() != ".json":
+                import 名单导入  # 只在名单为表格时导入
+                学生名单, self.学生属性 = 名单导入.读取名单(学生名单路径)
+                return 学生名单
             if os.path.exists(学生名单路径):
                 with open(学生名单路径, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                    学生名单, self.学生属性 = 引擎.整理学生名单(json.load(f))
+                    return 学生名单
             else:
                 # 如果文件不存在，创建默认学生名单文件
                 with open(学生名单路径, "w", encoding="utf-8") as f:
                     json.dump(默认学生名单, f, ensure_ascii=False, indent=4)
                 return 默认学生名单
         except Exception as e:
-            print(f"加载学生名单时出错: {e}")
+            self.启动数据有误 = True
+            messagebox.showerror("错误", f"加载学生名单失败: {str(e)}\n将使用默认学生名单")
             return 默认学生名单
             
     def 加载特殊安排(self):
@@ -286,70 +809,136 @@ class 座位分配:
         
         功能:
         - 尝试从特殊安排.json文件加载特殊座位安排
+        - 重放快照之后的修改日志（见 状态日志），得到上次关闭时的特殊安排和座位
         - 如果文件不存在或格式错误，则使用空字典
-        - 兼容PyInstaller打包后的环境
+        - 打包为exe时快照和日志保存在用户数据目录，打包附带的特殊安排.json只在第一次运行时读取
         
         返回:
-            无返回值，但会更新self.指定排数安排
+            无返回值，但会更新self.指定排数安排、self.成对约束、self.恢复座位和self.状态日志
         """
-        特殊安排文件 = "特殊安排.json"
-        
-        # 尝试获取打包后的路径
-        try:
-            特殊安排路径 = 获取资源路径(特殊安排文件)
-        except:
-            特殊安排路径 = 特殊安排文件
-            
+        # 快照和日志保存在可写的数据目录；打包附带的特殊安排只作为第一次运行时的初始内容
+        特殊安排路径 = 状态日志.默认快照路径()
+        读取路径 = 特殊安排路径
         if not os.path.exists(特殊安排路径):
-            # 如果文件不存在，创建一个空的特殊安排文件
-            self.保存特殊安排()
-            return
+            读取路径 = 获取资源路径("特殊安排.json")
+            if not os.path.exists(读取路径):
+                # 如果文件不存在，创建一个空的特殊安排文件
+                self.保存特殊安排()
+                return
         
         try:
-            with open(特殊安排路径, "r", encoding="utf-8") as f:
-                try:
-                    数据 = json.load(f)
-                    
-                    # 清除现有安排
-                    self.指定排数安排 = {}
-                    
-                    # 加载指定排数安排
-                    for 学生, 排数列表 in 数据.get("指定排数安排", {}).items():
-                        self.指定排数安排[学生] = 排数列表
-                    
-                except json.JSONDecodeError as e:
-                    messagebox.showerror("错误", f"特殊安排文件格式错误: {str(e)}")
-                    return
+            with open(读取路径, "r", encoding="utf-8") as f:
+                数据 = json.load(f)
+            if not isinstance(数据, dict):
+                raise ValueError("特殊安排文件应为JSON对象")
         except FileNotFoundError:
             # 文件不存在，创建一个空的特殊安排文件
             self.保存特殊安排()
             return
         except PermissionError:
+            self.启动数据有误 = True
             messagebox.showerror("错误", "没有权限读取特殊安排文件")
             return
         except Exception as e:
+            # 快照损坏时也打开日志，让之后的记录接着已有的序号写，重放时不会与旧记录混在一起
+            self.启动数据有误 = True
+            try:
+                self.状态日志, _ = 状态日志.状态日志.打开(特殊安排路径, {})
+            except OSError:
+                pass
+            messagebox.showerror("错误", f"特殊安排文件格式错误: {str(e)}")
+            return
+        
+        try:
+            # 读取快照，再按顺序重放之后的修改日志
+            self.状态日志, 记录列表 = 状态日志.状态日志.打开(特殊安排路径, 数据)
+            状态 = 状态日志.初始状态(数据)
+            try:
+                for 记录 in 记录列表:
+                    状态日志.应用(状态, 记录)
+            except (KeyError, TypeError, ValueError) as e:
+                self.启动数据有误 = True
+                messagebox.showerror("错误", f"特殊安排日志损坏: {str(e)}\n将忽略日志中的修改")
+                状态 = 状态日志.初始状态(数据)
+            运行指标.计数("重放日志条数", len(记录列表))
+            
+            # 加载指定排数安排和上次的座位
+            self.指定排数安排 = 状态["指定排数安排"]
+            self.恢复座位 = 状态["当前座位"]
+            
+            # 加载成对约束，格式错误时提示并忽略全部成对约束
+            成对约束 = 状态["成对约束"]
+            座位约束.解析成对约束(成对约束)
+            self.成对约束 = 成对约束
+        except ValueError as e:
+            self.启动数据有误 = True
+            messagebox.showerror("错误", f"成对约束格式错误: {str(e)}\n将忽略所有成对约束")
+            return
+        except Exception as e:
+            self.启动数据有误 = True
             messagebox.showerror("错误", f"加载特殊安排失败: {str(e)}")
             return
     
     def 保存特殊安排(self):
-        """保存特殊安排到JSON文件"""
-        数据 = {
-            "指定排数安排": self.指定排数安排
-        }
-        
-        特殊安排文件 = "特殊安排.json"
+        """把特殊安排和当前座位写成快照（先写临时文件再替换），并清空修改日志
         
+        返回:
+            bool: 是否保存成功
+        """
         try:
-            # 尝试获取打包后的路径
-            try:
-                特殊安排路径 = 获取资源路径(特殊安排文件)
-            except:
-                特殊安排路径 = 特殊安排文件
-            
-            with open(特殊安排路径, "w", encoding="utf-8") as f:
-                json.dump(数据, f, ensure_ascii=False, indent=4)
+            self.状态日志.压缩(self.指定排数安排, self.成对约束, getattr(self, "当前分配结果", None))
+            self.方案待记录 = False
+            return True
         except Exception as e:
             messagebox.showerror("错误", f"保存特殊安排失败: {str(e)}")
+            return False
+    
+    def 写入日志(self, 操作, **内容):
+        """把一次修改追加到日志，日志较长时压缩为快照
+        
+        浏览的候选方案还没有写入日志时，座位的修改（互换、调整）改为记下修改后的整个座位。
+        
+        返回:
+            bool: 是否保存成功
+        """
+        if self.方案待记录 and 操作 in (状态日志.互换, 状态日志.移动):
+            return self.记录当前座位()
+        try:
+            self.状态日志.追加(操作, **内容)
+        except OSError:
+            # 日志无法追加时直接写快照
+            return self.保存特殊安排()
+        if self.状态日志.需要压缩:
+            return self.保存特殊安排()
+        return True
+    
+    def 恢复上次座位(self):
+        """显示上次关闭时的座位，已不在名单中或座位已不存在的学生跳过
+
+        座位布局可能在两次启动之间改小，超出当前布局或格式不对的座位也跳过
+        """
+        名单 = set(self.学生名单)
+        分配结果 = 座位分配表()
+        for 学生, 座位 in self.恢复座位.items():
+            if not (isinstance(座位, tuple) and len(座位) == 2
+                    and all(isinstance(值, int) and not isinstance(值, bool) for 值 in 座位)):
+                continue
+            行, 列 = 座位
+            if (学生 in 名单 and 0 <= 行 < self.布局.行数 and 0 <= 列 < self.布局.列数
+                    and self.布局.是座位(行, 列) and 分配结果.座位上的学生(座位) is None):
+                分配结果.放置(学生, 座位)
+        if 分配结果:
+            self.更新座位显示(分配结果)
+            self.状态标签.config(text="已恢复上次的座位")
+    
+    def 关闭(self):
+        """关闭窗口：有未压缩的修改或正在浏览候选方案时写成快照，关闭座位历史库"""
+        if self.状态日志.行数 or self.方案待记录:
+            self.保存特殊安排()
+        self.状态日志.关闭()
+        if self.座位历史 is not None:
+            self.座位历史.关闭()
+        self.root.destroy()
     
     def 设置指定排数(self):
         """设置学生坐在指定排数"""
@@ -386,51 +975,251 @@ class 座位分配:
         self.指定排数安排[学生] = 排数列表
         
         # 保存设置
-        self.保存特殊安排()
+        self.写入日志(状态日志.设置排数, 学生=学生, 排数=排数列表)
         messagebox.showinfo("成功", f"已设置{学生}坐在第{','.join(map(str, 排数列表))}排")
+        
+        # 当前座位不符合新设置时，可以只移动必要的学生，不必重新分配
+        if 学生 in self.当前分配结果 and self.当前分配结果[学生][0] not in 排数列表:
+            if messagebox.askyesno("调整座位", f"{学生}当前不在指定的排，是否只移动必要的学生来满足？"):
+                self.调整当前座位(变化学生=[学生])
+    
+    def 批量导入约束(self):
+        """从CSV、JSON或Excel文件批量导入指定排数和成对约束
+        
+        功能:
+        - 一次检查文件中的全部约束，有错误时列出所有错误，不做任何修改
+        - 没有错误时与现有安排合并，只写一次特殊安排文件
+        - 当前座位不满足新的指定排数时，可以只移动必要的学生
+        """
+        文件类型 = [("CSV文件", "*.csv"), ("JSON文件", "*.json")]
+        if EXCEL_AVAILABLE:
+            文件类型.append(("Excel文件", "*.xlsx"))
+        路径 = filedialog.askopenfilename(title="选择约束文件", filetypes=[("约束文件", " ".join(
+            类型[1] for 类型 in 文件类型))] + 文件类型)
+        if not 路径:
+            return
+        
+        import 约束导入
+        记录 = 运行指标.运行记录("批量导入约束", "cprofile" if self.启用性能分析.get() else None)
+        try:
+            with 记录.激活():
+                指定排数安排, 成对约束, 条数, 错误列表 = 约束导入.导入约束(
+                    路径, self.学生名单, self.布局, self.指定排数安排, self.成对约束)
+        except (OSError, ValueError) as e:
+            self.结束运行记录(记录, e)
+            messagebox.showerror("错误", f"读取约束文件失败：{str(e)}")
+            return
+        self.结束运行记录(记录, f"{len(错误列表)}处错误" if 错误列表 else None)
+        if 错误列表:
+            显示数 = 20
+            说明 = "\n".join(错误列表[:显示数])
+            if len(错误列表) > 显示数:
+                说明 += f"\n……共{len(错误列表)}处错误"
+            messagebox.showerror("导入失败", f"发现{len(错误列表)}处错误，没有导入任何约束：\n{说明}")
+            return
+        
+        原安排, 原成对约束 = self.指定排数安排, self.成对约束
+        self.指定排数安排, self.成对约束 = 指定排数安排, 成对约束
+        if not self.写入日志(状态日志.替换约束, 指定排数安排=指定排数安排, 成对约束=成对约束):
+            self.指定排数安排, self.成对约束 = 原安排, 原成对约束
+            return
+        messagebox.showinfo("成功", f"已导入{条数}条约束")
+        
+        变化学生 = [学生 for 学生, 排数列表 in 指定排数安排.items() if 原安排.get(学生) != 排数列表]
+        不满足 = [学生 for 学生 in 变化学生
+               if 学生 in self.当前分配结果 and self.当前分配结果[学生][0] not in 指定排数安排[学生]]
+        if 不满足 and messagebox.askyesno("调整座位", f"当前座位中有{len(不满足)}名学生不在指定的排，"
+                                                   "是否只移动必要的学生来满足？"):
+            self.调整当前座位(变化学生=不满足)
+    
+    def 核对座位表(self):
+        """读回导出后手工修改过的座位表并核对
+        
+        功能:
+        - 读取所选xlsx文件中的"座位表（学生视角）"工作表
+        - 列出重复、缺少、不在名单中的学生，写在非座位格的姓名，以及违反的指定排数和成对约束
+        - 列出与当前座位相比移动过的学生
+        - 只有一个房间且没有重复、非座位格和名单外的姓名时，可以把表格中的座位作为当前座位
+        """
+        文件路径 = filedialog.askopenfilename(title="选择座位表", filetypes=[("Excel文件", "*.xlsx")])
+        if not 文件路径:
+            return
+        
+        import 座位表核对
+        try:
+            结果 = 座位表核对.核对(座位表核对.读取学生视角(文件路径), self.布局, self.学生名单,
+                            self.指定排数安排, 座位约束.解析成对约束(self.成对约束),
+                            dict(self.当前分配结果) if self.当前分配结果 else None, 文件路径)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"读取座位表失败：{str(e)}")
+            return
+        
+        说明 = "\n".join(结果.转为文本()) or "与当前座位相同"
+        if 结果.有问题:
+            messagebox.showwarning("核对座位表", f"{结果.学生数}名学生，发现以下问题：\n{说明}")
+        else:
+            messagebox.showinfo("核对座位表", f"{结果.学生数}名学生，名单和特殊安排都符合。\n{说明}")
+        
+        可以采用 = (len(结果.房间列表) == 1 and not (结果.重复 or 结果.非座位 or 结果.多出)
+                and (结果.移动 or not self.当前分配结果))
+        if 可以采用 and messagebox.askyesno("核对座位表", "是否把表格中的座位作为当前座位？"):
+            self.更新座位显示(结果.房间列表[0][1])
+            self.记录当前座位()
+            self.状态标签.config(text=f"已读入{os.path.basename(文件路径)}中的座位")
+    
+    def 按名单调整座位(self):
+        """重新读取学生名单，按加入和离开的学生调整当前座位
+        
+        功能:
+        - 离开的学生让出座位，加入的学生坐空座位
+        - 空座位不在允许的排时，挪动尽量少的学生
+        """
+        if not self.当前分配结果:
+            messagebox.showerror("错误", "请先进行座位分配")
+            return
+        self.启动数据有误 = False
+        学生名单 = self.加载学生名单()
+        if self.启动数据有误:
+            return  # 已提示读取错误，不能按默认名单调整
+        新名单 = set(学生名单)
+        加入 = [学生 for 学生 in 学生名单 if 学生 not in self.当前分配结果]
+        离开 = [学生 for 学生 in self.当前分配结果 if 学生 not in 新名单]
+        if not 加入 and not 离开:
+            self.状态标签.config(text="名单没有变化")
+            return
+        if self.调整当前座位(加入, 离开):
+            self.学生名单 = 学生名单
+    
+    def 调整当前座位(self, 加入=(), 离开=(), 变化学生=None):
+        """在当前座位上做最少移动的调整，只更新位置有变化的座位
+        
+        参数:
+            加入: 需要入座的学生
+            离开: 离开的学生
+            变化学生: 指定排数有变化的学生，默认检查全部指定排数
+        
+        返回:
+            bool: 是否调整成功；失败时当前座位保持不变
+        """
+        if isinstance(self.当前分配结果, 座位向量.座位向量):
+            # 候选方案的视图不能加入新学生，先复制为分配表；座位相同，撤销记录继续有效
+            self.当前分配结果 = self.当前分配结果.转为分配表()
+            self.撤销栈.分配结果 = self.当前分配结果
+        记录 = 运行指标.运行记录("调整座位", "cprofile" if self.启用性能分析.get() else None)
+        try:
+            with 记录.激活():
+                移动列表 = self.撤销栈.修复座位(加入, 离开, self.指定排数安排, 变化学生)
+        except 引擎.分配失败错误 as e:
+            self.结束运行记录(记录, e)
+            messagebox.showerror("错误", f"调整座位失败：{str(e)}")
+            return False
+        self.结束运行记录(记录)
+        self.写入日志(状态日志.移动, 移动=移动列表)
+        self.种子来源 = None  # 挪动不是互换，不能再由种子重现
+        
+        # 只更新涉及的座位，移动过的学生高亮显示
+        for 学生, 原座位, 新座位 in 移动列表:
+            if 原座位 is not None:
+                i, j = 原座位
+                占用者 = self.当前分配结果.座位上的学生(原座位)
+                if 占用者 is None:
+                    self.座位标签[i][j].config(text="空座位", font=("微软雅黑", 9), bg="white")
+            if 新座位 is not None:
+                i, j = 新座位
+                self.座位标签[i][j].config(text=学生, font=("微软雅黑", 9, "bold"), bg="lightyellow")
+        self.第一次点击 = None
+        self.第二次点击 = None
+        移动数 = sum(新座位 is not None for _, _, 新座位 in 移动列表)
+        self.状态标签.config(text=f"已调整座位：{移动数}名学生入座或换座，{len(离开)}名学生离开")
+        return True
+    
+    def 设置成对约束(self):
+        """设置两名学生同桌、分开，或一组学生分散坐"""
+        输入 = simpledialog.askstring(
+            "设置成对约束",
+            "请输入约束类型和学生姓名(用空格分隔)，末尾可加权重(默认1):\n"
+            "同桌 张三 李四\n分开 张三 李四 5\n分散 学生1 学生2 学生3 2")
+        if not 输入:
+            return
+        
+        输入列表 = 输入.split()
+        权重 = 1
+        if len(输入列表) > 3:
+            try:
+                权重 = float(输入列表[-1])
+                输入列表.pop()
+                权重 = int(权重) if 权重.is_integer() else 权重
+            except ValueError:
+                pass
+        类型, 学生列表 = (输入列表[0], 输入列表[1:]) if 输入列表 else (None, [])
+        
+        # 验证学生是否在名单中
+        不在名单 = [学生 for 学生 in 学生列表 if 学生 not in self.学生名单]
+        if 不在名单:
+            messagebox.showerror("错误", f"学生不在名单中：{'、'.join(不在名单)}")
+            return
+        
+        约束 = {"类型": 类型, "学生": 学生列表, "权重": 权重}
+        try:
+            座位约束.解析成对约束([约束])
+        except ValueError as e:
+            messagebox.showerror("错误", str(e).replace("第1条", ""))
+            return
+        
+        # 添加成对约束并保存设置
+        self.成对约束.append(约束)
+        self.写入日志(状态日志.添加成对约束, 约束=约束)
+        messagebox.showinfo("成功", f"已设置{'、'.join(学生列表)}{类型}（权重{权重}），共{len(self.成对约束)}条成对约束")
     
     def 清除设置(self):
-        """清除所有特殊安排"""
-        # 清除指定排数安排
+        """清除所有特殊安排和当前座位"""
+        # 清除指定排数安排和成对约束
         self.指定排数安排 = {}
+        self.成对约束 = []
         
-        # 清除座位显示
-        for i in range(self.座位行数):
-            for j in range(self.座位列数):
-                if not ((j == 0 or j == 5) and i == 5):
-                    self.座位标签[i][j].config(text="空座位", font=("微软雅黑", 9))
+        # 清除座位显示和当前分配结果，撤销栈随之清空，之后导出的是空座位表
+        self.更新座位显示(座位分配表())
         
-        # 保存设置
-        self.保存特殊安排()
-        messagebox.showinfo("成功", "已清除所有设置")
+        # 直接写成快照：不含当前座位，下次启动不会恢复已清除的座位
+        if self.保存特殊安排():
+            messagebox.showinfo("成功", "已清除所有设置")
     
     def 验证特殊安排(self):
         """验证特殊座位安排是否可行
         
         功能:
-        - 检查指定排数的学生数量是否超过总座位数
-        - 确保特殊安排不会导致座位不足
-        
-        注意:
-        - 当前实现仅检查学生数量是否超过总座位数
-        - 不检查排数有效性(由设置指定排数方法处理)
+        - 检查学生人数是否超过总座位数
+        - 通过最大匹配检查每个指定排数的学生都能坐到指定排
+        - 不可满足时列出座位数少于受限学生数的排集合
         
         返回:
             tuple: (验证结果, 错误信息)
             - 验证结果: True表示验证通过，False表示验证失败
             - 错误信息: 验证失败时的详细错误描述
         """
-        # 计算指定排数的学生数量
-        指定排数学生数 = len(self.指定排数安排)
-        
-        # 计算总座位数 - 减去两个角落没有的座位
-        总座位数 = self.座位行数 * self.座位列数 - 2
+        return 引擎.验证特殊安排(self.学生名单, self.布局, self.指定排数安排)
+
+    def 加载座位布局(self):
+        """从配置文件加载座位布局
         
-        # 检查学生数量是否超过可用座位数
-        if 指定排数学生数 > 总座位数:
-            return False, f"指定排数的学生数量({指定排数学生数})超过可用座位数({总座位数})"
+        功能:
+        - 读取配置.json中的"座位布局"项（行数、列数、空位、过道列、讲台）
+        - 配置文件或该项不存在时使用默认布局
+        - 配置不合法时提示错误并使用默认布局
         
-        return True, ""  # 验证通过
+        返回:
+            座位布局: 编译后的布局对象
+        """
+        try:
+            try:
+                配置路径 = 获取资源路径("配置.json")
+            except:
+                配置路径 = "配置.json"
+            return 座位布局.从文件加载(配置路径)
+        except (ValueError, KeyError, TypeError) as e:
+            self.启动数据有误 = True
+            messagebox.showerror("错误", f"座位布局配置错误: {str(e)}\n将使用默认布局")
+            return 默认布局()
 
     def 加载管理员密码(self):
         """从配置文件加载管理员密码"""
@@ -441,6 +1230,15 @@ class 座位分配:
         except:
             return "admin"  # 如果配置文件不存在，使用默认密码
 
+    def 加载轮换设置(self):
+        """从配置文件加载座位轮换设置，不存在时返回空字典"""
+        try:
+            with open("配置.json", "r", encoding="utf-8") as f:
+                设置 = json.load(f).get("座位轮换", {})
+                return 设置 if isinstance(设置, dict) else {}
+        except:
+            return {}
+
     def 导出到Excel(self):
         """导出当前座位表到Excel文件
         
@@ -449,8 +1247,9 @@ class 座位分配:
           1. 座位表(学生视角): 从学生角度看的座位布局
           2. 座位表(讲台视角): 从讲台角度看的座位布局(行列翻转)
         - 添加标题、讲台标识和方向标识
-        - 设置单元格格式(居中、边框等)
+        - 设置单元格格式(居中、边框等)，样式只创建一次并流式写出
         - 自动生成带时间戳的文件名
+        - 在后台线程中写入和保存，可取消，取消时不会留下不完整的文件
         
         返回:
             无返回值，但会显示导出成功或失败的提示信息
@@ -458,78 +1257,8 @@ class 座位分配:
         if not self.当前分配结果:
             messagebox.showerror("错误", "请先进行座位分配")
             return
-            
-        # 创建新的工作簿
-        wb = openpyxl.Workbook()
-        
-        # 创建第一个工作表（正常视图）- 学生视角
-        ws1 = wb.active
-        ws1.title = "座位表（学生视角）"
-        
-        # 创建第二个工作表（翻转视图）- 讲台视角
-        ws2 = wb.create_sheet("座位表（讲台视角）")
-        
-        # 设置列宽 - 统一所有列的宽度为15个字符
-        for col in range(1, self.座位列数 + 1):
-            ws1.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 15
-            ws2.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 15
-        
-        # 添加标题（仅学生视角）- 合并第一行的所有列
-        ws1.merge_cells(f'A1:{openpyxl.utils.get_column_letter(self.座位列数)}1')
-        标题单元格 = ws1.cell(1, 1, "班级座位表")
-        标题单元格.alignment = Alignment(horizontal='center', vertical='center')
-        标题单元格.font = openpyxl.styles.Font(size=14, bold=True)
-        
-        # 添加讲台（学生视角 - 顶部）- 合并C2和D2单元格
-        ws1.merge_cells(f'C2:D2')
-        讲台单元格 = ws1.cell(2, 3, "讲台")
-        讲台单元格.alignment = Alignment(horizontal='center', vertical='center')
-        讲台单元格.font = openpyxl.styles.Font(bold=True)
-        
-        # 添加座位（正常视图）- 遍历所有分配结果
-        for 学生, (行, 列) in self.当前分配结果.items():
-            # 调整行号（Excel从1开始，且第1行是标题，第2行是讲台）
-            excel行 = 行 + 3
-            excel列 = 列 + 1
-            
-            # 设置单元格值（正常视图）- 学生姓名居中显示
-            单元格 = ws1.cell(excel行, excel列, 学生)
-            单元格.alignment = Alignment(horizontal='center', vertical='center')
-            单元格.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # 设置单元格值（翻转视图）- 行列位置翻转
-            # 计算翻转后的位置：行和列都翻转
-            翻转行 = self.座位行数 - 行 - 1
-            翻转列 = self.座位列数 - 列 - 1
-            翻转excel行 = 翻转行 + 1  # 讲台视角不需要标题和讲台行，所以从第1行开始
-            翻转excel列 = 翻转列 + 1
-            
-            翻转单元格 = ws2.cell(翻转excel行, 翻转excel列, 学生)
-            翻转单元格.alignment = Alignment(horizontal='center', vertical='center')
-            翻转单元格.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-        
-        # 添加讲台（讲台视角 - 底部，紧贴座位区域）
-        ws2.merge_cells(f'C{self.座位行数 + 1}:D{self.座位行数 + 1}')
-        翻转讲台单元格 = ws2.cell(self.座位行数 + 1, 3, "讲台")
-        翻转讲台单元格.alignment = Alignment(horizontal='center', vertical='center')
-        翻转讲台单元格.font = openpyxl.styles.Font(bold=True)
-        
-        # 添加方向标识（仅学生视角）- 窗户和门标识
-        窗户单元格 = ws1.cell(self.座位行数 + 3, 1, "窗户")
-        窗户单元格.font = openpyxl.styles.Font(color="0000FF")
-        
-        门单元格 = ws1.cell(self.座位行数 + 3, self.座位列数, "门")
-        门单元格.font = openpyxl.styles.Font(color="0000FF")
+        if self.方案待记录:
+            self.记录当前座位()  # 导出的候选方案即选定的方案
         
         # 保存文件 - 使用当前时间生成文件名
         文件名 = f"座位表_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -539,12 +1268,25 @@ class 座位分配:
             filetypes=[("Excel文件", "*.xlsx")]
         )
         
-        if 文件路径:
-            try:
-                wb.save(文件路径)
-                messagebox.showinfo("成功", f"座位表已导出到：\n{文件路径}\n\n包含两个工作表：\n1. 座位表（学生视角）\n2. 座位表（讲台视角）")
-            except Exception as e:
-                messagebox.showerror("错误", f"导出失败：{str(e)}")
+        if not 文件路径 or (self.当前任务 is not None and self.当前任务.运行中):
+            return
+        
+        # 复制当前分配结果，导出期间互换座位不影响正在写入的文件
+        房间列表 = [(None, self.布局, dict(self.当前分配结果))]
+        
+        def 任务(进度回调, 取消事件):
+            # 第一次导出时才导入openpyxl，在工作线程中导入不会卡住界面
+            import 座位表导出
+            座位表导出.导出座位表(文件路径, 房间列表, 进度回调, 取消事件)
+        
+        def 完成(_, 耗时):
+            self.状态标签.config(text=f"导出完成，用时{耗时:.2f} s")
+            messagebox.showinfo("成功", f"座位表已导出到：\n{文件路径}\n\n包含两个工作表：\n1. 座位表（学生视角）\n2. 座位表（讲台视角）")
+        
+        def 失败(e):
+            messagebox.showerror("错误", f"导出失败：{str(e)}")
+        
+        self.启动后台任务("正在导出", 任务, 完成, 失败, 记录名="导出Excel")
 
     def 处理座位点击(self, row, col):
         """处理座位点击事件
@@ -563,12 +1305,8 @@ class 座位分配:
             self.状态标签.config(text="请先进行座位分配")
             return
             
-        # 获取点击的座位上的学生
-        当前学生 = None
-        for 学生, (学生行, 学生列) in self.当前分配结果.items():
-            if 学生行 == row and 学生列 == col:
-                当前学生 = 学生
-                break
+        # 获取点击的座位上的学生 - 通过座位到学生的反向索引直接查找
+        当前学生 = self.当前分配结果.座位上的学生((row, col))
                 
         if not 当前学生:
             self.状态标签.config(text="请点击有学生的座位")
@@ -613,24 +1351,112 @@ class 座位分配:
         学生1, 行1, 列1 = self.第一次点击
         学生2, 行2, 列2 = self.第二次点击
         
-        # 更新当前分配结果
-        self.当前分配结果[学生1] = (行2, 列2)
-        self.当前分配结果[学生2] = (行1, 列1)
-        
-        # 更新界面显示
-        self.座位标签[行1][列1].config(text=学生2)
-        self.座位标签[行2][列2].config(text=学生1)
+        # 更新当前分配结果 - 双向索引同时更新，并记入撤销栈
+        self.撤销栈.互换(学生1, 学生2)
+        self.写入日志(状态日志.互换, 学生=[学生1, 学生2])
+        if self.种子来源 is not None:
+            种子记录, 名单, _ = self.种子来源
+            种子记录.添加互换(名单.编号[学生1], 名单.编号[学生2])
         
-        # 重置所有座位的背景色
-        for i in range(self.座位行数):
-            for j in range(self.座位列数):
-                if not ((j == 0 or j == 5) and i == 5):  # 跳过角落的空座位
-                    self.座位标签[i][j].config(bg="white")
+        # 更新界面显示 - 只需更新两个座位，并取消第一个座位的高亮
+        self.座位标签[行1][列1].config(text=学生2, bg="white")
+        self.座位标签[行2][列2].config(text=学生1, bg="white")
         
         # 更新状态栏
         self.状态标签.config(text=f"已成功交换{学生1}和{学生2}的座位")
+    
+    def 撤销(self):
+        """撤销上一次互换或调整座位"""
+        if self.当前任务 is not None and self.当前任务.运行中:
+            return
+        if not self.撤销栈.可以撤销:
+            self.状态标签.config(text="没有可以撤销的操作")
+            return
+        说明 = self.撤销栈.说明列表()[self.撤销栈.位置 - 1]
+        self.显示撤销结果(self.撤销栈.撤销(), f"已撤销：{说明}")
+    
+    def 重做(self):
+        """重做上一次撤销的操作"""
+        if self.当前任务 is not None and self.当前任务.运行中:
+            return
+        if not self.撤销栈.可以重做:
+            self.状态标签.config(text="没有可以重做的操作")
+            return
+        说明 = self.撤销栈.说明列表()[self.撤销栈.位置]
+        self.显示撤销结果(self.撤销栈.重做(), f"已重做：{说明}")
+    
+    def 跳到操作(self):
+        """列出最近的操作，撤销或重做到输入的那一步"""
+        if self.当前任务 is not None and self.当前任务.运行中:
+            return
+        说明列表 = self.撤销栈.说明列表()
+        if not 说明列表:
+            messagebox.showinfo("操作记录", "当前座位还没有互换或调整过")
+            return
+        起点 = max(0, len(说明列表) - 15)
+        行列表 = ["0. 最初的座位"] if 起点 == 0 else [f"（更早的{起点}步未列出）"]
+        for 序号 in range(起点, len(说明列表)):
+            标记 = "  ← 当前" if 序号 + 1 == self.撤销栈.位置 else ""
+            行列表.append(f"{序号 + 1}. {说明列表[序号]}{标记}")
+        if self.撤销栈.位置 == 0:
+            行列表[0] += "  ← 当前"
+        位置 = simpledialog.askinteger("操作记录", "\n".join(行列表) + "\n\n回到第几步之后:",
+                                   initialvalue=self.撤销栈.位置, minvalue=0, maxvalue=len(说明列表))
+        if 位置 is None or 位置 == self.撤销栈.位置:
+            return
+        self.显示撤销结果(self.撤销栈.跳到(位置), f"已回到第{位置}步之后" if 位置 else "已回到最初的座位")
+    
+    def 显示撤销结果(self, 操作列表, 状态):
+        """把撤销或重做中移动过的学生写入日志，只更新涉及的座位"""
+        移动列表 = [移动 for 操作 in 操作列表 for 移动 in 操作]
+        self.写入日志(状态日志.移动, 移动=移动列表)
+        if self.种子来源 is not None:
+            # 由种子生成的座位上只有互换，撤销一次互换就是再互换一次
+            种子记录, 名单, _ = self.种子来源
+            for 操作 in 操作列表:
+                对 = 撤销记录.互换对(操作)
+                if 对 is None:
+                    self.种子来源 = None
+                    break
+                种子记录.添加互换(名单.编号[对[0]], 名单.编号[对[1]])
+        座位集合 = {座位 for _, 原座位, 新座位 in 移动列表 for 座位 in (原座位, 新座位) if 座位 is not None}
+        for i, j in 座位集合:
+            学生 = self.当前分配结果.座位上的学生((i, j))
+            if 学生 is None:
+                self.座位标签[i][j].config(text="空座位", font=("微软雅黑", 9), bg="white")
+            else:
+                self.座位标签[i][j].config(text=学生, font=("微软雅黑", 9, "bold"), bg="white")
+        if self.第一次点击 is not None:
+            _, i, j = self.第一次点击
+            self.座位标签[i][j].config(bg="white")
+        self.第一次点击 = None
+        self.第二次点击 = None
+        self.状态标签.config(text=f"{状态}（第{self.撤销栈.位置}/{len(self.撤销栈)}步）")
+
+def 输出启动报告(app):
+    """窗口第一次显示后输出启动耗时报告（--startup-profile）
+    
+    报告包括各模块的导入耗时和启动各阶段耗时，写入当前目录的 启动分析.txt，
+    有控制台时同时打印（打包为无控制台的exe时只写文件）。
+    """
+    总耗时 = time.perf_counter() - 启动开始时间
+    行列表 = [f"启动到窗口显示: {总耗时 * 1000:.1f} ms", ""]
+    if 停止记录导入 is not None:
+        行列表 += [运行指标.导入耗时文本(停止记录导入()), ""]
+    行列表.append(app.启动记录.转为文本())
+    报告 = "\n".join(行列表)
+    if sys.stdout is not None:
+        print(报告)
+    try:
+        with open("启动分析.txt", "w", encoding="utf-8") as f:
+            f.write(报告)
+    except OSError as e:
+        print(f"写入启动分析失败: {e}", file=sys.stderr)
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = 座位分配(root)
+    if "--startup-profile" in sys.argv:
+        # 空闲回调在窗口第一次绘制完成之后才会执行
+        root.after_idle(输出启动报告, app)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,469 @@
+"""座位分配引擎
+
+不依赖tkinter的座位分配核心逻辑，供图形界面和批量命令行共同使用。
+
+输入为座位布局、学生名单和特殊安排，输出为 {学生: (行, 列)} 的座位表。
+命令行用法（不会导入tkinter，可在无显示器的服务器上运行）:
+    python 座位分配引擎.py --batch 班级目录1 班级目录2 ... [-o 输出目录] [--seed 种子] [--excel 文件]
+                           [--metrics 指标.jsonl] [--profile] [--history [--weeks N] [--date 日期]]
+
+每个班级目录中需包含 学生名单.json（或学籍系统导出的 学生名单.xlsx、学生名单.csv，见 名单导入），
+可选包含 特殊安排.json 和 配置.json（座位布局）。
+加上 --history 时使用班级目录中的 座位历史.db 避开最近几周的排和同桌，并把本次结果记入其中。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import 匹配求解
+import 运行指标
+import 座位约束
+from 后台任务 import 检查取消
+from 座位分配表 import 座位分配表
+from 座位布局 import 座位布局
+from 座位池 import 座位池
+
+# 默认学生名单 - 名单文件不存在或格式错误时使用
+默认学生名单 = [
+    "敖康涵", "崔子傲", "杜欣怡", "冯禹栋", "弓子航",
+    "郭奕诚", "李秉锡", "李凡奇", "李其东", "李星哲",
+    "李一诺", "刘锦溪", "刘睿忱", "刘奕贤", "倪欣彤",
+    "牛新迪", "唐晚玉", "田煦禾", "王鼎宸", "王柳嘉",
+    "王培源", "王烁妍", "王一冉", "王子辰", "吴金航",
+    "许泽玉", "薛旭然", "杨紫斐", "张浩然", "张颀萱",
+    "张依依", "张译文", "赵鑫炜", "赵一诺"
+]
+
+学生名单文件 = "学生名单.json"
+特殊安排文件 = "特殊安排.json"
+配置文件 = "配置.json"
+
+
+class 分配失败错误(Exception):
+    """特殊安排无法满足或座位不足时抛出"""
+
+
+def 整理学生名单(数据):
+    """把学生名单JSON整理为姓名列表和属性
+
+    名单中的每一项可以是姓名字符串，也可以是带属性的对象，如
+    {"姓名": "张三", "班级": "1班", "试卷": "A"}（考试模式按这些属性让同组学生不相邻）。
+
+    返回:
+        tuple: (姓名列表, {姓名: {属性: 值}})，没有属性的学生不在属性字典中
+
+    异常:
+        ValueError: 名单不是列表，或对象缺少姓名
+    """
+    if not isinstance(数据, list):
+        raise ValueError("学生名单必须是列表")
+    名单 = []
+    属性 = {}
+    for 项 in 数据:
+        if isinstance(项, dict):
+            姓名 = 项.get("姓名")
+            if not isinstance(姓名, str) or not 姓名:
+                raise ValueError(f"学生名单中的对象缺少姓名: {项}")
+            其他 = {键: 值 for 键, 值 in 项.items() if 键 != "姓名"}
+            if 其他:
+                属性[姓名] = 其他
+            名单.append(姓名)
+        else:
+            名单.append(项)
+    return 名单, 属性
+
+
+def 读取学生名单(路径, 包含属性=False):
+    """从JSON、CSV或Excel文件读取学生名单
+
+    与界面中的加载学生名单()不同，这里不做默认名单回退，出错时直接抛出异常，
+    便于批量任务发现坏数据。CSV和Excel由 名单导入.读取名单() 逐行读取，解析结果会被缓存。
+
+    参数:
+        包含属性: 为True时同时返回学生属性，见 整理学生名单()
+
+    返回:
+        list: 学生名单列表；包含属性时为 (学生名单, 学生属性)
+    """
+    if os.path.splitext(路径)[1].lower() != ".json":
+        import 名单导入  # 只在读取表格时导入
+        with 运行指标.阶段("加载学生名单"):
+            名单, 属性 = 名单导入.读取名单(路径)
+        return (名单, 属性) if 包含属性 else 名单
+    with 运行指标.阶段("加载学生名单"), open(路径, "r", encoding="utf-8") as f:
+        数据 = json.load(f)
+    try:
+        名单, 属性 = 整理学生名单(数据)
+    except ValueError as e:
+        raise ValueError(f"学生名单格式错误: {路径}: {e}") from None
+    return (名单, 属性) if 包含属性 else 名单
+
+
+def 读取特殊安排(路径):
+    """从JSON文件读取指定排数安排，文件不存在时返回空字典
+
+    返回:
+        dict: {学生: 排数列表}
+    """
+    if not os.path.exists(路径):
+        return {}
+    with 运行指标.阶段("加载特殊安排"), open(路径, "r", encoding="utf-8") as f:
+        数据 = json.load(f)
+    return dict(数据.get("指定排数安排", {}))
+
+
+def 读取成对约束(路径):
+    """从特殊安排文件读取成对约束，文件不存在时返回空列表
+
+    返回:
+        list: [(类型, 学生1, 学生2, 权重), ...]，见 座位约束.解析成对约束()
+
+    异常:
+        ValueError: 成对约束格式错误
+    """
+    if not os.path.exists(路径):
+        return []
+    with open(路径, "r", encoding="utf-8") as f:
+        数据 = json.load(f)
+    return 座位约束.解析成对约束(数据.get("成对约束", []))
+
+
+def 写入特殊安排(路径, 指定排数安排, 成对约束=None, 附加=None):
+    """把指定排数安排和成对约束写入特殊安排文件
+
+    先写临时文件再替换，写入中途出错时原文件保持不变。
+
+    参数:
+        指定排数安排: {学生: 排数列表}
+        成对约束: 特殊安排.json 格式的成对约束列表，为空时不写入该项
+        附加: 可选，一并写入的其他项（如界面保存的当前座位，见 状态日志）
+    """
+    数据 = {"指定排数安排": 指定排数安排}
+    if 成对约束:
+        数据["成对约束"] = 成对约束
+    if 附加:
+        数据.update(附加)
+    临时路径 = 路径 + ".tmp"
+    try:
+        with open(临时路径, "w", encoding="utf-8") as f:
+            json.dump(数据, f, ensure_ascii=False, indent=4)
+        os.replace(临时路径, 路径)
+    finally:
+        if os.path.exists(临时路径):
+            os.remove(临时路径)
+
+
+def _构建约束图(学生名单, 布局, 指定排数安排):
+    """把特殊安排整理成 学生 -> 排 的二分图
+
+    返回:
+        tuple: (受限学生, 邻接, 排号列表, 容量)
+        - 受限学生: 在名单中且有指定排数的学生
+        - 邻接: 邻接[i] 为第i个受限学生允许的排序号列表
+        - 排号列表: 排序号 -> 实际排号
+        - 容量: 每一排的座位数
+    """
+    排号列表 = 布局.排号列表
+    排序号 = {排: 序号 for 序号, 排 in enumerate(排号列表)}
+    容量 = 布局.排容量
+
+    名单集合 = set(学生名单)
+    受限学生 = [学生 for 学生 in 指定排数安排 if 学生 in 名单集合]
+    邻接 = [sorted({排序号[排] for 排 in 指定排数安排[学生] if 排 in 排序号})
+          for 学生 in 受限学生]
+    return 受限学生, 邻接, 排号列表, 容量
+
+
+def _描述违例(违例列表, 受限学生, 排号列表):
+    """把霍尔条件违例整理成可读的错误信息"""
+    描述 = []
+    for 排集合, 学生序号, 座位数 in 违例列表:
+        姓名 = [受限学生[i] for i in 学生序号]
+        姓名文本 = "、".join(姓名[:5]) + ("等" if len(姓名) > 5 else "")
+        if not 排集合:
+            描述.append(f"{姓名文本}指定的排没有座位")
+            continue
+        排文本 = ",".join(str(排号列表[v]) for v in sorted(排集合))
+        描述.append(f"第{排文本}排只有{座位数}个座位，却有{len(姓名)}名学生只能坐在这些排（{姓名文本}）")
+    return "；".join(描述)
+
+
+def 验证特殊安排(学生名单, 布局, 指定排数安排):
+    """验证特殊座位安排是否可行
+
+    通过二分图最大匹配精确判定：约束可满足当且仅当每个受限学生都能匹配到一排。
+    不可满足时，错误信息会列出违反霍尔条件的排集合（这些排的座位数少于只能坐在其中的学生数）。
+
+    返回:
+        tuple: (验证结果, 错误信息)
+    """
+    # 检查总人数是否超过可用座位数
+    if len(学生名单) > 布局.座位数:
+        return False, f"学生人数({len(学生名单)})超过可用座位数({布局.座位数})"
+
+    with 运行指标.阶段("验证特殊安排"):
+        受限学生, 邻接, 排号列表, 容量 = _构建约束图(学生名单, 布局, 指定排数安排)
+        匹配, 右侧匹配 = 匹配求解.最大匹配(邻接, 容量)
+        if None in 匹配:
+            违例列表 = 匹配求解.查找霍尔违例(邻接, 容量, 匹配, 右侧匹配)
+            return False, _描述违例(违例列表, 受限学生, 排号列表)
+
+    return True, ""  # 验证通过
+
+
+def 合并轮换约束(学生名单, 布局, 指定排数安排, 轮换):
+    """把"避开最近坐过的排"合并到指定排数安排中
+
+    合并后无法满足时，找出违反霍尔条件的学生，把他们恢复为原来的安排（没有则不限制），
+    直到可以满足或只剩原安排本身的冲突为止。
+
+    参数:
+        轮换: 座位历史.轮换约束 对象
+
+    返回:
+        dict: 合并后的 {学生: 排数列表}
+    """
+    指定排数安排 = 指定排数安排 or {}
+    合并 = dict(指定排数安排)
+    合并.update(轮换.避开排数安排(学生名单, 布局, 指定排数安排))
+    while True:
+        受限学生, 邻接, _, 容量 = _构建约束图(学生名单, 布局, 合并)
+        匹配, 右侧匹配 = 匹配求解.最大匹配(邻接, 容量)
+        if None not in 匹配:
+            return 合并
+        放宽数 = 0
+        for _, 学生序号, _ in 匹配求解.查找霍尔违例(邻接, 容量, 匹配, 右侧匹配):
+            for i in 学生序号:
+                学生 = 受限学生[i]
+                if 学生 not in 指定排数安排:
+                    del 合并[学生]
+                    放宽数 += 1
+                elif 合并[学生] != 指定排数安排[学生]:
+                    合并[学生] = 指定排数安排[学生]
+                    放宽数 += 1
+        if not 放宽数:
+            return 合并
+        运行指标.计数("轮换约束放宽", 放宽数)
+
+
+def 分配座位(学生名单, 布局, 指定排数安排=None, 随机源=None, 进度回调=None, 取消事件=None, 轮换=None,
+             成对约束=None):
+    """执行随机座位分配算法
+
+    先用最大匹配一次性判定特殊安排能否满足，再随机游走得到均匀随机的合法安排，
+    不再需要反复重试。
+
+    运行指标中记录 验证特殊安排、随机交换、放置座位 三个阶段，以及尝试次数、
+    每次尝试的违例数和扫描座位数（随机交换每步查看一个座位，放置时每名学生抽取一个座位）。
+
+    指定轮换约束时，先把"避开最近坐过的排"合并到指定排数安排中（无法满足的部分自动放宽）。
+    有轮换约束或成对约束时，放置后再用模拟退火（座位约束.优化()）交换座位，
+    减少违反的成对约束和与最近几周同桌的重复；此时结果不再是均匀随机的。
+
+    参数:
+        学生名单: 学生姓名列表
+        布局: 座位布局对象
+        指定排数安排: {学生: 排数列表}，可选
+        随机源: random.Random实例，可选，用于复现结果
+        进度回调: 可选，进度回调(说明, 完成, 总数)，用于界面显示进度
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+        轮换: 可选，座位历史.轮换约束 对象，为空时不起作用
+        成对约束: 可选，[(类型, 学生1, 学生2, 权重), ...]，见 座位约束.解析成对约束()
+
+    返回:
+        座位分配表: 学生 <-> (行, 列) 的双向映射，可按字典 {学生: (行, 列)} 使用
+
+    异常:
+        分配失败错误: 特殊安排无法满足或座位不足
+        任务已取消: 取消事件被设置
+    """
+    指定排数安排 = 指定排数安排 or {}
+    随机源 = 随机源 or random
+    if 进度回调:
+        进度回调("验证特殊安排", 0, 1)
+
+    # 检查座位是否足够
+    if len(学生名单) > 布局.座位数:
+        raise 分配失败错误(f"学生人数({len(学生名单)})超过可用座位数({布局.座位数})")
+
+    if 轮换:
+        with 运行指标.阶段("合并轮换约束"):
+            指定排数安排 = 合并轮换约束(学生名单, 布局, 指定排数安排, 轮换)
+
+    # 判定特殊安排是否可满足 - 一次最大匹配即可得出结论
+    运行指标.计数("尝试次数")
+    with 运行指标.阶段("验证特殊安排"):
+        受限学生, 邻接, 排号列表, 容量 = _构建约束图(学生名单, 布局, 指定排数安排)
+        匹配, 右侧匹配 = 匹配求解.最大匹配(邻接, 容量)
+        违例列表 = 匹配求解.查找霍尔违例(邻接, 容量, 匹配, 右侧匹配) if None in 匹配 else []
+    运行指标.追加("每次尝试违例数", len(违例列表))
+    if 违例列表:
+        raise 分配失败错误(f"特殊安排无法满足: {_描述违例(违例列表, 受限学生, 排号列表)}\n请修改后重试")
+
+    # 从匹配结果出发随机游走，得到均匀随机的 受限学生 -> 排 安排
+    with 运行指标.阶段("随机交换"):
+        所在排 = 匹配求解.随机化安排(邻接, 容量, 匹配, 随机源,
+                               进度回调=进度回调, 取消事件=取消事件)
+    检查取消(取消事件)
+    if 进度回调:
+        进度回调("分配座位", 0, len(学生名单))
+
+    # 受限学生在所在排中随机取座，其余学生从剩余空座位中随机取座
+    # 座位池按排索引、交换删除，每次抽取都是O(1)，整次分配与学生数和座位数成线性关系
+    with 运行指标.阶段("放置座位"):
+        空座位 = 座位池(布局.座位列表)
+        分配结果 = 座位分配表()  # 学生 <-> (行, 列)
+        for 序号, 排 in enumerate(所在排):
+            分配结果.放置(受限学生[序号], 空座位.按排抽取(排号列表[排], 随机源))
+
+        for 学生 in 学生名单:
+            if 学生 not in 分配结果:
+                分配结果.放置(学生, 空座位.抽取(随机源))
+    运行指标.计数("扫描座位数", len(分配结果))
+
+    if 轮换 or 成对约束:
+        with 运行指标.阶段("局部搜索"):
+            分配结果, _ = 座位约束.优化(分配结果, 布局, 成对约束, 指定排数安排, 轮换, 随机源,
+                                   进度回调=进度回调, 取消事件=取消事件)
+        if 轮换:
+            运行指标.计数("轮换罚分", 轮换.总罚分(分配结果, 布局))
+        if 成对约束:
+            罚分, 违反列表 = 座位约束.计算罚分(分配结果, 成对约束)
+            运行指标.计数("成对罚分", 罚分)
+            运行指标.计数("违反成对约束数", len(违反列表))
+
+    return 分配结果
+
+
+def 查找学生名单(班级目录):
+    """班级目录中的学生名单文件：优先 学生名单.json，没有时依次找 学生名单.xlsx、学生名单.csv
+
+    都不存在时返回 学生名单.json 的路径，由读取时报告文件不存在。
+    """
+    基本名 = os.path.splitext(学生名单文件)[0]
+    for 扩展名 in (".json", ".xlsx", ".csv"):
+        路径 = os.path.join(班级目录, 基本名 + 扩展名)
+        if os.path.exists(路径):
+            return 路径
+    return os.path.join(班级目录, 学生名单文件)
+
+
+def 分配班级(班级目录, 随机源=None, 轮换=None):
+    """读取班级目录中的名单和特殊安排并完成分配
+
+    参数:
+        轮换: 可选，座位历史.轮换约束 对象
+
+    返回:
+        tuple: (布局, 分配结果)，分配结果为 {学生: (行, 列)}
+    """
+    学生名单 = 读取学生名单(查找学生名单(班级目录))
+    指定排数安排 = 读取特殊安排(os.path.join(班级目录, 特殊安排文件))
+    成对约束 = 读取成对约束(os.path.join(班级目录, 特殊安排文件))
+    布局 = 座位布局.从文件加载(os.path.join(班级目录, 配置文件))
+    return 布局, 分配座位(学生名单, 布局, 指定排数安排, 随机源=随机源, 轮换=轮换, 成对约束=成对约束)
+
+
+def 班级种子(种子, 班级名):
+    """由总种子和班级名派生班级的随机种子，单独重新分配某个班级时得到相同结果"""
+    return f"{种子}:{班级名}"
+
+
+def 批量分配(班级目录列表, 输出目录, 种子=None, Excel路径=None, 分析=None,
+             使用历史=False, 周数=None, 日期=None):
+    """依次为多个班级分配座位，并把结果写成JSON文件
+
+    输出文件为 输出目录/<班级名>_座位表.json，内容为 {"种子", "班级种子", "座位": {学生: [行, 列]}}。
+    每个班级使用由 (种子, 班级名) 派生的随机源（见 班级种子()），与班级的顺序和数量无关；
+    种子为None时生成一个新种子并打印，用同一种子只分配其中一个班级也能得到相同座位。
+    指定Excel路径时，所有成功的班级还会写入同一个工作簿，每个班级两个工作表。
+    每个班级和最后的导出各生成一条运行指标记录，分析参数见 运行指标.运行记录。
+    使用历史时，每个班级读取自己目录中的 座位历史.db 作为轮换约束，分配成功后把结果按日期记入。
+
+    返回:
+        int: 失败的班级数量
+    """
+    os.makedirs(输出目录, exist_ok=True)
+    历史错误 = ()
+    if 使用历史:
+        # sqlite3只在使用历史时导入，历史库损坏或被占用时只让该班级失败
+        import sqlite3
+        import 座位历史
+        历史错误 = (sqlite3.Error,)
+    if 种子 is None:
+        import 种子安排  # 种子安排依赖本模块，在函数内导入
+        种子 = 种子安排.新种子()
+        print(f"种子: {种子}")
+    失败数 = 0
+    房间列表 = []
+    for 班级目录 in 班级目录列表:
+        班级名 = os.path.basename(os.path.normpath(班级目录))
+        开始时间 = time.perf_counter()
+        历史 = None
+        try:
+            with 运行指标.记录运行(f"批量分配:{班级名}", 分析):
+                轮换 = None
+                if 使用历史:
+                    历史 = 座位历史.座位历史(os.path.join(班级目录, 座位历史.历史文件名), 周数)
+                    轮换 = 历史.轮换约束()
+                布局, 分配结果 = 分配班级(班级目录, random.Random(班级种子(种子, 班级名)), 轮换)
+            if 历史 is not None:
+                历史.记录(分配结果, 布局, 日期)
+        except (OSError, ValueError, 分配失败错误) + 历史错误 as e:
+            失败数 += 1
+            print(f"{班级名}: 失败 - {e}", file=sys.stderr)
+            continue
+        finally:
+            if 历史 is not None:
+                历史.关闭()
+
+        输出路径 = os.path.join(输出目录, f"{班级名}_座位表.json")
+        with open(输出路径, "w", encoding="utf-8") as f:
+            json.dump({"种子": 种子, "班级种子": 班级种子(种子, 班级名),
+                       "座位": {学生: list(座位) for 学生, 座位 in 分配结果.items()}},
+                      f, ensure_ascii=False, indent=4)
+        耗时 = (time.perf_counter() - 开始时间) * 1000
+        print(f"{班级名}: 已分配{len(分配结果)}名学生 ({耗时:.2f} ms, 种子 {种子}) -> {输出路径}")
+        if Excel路径:
+            房间列表.append((班级名, 布局, 分配结果))
+
+    if Excel路径 and 房间列表:
+        import 座位表导出  # openpyxl为可选依赖，只在需要时导入
+        with 运行指标.记录运行("导出Excel", 分析):
+            座位表导出.导出座位表(Excel路径, 房间列表)
+        print(f"已导出{len(房间列表)}个班级的座位表 -> {Excel路径}")
+    return 失败数
+
+
+def 主程序(参数列表=None):
+    """命令行入口"""
+    解析器 = argparse.ArgumentParser(description="班级座位随机分配（无界面批量模式）")
+    解析器.add_argument("--batch", nargs="+", metavar="班级目录", required=True,
+                        help="一个或多个班级目录，每个目录包含学生名单（.json、.xlsx或.csv）和可选的特殊安排.json、配置.json")
+    解析器.add_argument("-o", "--output", default="座位表输出", help="结果输出目录")
+    解析器.add_argument("--seed", type=int, default=None, help="随机种子，用于复现结果；不指定时生成并记入输出")
+    解析器.add_argument("--excel", default=None, metavar="文件路径",
+                        help="把所有班级的座位表导出到同一个Excel文件（需要openpyxl）")
+    解析器.add_argument("--metrics", default=None, metavar="文件路径",
+                        help="把每个班级的阶段耗时和计数以一行JSON追加写入该文件")
+    解析器.add_argument("--profile", action="store_true", help="用cProfile分析每次运行，结果写入指标")
+    解析器.add_argument("--history", action="store_true",
+                        help="使用班级目录中的座位历史.db避开最近几周的排和同桌，并记录本次结果")
+    解析器.add_argument("--weeks", type=int, default=None, metavar="N",
+                        help="轮换约束统计最近几次座位（默认沿用历史库中的设置，新库为4）")
+    解析器.add_argument("--date", default=None, metavar="YYYY-MM-DD",
+                        help="本次座位记入历史的日期，默认为今天；同一天已有记录时替换")
+    参数 = 解析器.parse_args(参数列表)
+
+    if 参数.metrics:
+        运行指标.启用JSON日志(参数.metrics)
+    失败数 = 批量分配(参数.batch, 参数.output, 参数.seed, 参数.excel,
+                   "cprofile" if 参数.profile else None, 参数.history, 参数.weeks, 参数.date)
+    return 1 if 失败数 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(主程序())
@@ -0,0 +1,82 @@
+"""双向座位分配表
+
+同时维护 学生 -> 座位 和 座位 -> 学生 两个字典，按座位查学生、互换座位都是O(1)。
+对外表现为只读的 {学生: (行, 列)} 映射，原来按字典使用分配结果的代码（导出、批量输出等）无需修改；
+修改只能通过 放置()、移除()、互换() 进行，保证两个方向始终一致。
+"""
+from collections.abc import Mapping
+
+
+class 座位分配表(Mapping):
+    """学生与座位的双向映射
+
+    主要方法：
+    - 座位上的学生(): 按座位查学生
+    - 放置(): 把学生放到空座位上
+    - 移除(): 让学生离开座位
+    - 互换(): 交换两名学生的座位
+    """
+    def __init__(self, 分配结果=None):
+        """初始化分配表
+
+        参数:
+            分配结果: 可选，{学生: (行, 列)} 形式的初始分配
+        """
+        self._学生座位 = {}
+        self._座位学生 = {}
+        if 分配结果:
+            for 学生, 座位 in 分配结果.items():
+                self.放置(学生, 座位)
+
+    def __getitem__(self, 学生):
+        return self._学生座位[学生]
+
+    def __iter__(self):
+        return iter(self._学生座位)
+
+    def __len__(self):
+        return len(self._学生座位)
+
+    def __contains__(self, 学生):
+        return 学生 in self._学生座位
+
+    def __repr__(self):
+        return f"座位分配表({self._学生座位!r})"
+
+    def 座位上的学生(self, 座位):
+        """返回坐在指定座位上的学生，空座位返回None"""
+        return self._座位学生.get(座位)
+
+    def 放置(self, 学生, 座位):
+        """把学生放到空座位上，学生原来的座位会被释放
+
+        异常:
+            ValueError: 座位已被其他学生占用
+        """
+        座位 = tuple(座位)
+        占用者 = self._座位学生.get(座位)
+        if 占用者 is not None and 占用者 != 学生:
+            raise ValueError(f"座位{座位}已被{占用者}占用")
+        原座位 = self._学生座位.get(学生)
+        if 原座位 is not None:
+            del self._座位学生[原座位]
+        self._学生座位[学生] = 座位
+        self._座位学生[座位] = 学生
+
+    def 移除(self, 学生):
+        """让学生离开座位，返回其原来的座位"""
+        座位 = self._学生座位.pop(学生)
+        del self._座位学生[座位]
+        return 座位
+
+    def 互换(self, 学生1, 学生2):
+        """交换两名学生的座位
+
+        返回:
+            tuple: (学生1的新座位, 学生2的新座位)
+        """
+        座位1 = self._学生座位[学生1]
+        座位2 = self._学生座位[学生2]
+        self._学生座位[学生1], self._学生座位[学生2] = 座位2, 座位1
+        self._座位学生[座位1], self._座位学生[座位2] = 学生2, 学生1
+        return 座位2, 座位1
@@ -0,0 +1,401 @@
+"""座位历史
+
+每周重新排座时希望"不要和最近N周坐同一排、不要和最近N周的同桌再坐一起"。
+这里用本地SQLite数据库保存每次确定下来的座位，并维护最近N次座位的滚动计数：
+- 分配: 每次确定的座位一行（日期、记录时间），同一天再次记录会替换当天的座位
+- 座位记录: 每名学生每次的座位，按 (学生, 日期) 建索引，查某个学生的历史只走索引
+- 同桌记录: 每次座位中左右相邻的学生对（中间隔着过道或空位的不算）
+- 排计数 / 同桌计数: 最近N次座位中每名学生坐每一排的次数、每对学生相邻的次数
+
+记录或删除一次座位时，只把移入、移出窗口的那几次座位的计数加上或减去，
+分配时直接读取两张计数表，不需要扫描全部历史。
+
+由种子生成的座位（见 种子安排.py）另外保存种子记录，名单和求解内容按哈希去重保存在 内容 表中。
+归档() 删除窗口以外、有种子记录的座位的逐人记录，每次座位只剩二十几字节的种子记录；
+需要时用 重现() 按种子重新求解，删除较新的记录使归档的座位回到窗口时也会自动重新展开。
+
+分配引擎不直接访问数据库：界面或批量任务在自己的线程中调用 轮换约束() 取得计数的快照，
+再把 轮换约束 对象交给 引擎.分配座位()。
+"""
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+历史文件名 = "座位历史.db"
+默认周数 = 4
+数据库版本 = 2
+
+_建表语句 = """
+CREATE TABLE IF NOT EXISTS 设置 (
+    键 TEXT PRIMARY KEY,
+    值 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS 分配 (
+    编号 INTEGER PRIMARY KEY AUTOINCREMENT,
+    日期 TEXT NOT NULL UNIQUE,
+    记录时间 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS 座位记录 (
+    分配编号 INTEGER NOT NULL,
+    学生 TEXT NOT NULL,
+    日期 TEXT NOT NULL,
+    行 INTEGER NOT NULL,
+    列 INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS 座位记录_学生日期 ON 座位记录 (学生, 日期);
+CREATE INDEX IF NOT EXISTS 座位记录_分配 ON 座位记录 (分配编号);
+CREATE TABLE IF NOT EXISTS 同桌记录 (
+    分配编号 INTEGER NOT NULL,
+    学生1 TEXT NOT NULL,
+    学生2 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS 同桌记录_分配 ON 同桌记录 (分配编号);
+CREATE TABLE IF NOT EXISTS 排计数 (
+    学生 TEXT NOT NULL,
+    排 INTEGER NOT NULL,
+    次数 INTEGER NOT NULL,
+    PRIMARY KEY (学生, 排)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS 同桌计数 (
+    学生1 TEXT NOT NULL,
+    学生2 TEXT NOT NULL,
+    次数 INTEGER NOT NULL,
+    PRIMARY KEY (学生1, 学生2)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS 种子记录 (
+    分配编号 INTEGER PRIMARY KEY,
+    记录 BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS 内容 (
+    哈希 TEXT PRIMARY KEY,
+    数据 TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def 默认历史路径():
+    """返回用户数据目录中的历史数据库路径"""
+    if sys.platform == "win32":
+        基础目录 = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        基础目录 = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(基础目录, "座位分配系统", 历史文件名)
+
+
+def 同桌对(分配结果, 布局):
+    """返回分配结果中左右相邻的学生对，每对按姓名排序
+
+    只有同一排中紧挨着的两个座位算相邻，中间是过道或空位的不算。
+    """
+    座位学生 = {座位: 学生 for 学生, 座位 in 分配结果.items()}
+    对列表 = []
+    for (行, 列), 学生 in 座位学生.items():
+        右侧 = 座位学生.get((行, 列 + 1))
+        if 右侧 is not None and 布局.是座位(行, 列 + 1):
+            对列表.append((学生, 右侧) if 学生 < 右侧 else (右侧, 学生))
+    return 对列表
+
+
+class 轮换约束:
+    """最近N次座位的计数快照，供分配引擎使用
+
+    不持有数据库连接，可以交给工作线程或其他进程。
+
+    属性:
+    - 排次数: {学生: {排: 次数}}
+    - 同桌次数: {(学生1, 学生2): 次数}，学生1 < 学生2
+    - 排权重, 同桌权重: 罚分中每次重复的权重
+    """
+    def __init__(self, 排次数=None, 同桌次数=None, 排权重=1, 同桌权重=1):
+        self.排次数 = 排次数 or {}
+        self.同桌次数 = 同桌次数 or {}
+        self.排权重 = 排权重
+        self.同桌权重 = 同桌权重
+
+    def __bool__(self):
+        return bool(self.排次数 or self.同桌次数)
+
+    def 避开排数安排(self, 学生名单, 布局, 指定排数安排=None):
+        """为坐过的排生成指定排数安排
+
+        每名有历史的学生只允许坐最近N次中坐得最少的排（通常就是没坐过的排）；
+        原来就有指定排数的学生在指定的排中选。与原安排合并后可能无法满足，由调用方放宽。
+
+        返回:
+            dict: {学生: 排数列表}，只包含需要避开某些排的学生
+        """
+        指定排数安排 = 指定排数安排 or {}
+        全部排 = 布局.排号列表
+        有座位的排 = set(全部排)
+        安排 = {}
+        for 学生 in 学生名单:
+            次数 = self.排次数.get(学生)
+            if not 次数:
+                continue
+            候选排 = [排 for 排 in 指定排数安排.get(学生, 全部排) if 排 in 有座位的排]
+            if not 候选排:
+                continue
+            最少 = min(次数.get(排, 0) for 排 in 候选排)
+            允许 = [排 for 排 in 候选排 if 次数.get(排, 0) == 最少]
+            if len(允许) < len(候选排):
+                安排[学生] = 允许
+        return 安排
+
+    def 总罚分(self, 分配结果, 布局):
+        """整个座位表的罚分，每对相邻学生只计一次"""
+        排分 = sum(self.排次数.get(学生, {}).get(行, 0) for 学生, (行, _) in 分配结果.items())
+        同桌分 = sum(self.同桌次数.get(对, 0) for 对 in 同桌对(分配结果, 布局))
+        return self.排权重 * 排分 + self.同桌权重 * 同桌分
+
+
+class 座位历史:
+    """SQLite座位历史库，维护最近N次座位的排计数和同桌计数
+
+    连接只能在创建它的线程中使用。
+
+    主要方法：
+    - 记录(): 记录一次确定下来的座位，同一天的记录会被替换
+    - 删除(): 删除某一天的记录
+    - 设置周数(): 修改计数窗口（最近几次座位）
+    - 轮换约束(): 返回计数快照，交给分配引擎
+    - 学生历史(): 某名学生的历次座位（不含已归档的座位）
+    - 重现(): 按种子重新求解某一天的座位
+    - 归档(): 窗口以外由种子生成的座位只保留种子记录
+    """
+    def __init__(self, 路径=None, 周数=None):
+        """打开（必要时创建）历史库
+
+        参数:
+            路径: 数据库文件，默认为 默认历史路径()；":memory:" 为内存数据库
+            周数: 计数窗口，None表示沿用库中保存的值（新库为 默认周数）
+        """
+        self.路径 = 路径 or 默认历史路径()
+        if self.路径 != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.路径)), exist_ok=True)
+        self._连接 = sqlite3.connect(self.路径)
+        with self._连接:
+            self._连接.executescript(_建表语句)
+            # 第1版的库只是缺少种子记录和内容两张表，建表后即为第2版
+            self._连接.execute("INSERT OR REPLACE INTO 设置 VALUES ('版本', ?)", (str(数据库版本),))
+            self._连接.execute("INSERT OR IGNORE INTO 设置 VALUES ('周数', ?)", (str(默认周数),))
+        if 周数 is not None:
+            self.设置周数(周数)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *异常):
+        self.关闭()
+
+    def 关闭(self):
+        self._连接.close()
+
+    @property
+    def 周数(self):
+        """计数窗口：排计数和同桌计数只统计最近这么多次座位"""
+        return int(self._连接.execute("SELECT 值 FROM 设置 WHERE 键 = '周数'").fetchone()[0])
+
+    def 设置周数(self, 周数):
+        """修改计数窗口，只调整移入、移出窗口的座位的计数"""
+        if 周数 < 1:
+            raise ValueError("周数必须大于0")
+        with self._连接:
+            旧窗口 = self._窗口()
+            self._连接.execute("UPDATE 设置 SET 值 = ? WHERE 键 = '周数'", (str(周数),))
+            self._更新窗口(旧窗口)
+
+    def 记录(self, 分配结果, 布局, 日期=None, 种子记录=None, 学生名单=None, 求解内容=None):
+        """记录一次确定下来的座位
+
+        参数:
+            分配结果: {学生: (行, 列)}
+            布局: 座位布局，用于判断哪些座位相邻
+            日期: datetime.date或"YYYY-MM-DD"，默认为今天；同一天已有记录时替换
+            种子记录, 学生名单, 求解内容: 可选，分配结果由 种子安排.生成() 得到时一并保存，
+                之后可以 重现() 和 归档()
+
+        返回:
+            int: 该次座位的编号
+        """
+        日期 = _日期文本(日期)
+        with self._连接:
+            旧窗口 = self._窗口()
+            已有 = self._连接.execute("SELECT 编号 FROM 分配 WHERE 日期 = ?", (日期,)).fetchone()
+            if 已有:
+                旧窗口 = self._移除分配(已有[0], 旧窗口)
+            游标 = self._连接.execute(
+                "INSERT INTO 分配 (日期, 记录时间) VALUES (?, ?)",
+                (日期, datetime.datetime.now().isoformat(timespec="seconds")))
+            编号 = 游标.lastrowid
+            self._连接.executemany(
+                "INSERT INTO 座位记录 VALUES (?, ?, ?, ?, ?)",
+                [(编号, 学生, 日期, 行, 列) for 学生, (行, 列) in 分配结果.items()])
+            self._连接.executemany(
+                "INSERT INTO 同桌记录 VALUES (?, ?, ?)",
+                [(编号, 学生1, 学生2) for 学生1, 学生2 in 同桌对(分配结果, 布局)])
+            if 种子记录 is not None:
+                import 种子安排
+                名单 = list(dict.fromkeys(学生名单))
+                self._连接.executemany("INSERT OR IGNORE INTO 内容 VALUES (?, ?)", [
+                    (种子记录.名单哈希, 种子安排.规范文本(名单)),
+                    (种子记录.约束哈希, 种子安排.规范文本(求解内容))])
+                self._连接.execute("INSERT INTO 种子记录 VALUES (?, ?)", (编号, 种子记录.转为字节()))
+            self._更新窗口(旧窗口)
+        return 编号
+
+    def 删除(self, 日期):
+        """删除某一天的记录
+
+        返回:
+            bool: 该日期是否有记录
+        """
+        日期 = _日期文本(日期)
+        with self._连接:
+            已有 = self._连接.execute("SELECT 编号 FROM 分配 WHERE 日期 = ?", (日期,)).fetchone()
+            if not 已有:
+                return False
+            旧窗口 = self._移除分配(已有[0], self._窗口())
+            self._更新窗口(旧窗口)
+        return True
+
+    def 重现(self, 日期):
+        """按种子重新求解某一天的座位，已归档的座位也可以重现
+
+        返回:
+            座位分配表；该天没有记录或没有种子记录时返回None
+
+        异常:
+            ValueError: 保存的名单或求解内容与种子记录不一致
+        """
+        已有 = self._连接.execute("SELECT 编号 FROM 分配 WHERE 日期 = ?", (_日期文本(日期),)).fetchone()
+        if not 已有:
+            return None
+        展开结果 = self._展开(已有[0])
+        return 展开结果 and 展开结果[0]
+
+    def 归档(self):
+        """删除窗口以外、有种子记录的座位的逐人记录和同桌记录
+
+        返回:
+            int: 本次归档的座位数
+        """
+        with self._连接:
+            窗口 = self._窗口()
+            编号列表 = [行[0] for 行 in self._连接.execute(
+                "SELECT 分配编号 FROM 种子记录 WHERE EXISTS "
+                "(SELECT 1 FROM 座位记录 WHERE 座位记录.分配编号 = 种子记录.分配编号)")
+                      if 行[0] not in 窗口]
+            for 编号 in 编号列表:
+                for 表 in ("座位记录", "同桌记录"):
+                    self._连接.execute(f"DELETE FROM {表} WHERE 分配编号 = ?", (编号,))
+        return len(编号列表)
+
+    def 日期列表(self):
+        """返回所有记录的日期，最近的在前"""
+        return [行[0] for 行 in self._连接.execute("SELECT 日期 FROM 分配 ORDER BY 日期 DESC")]
+
+    def 学生历史(self, 学生, 数量=None):
+        """返回某名学生的历次座位 [(日期, 行, 列), ...]，最近的在前"""
+        return self._连接.execute(
+            "SELECT 日期, 行, 列 FROM 座位记录 WHERE 学生 = ? ORDER BY 日期 DESC LIMIT ?",
+            (学生, -1 if 数量 is None else 数量)).fetchall()
+
+    def 排次数(self):
+        """返回最近N次座位中每名学生坐每一排的次数 {学生: {排: 次数}}"""
+        结果 = {}
+        for 学生, 排, 次数 in self._连接.execute("SELECT 学生, 排, 次数 FROM 排计数"):
+            结果.setdefault(学生, {})[排] = 次数
+        return 结果
+
+    def 同桌次数(self):
+        """返回最近N次座位中每对学生相邻的次数 {(学生1, 学生2): 次数}"""
+        return {(学生1, 学生2): 次数 for 学生1, 学生2, 次数
+                in self._连接.execute("SELECT 学生1, 学生2, 次数 FROM 同桌计数")}
+
+    def 轮换约束(self, 排权重=1, 同桌权重=1):
+        """返回当前计数的快照，交给 引擎.分配座位(轮换=...)"""
+        return 轮换约束(self.排次数(), self.同桌次数(), 排权重, 同桌权重)
+
+    def _窗口(self):
+        """最近N次座位的编号集合"""
+        return {行[0] for 行 in self._连接.execute(
+            "SELECT 编号 FROM 分配 ORDER BY 日期 DESC LIMIT ?", (self.周数,))}
+
+    def _移除分配(self, 编号, 旧窗口):
+        """删除一次座位；它在窗口中时先减去它的计数，返回去掉它之后的旧窗口"""
+        if 编号 in 旧窗口:
+            self._调整计数(编号, -1)
+            旧窗口 = 旧窗口 - {编号}
+        for 表 in ("座位记录", "同桌记录", "种子记录"):
+            self._连接.execute(f"DELETE FROM {表} WHERE 分配编号 = ?", (编号,))
+        self._连接.execute("DELETE FROM 分配 WHERE 编号 = ?", (编号,))
+        return 旧窗口
+
+    def _更新窗口(self, 旧窗口):
+        """窗口变化后，减去移出窗口的座位的计数，加上移入窗口的座位的计数"""
+        新窗口 = self._窗口()
+        for 编号 in 旧窗口 - 新窗口:
+            self._调整计数(编号, -1)
+        for 编号 in 新窗口 - 旧窗口:
+            self._恢复归档(编号)
+            self._调整计数(编号, 1)
+
+    def _展开(self, 编号):
+        """按种子记录重新求解一次座位
+
+        返回:
+            tuple: (分配结果, 布局)；没有种子记录时返回None
+        """
+        行 = self._连接.execute("SELECT 记录 FROM 种子记录 WHERE 分配编号 = ?", (编号,)).fetchone()
+        if not 行:
+            return None
+        import 种子安排
+        from 座位布局 import 座位布局
+        记录 = 种子安排.种子安排.从字节(行[0])
+        内容 = {}
+        for 哈希, 数据 in self._连接.execute(
+                "SELECT 哈希, 数据 FROM 内容 WHERE 哈希 IN (?, ?)", (记录.名单哈希, 记录.约束哈希)):
+            内容[哈希] = json.loads(数据)
+        if 记录.名单哈希 not in 内容 or 记录.约束哈希 not in 内容:
+            raise ValueError("种子记录对应的名单或求解内容已丢失，无法重现")
+        求解内容 = 内容[记录.约束哈希]
+        布局 = 座位布局.从配置创建(求解内容["座位布局"])
+        return 种子安排.展开(记录, 内容[记录.名单哈希], 求解内容, 布局), 布局
+
+    def _恢复归档(self, 编号):
+        """已归档的座位回到窗口时，按种子重新写入逐人记录和同桌记录"""
+        if self._连接.execute("SELECT 1 FROM 座位记录 WHERE 分配编号 = ? LIMIT 1", (编号,)).fetchone():
+            return
+        展开结果 = self._展开(编号)
+        if 展开结果 is None:
+            return
+        分配结果, 布局 = 展开结果
+        日期 = self._连接.execute("SELECT 日期 FROM 分配 WHERE 编号 = ?", (编号,)).fetchone()[0]
+        self._连接.executemany(
+            "INSERT INTO 座位记录 VALUES (?, ?, ?, ?, ?)",
+            [(编号, 学生, 日期, 行, 列) for 学生, (行, 列) in 分配结果.items()])
+        self._连接.executemany(
+            "INSERT INTO 同桌记录 VALUES (?, ?, ?)",
+            [(编号, 学生1, 学生2) for 学生1, 学生2 in 同桌对(分配结果, 布局)])
+
+    def _调整计数(self, 编号, 增量):
+        """把一次座位的排和同桌计入（增量为1）或移出（增量为-1）计数表"""
+        self._连接.execute(
+            "INSERT INTO 排计数 SELECT 学生, 行, ? FROM 座位记录 WHERE 分配编号 = ? "
+            "ON CONFLICT (学生, 排) DO UPDATE SET 次数 = 次数 + excluded.次数", (增量, 编号))
+        self._连接.execute(
+            "INSERT INTO 同桌计数 SELECT 学生1, 学生2, ? FROM 同桌记录 WHERE 分配编号 = ? "
+            "ON CONFLICT (学生1, 学生2) DO UPDATE SET 次数 = 次数 + excluded.次数", (增量, 编号))
+        if 增量 < 0:
+            self._连接.execute("DELETE FROM 排计数 WHERE 次数 <= 0")
+            self._连接.execute("DELETE FROM 同桌计数 WHERE 次数 <= 0")
+
+
+def _日期文本(日期):
+    if 日期 is None:
+        日期 = datetime.date.today()
+    if isinstance(日期, datetime.date):
+        return 日期.isoformat()
+    return datetime.date.fromisoformat(str(日期)).isoformat()
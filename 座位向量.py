@@ -0,0 +1,240 @@
+"""用整数编号表示学生名单和座位安排
+
+座位分配表 为每名学生保存两个字典项和一个 (行, 列) 元组，每人要占一两百字节。
+候选方案、多考场结果这类需要同时保存很多个安排的地方改用整数表示：
+- 名单索引: 学生姓名 <-> 编号（在名单中的下标），同一名单的所有安排共用一份
+- 座位向量: 第i个元素是编号为i的学生在 布局.座位列表 中的座位下标，没有座位为-1；
+  底层是 array 或 NumPy 一维数组（如候选方案数组中的一行），每人只占2或4字节
+
+座位向量 与 座位分配表 提供相同的映射接口（items()、座位上的学生()、互换() 等），
+界面和导出直接使用，不复制底层数组；按座位查学生的反向表在第一次用到时才建立。
+"""
+from array import array
+from collections.abc import ItemsView, Mapping
+
+from 座位分配表 import 座位分配表
+
+空 = -1  # 没有座位的学生在座位向量中的值
+
+
+def 下标类型(数量):
+    """能存放 -1 到 数量-1 的最小 array 类型码"""
+    return "h" if 数量 <= 0x7FFF else "i"
+
+
+class 名单索引:
+    """学生姓名与整数编号的双向对照
+
+    编号就是学生在（去重后的）名单中的下标，保存编号时用无符号16位或32位整数。
+    """
+    __slots__ = ("姓名", "编号")
+
+    def __init__(self, 学生名单=()):
+        self.姓名 = list(dict.fromkeys(学生名单))
+        self.编号 = {学生: 编号 for 编号, 学生 in enumerate(self.姓名)}
+
+    def __len__(self):
+        return len(self.姓名)
+
+    def __contains__(self, 学生):
+        return 学生 in self.编号
+
+    def __iter__(self):
+        return iter(self.姓名)
+
+    def __getstate__(self):
+        # 只序列化姓名列表，字典在另一端重建
+        return self.姓名
+
+    def __setstate__(self, 姓名):
+        self.姓名 = 姓名
+        self.编号 = {学生: 编号 for 编号, 学生 in enumerate(姓名)}
+
+    @property
+    def 类型码(self):
+        """保存编号用的 array 类型码"""
+        return "H" if len(self.姓名) <= 0xFFFF else "I"
+
+    def 编号数组(self, 学生列表):
+        """把学生姓名列表转换为编号数组
+
+        异常:
+            KeyError: 学生不在名单中
+        """
+        return array(self.类型码, [self.编号[学生] for 学生 in 学生列表])
+
+
+class 座位向量(Mapping):
+    """以座位下标数组保存的座位安排，对外表现为 {学生: (行, 列)} 映射
+
+    互换()、放置()、移除() 直接修改底层数组（对候选方案的一行就是修改该方案），
+    只能用于名单中的学生；需要加入新学生时先用 转为分配表() 转换。
+    """
+    __slots__ = ("名单", "布局", "座位", "_座位学生", "_人数")
+
+    def __init__(self, 名单, 布局, 座位):
+        """
+        参数:
+            名单: 名单索引
+            布局: 座位布局
+            座位: 长度与名单相同的整数序列（array 或 NumPy 一维数组），不复制
+
+        异常:
+            ValueError: 座位序列长度与名单不一致
+        """
+        if len(座位) != len(名单):
+            raise ValueError(f"座位向量长度({len(座位)})与名单人数({len(名单)})不一致")
+        self.名单 = 名单
+        self.布局 = 布局
+        self.座位 = 座位
+        self._座位学生 = None  # 座位下标 -> 学生编号，第一次按座位查学生时建立
+        self._人数 = None
+
+    @classmethod
+    def 从分配表(cls, 分配结果, 布局, 名单=None):
+        """把 {学生: (行, 列)} 形式的分配结果转换为座位向量
+
+        参数:
+            名单: 名单索引，默认按分配结果中的学生建立
+
+        异常:
+            KeyError: 分配结果中有学生不在名单中
+        """
+        if 名单 is None:
+            名单 = 名单索引(分配结果)
+        座位 = array(下标类型(布局.座位数), [空]) * len(名单)
+        编号 = 名单.编号
+        for 学生, (行, 列) in 分配结果.items():
+            座位[编号[学生]] = 布局.序号(行, 列)
+        return cls(名单, 布局, 座位)
+
+    def __getstate__(self):
+        return self.名单, self.布局, self.座位
+
+    def __setstate__(self, 状态):
+        self.名单, self.布局, self.座位 = 状态
+        self._座位学生 = None
+        self._人数 = None
+
+    def _下标列表(self):
+        """底层数组的Python整数列表，逐个遍历NumPy数组元素比转换一次慢得多"""
+        return self.座位.tolist()
+
+    def __getitem__(self, 学生):
+        序号 = self.座位[self.名单.编号[学生]]
+        if 序号 < 0:
+            raise KeyError(学生)
+        return self.布局.座位列表[序号]
+
+    def __iter__(self):
+        姓名 = self.名单.姓名
+        return (姓名[编号] for 编号, 序号 in enumerate(self._下标列表()) if 序号 >= 0)
+
+    def __len__(self):
+        if self._人数 is None:
+            self._人数 = sum(序号 >= 0 for 序号 in self._下标列表())
+        return self._人数
+
+    def __contains__(self, 学生):
+        编号 = self.名单.编号.get(学生)
+        return 编号 is not None and self.座位[编号] >= 0
+
+    def __repr__(self):
+        return f"座位向量({len(self)}/{len(self.名单)}名学生, {self.占用字节数}字节)"
+
+    def items(self):
+        return _座位项(self)
+
+    @property
+    def 占用字节数(self):
+        """底层数组占用的字节数（不含共用的名单和布局）"""
+        return self.座位.itemsize * len(self.座位)
+
+    def _反向表(self):
+        if self._座位学生 is None:
+            反向 = array(下标类型(len(self.名单)), [空]) * self.布局.座位数
+            for 编号, 序号 in enumerate(self._下标列表()):
+                if 序号 >= 0:
+                    反向[序号] = 编号
+            self._座位学生 = 反向
+        return self._座位学生
+
+    def _座位序号(self, 座位):
+        """座位在座位列表中的下标，不是座位返回-1"""
+        行, 列 = 座位
+        布局 = self.布局
+        if not (0 <= 行 < 布局.行数 and 0 <= 列 < 布局.列数):
+            return 空
+        return 布局.序号(行, 列)
+
+    def 座位上的学生(self, 座位):
+        """返回坐在指定座位上的学生，空座位返回None"""
+        序号 = self._座位序号(座位)
+        if 序号 < 0:
+            return None
+        编号 = self._反向表()[序号]
+        return None if 编号 < 0 else self.名单.姓名[编号]
+
+    def 放置(self, 学生, 座位):
+        """把名单中的学生放到空座位上，学生原来的座位会被释放
+
+        异常:
+            KeyError: 学生不在名单中
+            ValueError: 座位不存在或已被其他学生占用
+        """
+        编号 = self.名单.编号[学生]
+        序号 = self._座位序号(座位)
+        if 序号 < 0:
+            raise ValueError(f"{tuple(座位)}不是座位")
+        占用者 = self.座位上的学生(座位)
+        if 占用者 is not None and 占用者 != 学生:
+            raise ValueError(f"座位{tuple(座位)}已被{占用者}占用")
+        反向 = self._反向表()
+        原序号 = int(self.座位[编号])
+        if 原序号 >= 0:
+            反向[原序号] = 空
+        elif self._人数 is not None:
+            self._人数 += 1
+        self.座位[编号] = 序号
+        反向[序号] = 编号
+
+    def 移除(self, 学生):
+        """让学生离开座位，返回其原来的座位"""
+        座位 = self[学生]
+        编号 = self.名单.编号[学生]
+        self._反向表()[self.座位[编号]] = 空
+        self.座位[编号] = 空
+        if self._人数 is not None:
+            self._人数 -= 1
+        return 座位
+
+    def 互换(self, 学生1, 学生2):
+        """交换两名学生的座位
+
+        返回:
+            tuple: (学生1的新座位, 学生2的新座位)
+        """
+        座位1, 座位2 = self[学生1], self[学生2]
+        编号1, 编号2 = self.名单.编号[学生1], self.名单.编号[学生2]
+        序号1, 序号2 = int(self.座位[编号1]), int(self.座位[编号2])
+        self.座位[编号1], self.座位[编号2] = 序号2, 序号1
+        if self._座位学生 is not None:
+            self._座位学生[序号1], self._座位学生[序号2] = 编号2, 编号1
+        return 座位2, 座位1
+
+    def 转为分配表(self):
+        """复制为可以加入新学生的 座位分配表"""
+        return 座位分配表(self)
+
+
+class _座位项(ItemsView):
+    """直接遍历座位数组的 items() 视图，不逐个调用 __getitem__"""
+    __slots__ = ()
+
+    def __iter__(self):
+        向量 = self._mapping
+        姓名 = 向量.名单.姓名
+        座位列表 = 向量.布局.座位列表
+        for 编号, 序号 in enumerate(向量._下标列表()):
+            if 序号 >= 0:
+                yield 姓名[编号], 座位列表[序号]
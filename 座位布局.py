@@ -0,0 +1,189 @@
+"""教室座位布局
+
+从 配置.json 的 "座位布局" 项读取教室形状（行数、列数、空位、过道、讲台位置），
+一次性编译成：
+- 掩码: bytearray，按 行*列数+列 存放，1表示该格是座位
+- 座位序号: array，按同样方式存放每格的座位序号，非座位为-1
+- 座位列表: 按行优先顺序排列的座位坐标 [(行, 列), ...]
+- 邻座掩码(): 每个座位周围8格中座位的位掩码（Python整数，第k位为座位序号k），第一次使用时计算
+
+分配引擎、界面和Excel导出共用同一个布局对象，不再在各处重复判断哪些格子没有座位。
+
+配置示例（即默认教室：6列，左右两列各5人，中间4列各6人）:
+    "座位布局": {
+        "行数": 6,
+        "列数": 6,
+        "空位": [[5, 0], [5, 5]],
+        "过道列": [],
+        "讲台": {"起始列": 2, "列数": 2}
+    }
+"""
+import json
+import os
+from array import array
+
+默认布局配置 = {
+    "行数": 6,
+    "列数": 6,
+    "空位": [[5, 0], [5, 5]],
+    "过道列": [],
+    "讲台": {"起始列": 2, "列数": 2},
+}
+
+
+class 座位布局:
+    """编译后的教室座位布局
+
+    属性:
+    - 行数, 列数: 网格大小
+    - 过道列: 整列没有座位、界面上显示为过道的列
+    - 讲台起始列, 讲台列数: 讲台在网格上方所占的列
+    - 掩码, 座位序号, 座位列表: 见模块说明
+    - 排号列表, 排容量: 有座位的排及每排座位数（供分配引擎使用）
+
+    位掩码中第k位对应座位序号k（即 座位列表[k]），判断相邻、求空座位等都是整数位运算。
+    """
+    def __init__(self, 行数, 列数, 空位=(), 过道列=(), 讲台起始列=None, 讲台列数=2):
+        """编译座位布局
+
+        参数:
+            行数, 列数: 网格大小
+            空位: 没有座位的格子 [(行, 列), ...]
+            过道列: 整列没有座位的列号
+            讲台起始列: 讲台所在起始列，默认居中
+            讲台列数: 讲台宽度（列）
+
+        异常:
+            ValueError: 参数超出网格范围
+        """
+        if 行数 <= 0 or 列数 <= 0:
+            raise ValueError("行数和列数必须大于0")
+        self.行数 = 行数
+        self.列数 = 列数
+        self.过道列 = sorted(set(过道列))
+        self.讲台列数 = min(讲台列数, 列数)
+        self.讲台起始列 = (列数 - self.讲台列数) // 2 if 讲台起始列 is None else 讲台起始列
+        if not 0 <= self.讲台起始列 <= 列数 - self.讲台列数:
+            raise ValueError(f"讲台位置超出范围: 起始列{self.讲台起始列}")
+
+        # 编译掩码 - 之后判断某格是否为座位只需一次下标访问
+        self.掩码 = bytearray([1]) * (行数 * 列数)
+        for 列 in self.过道列:
+            if not 0 <= 列 < 列数:
+                raise ValueError(f"过道列超出范围: {列}")
+            for 行 in range(行数):
+                self.掩码[行 * 列数 + 列] = 0
+        for 行, 列 in 空位:
+            if not (0 <= 行 < 行数 and 0 <= 列 < 列数):
+                raise ValueError(f"空位超出范围: ({行}, {列})")
+            self.掩码[行 * 列数 + 列] = 0
+
+        self.座位序号 = array("i", [-1]) * (行数 * 列数)
+        self.座位列表 = []
+        self.排号列表 = []
+        self.排容量 = []
+        for 行 in range(行数):
+            本排座位数 = 0
+            for 列 in range(列数):
+                格 = 行 * 列数 + 列
+                if self.掩码[格]:
+                    self.座位序号[格] = len(self.座位列表)
+                    self.座位列表.append((行, 列))
+                    本排座位数 += 1
+            if 本排座位数:
+                self.排号列表.append(行)
+                self.排容量.append(本排座位数)
+
+        self._邻座掩码 = None  # 第一次调用 邻座掩码() 时计算
+
+    @property
+    def 座位数(self):
+        return len(self.座位列表)
+
+    def 是座位(self, 行, 列):
+        """判断某格是否为座位"""
+        return bool(self.掩码[行 * self.列数 + 列])
+
+    def 序号(self, 行, 列):
+        """返回某格的座位序号，非座位返回-1"""
+        return self.座位序号[行 * self.列数 + 列]
+
+    def 邻座掩码(self):
+        """返回每个座位前后左右及斜对角相邻座位的位掩码列表（按座位序号）
+
+        中间隔着过道或空位的座位不相邻。结果在第一次调用时计算并保存在布局对象中。
+        """
+        掩码列表 = self._邻座掩码
+        if 掩码列表 is None:
+            掩码列表 = []
+            for 行, 列 in self.座位列表:
+                掩码 = 0
+                for 邻行 in (行 - 1, 行, 行 + 1):
+                    for 邻列 in (列 - 1, 列, 列 + 1):
+                        if (邻行, 邻列) != (行, 列) and 0 <= 邻行 < self.行数 and 0 <= 邻列 < self.列数:
+                            序号 = self.座位序号[邻行 * self.列数 + 邻列]
+                            if 序号 >= 0:
+                                掩码 |= 1 << 序号
+                掩码列表.append(掩码)
+            self._邻座掩码 = 掩码列表
+        return 掩码列表
+
+    def 排掩码(self, 排):
+        """返回某一排全部座位的位掩码，没有座位的排为0"""
+        掩码 = 0
+        for 列 in range(self.列数):
+            序号 = self.座位序号[排 * self.列数 + 列] if 0 <= 排 < self.行数 else -1
+            if 序号 >= 0:
+                掩码 |= 1 << 序号
+        return 掩码
+
+    @classmethod
+    def 从配置创建(cls, 配置):
+        """从 "座位布局" 配置字典创建布局"""
+        讲台 = 配置.get("讲台", {})
+        return cls(
+            int(配置["行数"]),
+            int(配置["列数"]),
+            空位=[tuple(格) for 格 in 配置.get("空位", [])],
+            过道列=配置.get("过道列", []),
+            讲台起始列=讲台.get("起始列"),
+            讲台列数=讲台.get("列数", 2),
+        )
+
+    def 转为配置(self):
+        """返回与 从配置创建() 对应的 "座位布局" 配置字典"""
+        过道列 = set(self.过道列)
+        return {
+            "行数": self.行数,
+            "列数": self.列数,
+            "空位": [[行, 列] for 行 in range(self.行数) for 列 in range(self.列数)
+                   if not self.掩码[行 * self.列数 + 列] and 列 not in 过道列],
+            "过道列": list(self.过道列),
+            "讲台": {"起始列": self.讲台起始列, "列数": self.讲台列数},
+        }
+
+    @classmethod
+    def 从文件加载(cls, 路径):
+        """从配置文件的 "座位布局" 项加载布局，文件或该项不存在时使用默认布局
+
+        异常:
+            ValueError: 布局配置不合法
+        """
+        if not os.path.exists(路径):
+            return 默认布局()
+        with open(路径, "r", encoding="utf-8") as f:
+            配置 = json.load(f)
+        return cls.从配置创建(配置.get("座位布局", 默认布局配置))
+
+    @classmethod
+    def 网格(cls, 座位数):
+        """生成容纳指定座位数、接近正方形的无空位网格布局（用于批量测试）"""
+        列数 = max(1, int(座位数 ** 0.5))
+        行数 = -(-座位数 // 列数)
+        末排空位 = [(行数 - 1, 列) for 列 in range(座位数 - (行数 - 1) * 列数, 列数)]
+        return cls(行数, 列数, 空位=末排空位)
+
+
+def 默认布局():
+    """返回默认教室布局"""
+    return 座位布局.从配置创建(默认布局配置)
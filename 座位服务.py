@@ -0,0 +1,469 @@
+"""本机HTTP/JSON座位分配服务
+
+把分配、检查和导出通过一个很小的HTTP接口提供给其他程序（如教务系统、批量脚本），
+只依赖标准库，默认只监听 127.0.0.1。
+
+接口（请求为UTF-8 JSON，除导出外响应也是JSON）:
+    GET  /health     服务状态、请求数和处理该请求的工作进程的缓存命中情况
+    POST /validate   检查指定排数安排能否满足、成对约束格式是否正确，返回 {"可行", "错误"}
+    POST /allocate   分配座位，返回 {"座位": {学生: [行, 列]}, "种子", "种子记录", "耗时"}
+    POST /export     返回xlsx座位表；请求中没有 "座位" 时先分配
+
+请求内容:
+    {
+        "学生名单": [...],                 # 与 学生名单.json 相同，可以是带属性的对象
+        "座位布局": {...},                 # 可选，与 配置.json 的 "座位布局" 相同，默认为默认教室
+        "指定排数安排": {学生: [排, ...]},  # 可选
+        "成对约束": [...],                 # 可选，与 特殊安排.json 相同
+        "分组依据": ["班级"],              # 可选，给出时按考试模式分配（不使用成对约束）
+        "种子": 123,                      # 可选，相同请求和种子得到相同座位，见 种子安排
+        "座位": {学生: [行, 列]},           # /export 可选，直接导出给定的座位
+        "房间名": "301"                    # /export 可选，工作表名称
+    }
+出错时返回 {"错误": 说明}：请求格式错误（包括座位布局超过 最大格数）为400，特殊安排无法满足为422，
+未知路径为404，工作池不可用为503。
+
+实现:
+- ThreadingHTTPServer 为每个连接开一个线程，连接线程只读写数据；解析JSON、分配、检查和
+  写Excel都交给工作池，默认为进程池（CPU密集的求解可以用满多个核），--threads 时为线程池
+- 每个工作进程有自己的LRU缓存，按内容哈希保存编译好的座位布局和整理好的求解内容，
+  以及检查特殊安排的结果：同一个班反复请求时不再编译布局、解析约束，已知无法满足的请求直接返回422
+- 导出在工作进程中写入临时文件，连接线程按块读出发回后删除，不把整个文件读入内存
+- 工作进程异常退出（如内存不足被系统结束）后进程池不能再用，这时重建进程池并重试一次
+
+命令行用法:
+    python 座位服务.py [--host 127.0.0.1] [--port 8765] [--workers 进程数] [--threads] [--cache 256]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+import 座位分配引擎 as 引擎
+import 座位约束
+import 种子安排
+from 座位分配表 import 座位分配表
+from 座位布局 import 座位布局, 默认布局配置
+
+日志 = logging.getLogger("座位分配.服务")
+
+默认端口 = 8765
+默认缓存容量 = 256
+最大请求字节数 = 16 * 1024 * 1024
+最大格数 = 1000 * 1000  # 座位布局的 行数×列数 上限，避免一个请求耗尽工作进程的内存
+读取块大小 = 64 * 1024
+Excel类型 = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class LRU缓存:
+    """线程安全的最近最少使用缓存，记录命中和未命中次数"""
+    def __init__(self, 容量=默认缓存容量):
+        self.容量 = 容量
+        self.命中 = 0
+        self.未命中 = 0
+        self._数据 = OrderedDict()
+        self._锁 = threading.Lock()
+
+    def __len__(self):
+        return len(self._数据)
+
+    def 获取(self, 键, 计算):
+        """返回键对应的值，不存在时调用 计算() 并保存
+
+        计算在锁外进行，多个线程同时未命中同一个键时可能各算一次，结果相同。
+        计算抛出异常时不保存。
+        """
+        with self._锁:
+            if 键 in self._数据:
+                self._数据.move_to_end(键)
+                self.命中 += 1
+                return self._数据[键]
+            self.未命中 += 1
+        值 = 计算()
+        with self._锁:
+            self._数据[键] = 值
+            self._数据.move_to_end(键)
+            while len(self._数据) > self.容量:
+                self._数据.popitem(last=False)
+        return 值
+
+    def 统计(self):
+        return {"条数": len(self._数据), "容量": self.容量, "命中": self.命中, "未命中": self.未命中}
+
+
+# 每个工作进程（线程池时为整个服务）各有一份，由 _初始化工作进程() 设置容量
+_布局缓存 = LRU缓存()
+_内容缓存 = LRU缓存()
+_检查缓存 = LRU缓存()
+
+
+def _初始化工作进程(缓存容量):
+    global _布局缓存, _内容缓存, _检查缓存
+    _布局缓存 = LRU缓存(缓存容量)
+    _内容缓存 = LRU缓存(缓存容量)
+    _检查缓存 = LRU缓存(缓存容量)
+
+
+def _缓存统计():
+    return {"座位布局": _布局缓存.统计(), "求解内容": _内容缓存.统计(), "检查结果": _检查缓存.统计()}
+
+
+def _编译布局(配置):
+    """按配置取编译好的座位布局，相同配置只编译一次
+
+    异常:
+        ValueError: 布局配置不合法或超过 最大格数
+    """
+    if not isinstance(配置, dict):
+        raise ValueError("座位布局必须是对象")
+    行数, 列数 = int(配置["行数"]), int(配置["列数"])
+    if not (0 < 行数 and 0 < 列数 and 行数 * 列数 <= 最大格数):
+        raise ValueError(f"座位布局的行数和列数必须为正，且行数×列数不超过{最大格数}")
+    return _布局缓存.获取(种子安排.内容哈希(配置), lambda: 座位布局.从配置创建(配置))
+
+
+def _整理输入(请求):
+    """把请求整理为 (学生名单, 布局, 求解内容)
+
+    异常:
+        ValueError, KeyError, TypeError: 请求格式错误
+    """
+    学生名单, 学生属性 = 引擎.整理学生名单(请求.get("学生名单"))
+    if not all(isinstance(学生, str) and 学生 for 学生 in 学生名单):
+        raise ValueError("学生姓名必须是非空文本")
+    布局配置 = 请求.get("座位布局") or 默认布局配置
+    布局 = _编译布局(布局配置)
+    指定排数安排 = 请求.get("指定排数安排") or {}
+    成对约束 = 请求.get("成对约束") or []
+    分组依据 = 请求.get("分组依据")
+    if not isinstance(指定排数安排, dict) or not all(isinstance(排数列表, list) for 排数列表 in 指定排数安排.values()):
+        raise ValueError("指定排数安排必须是 {学生: [排, ...]}")
+    if 分组依据 is not None and not isinstance(分组依据, list):
+        raise ValueError("分组依据必须是属性名列表")
+
+    原始内容 = [布局配置, 指定排数安排, 成对约束, 分组依据, 学生属性 if 分组依据 is not None else None]
+    内容 = _内容缓存.获取(种子安排.内容哈希(原始内容), lambda: 种子安排.求解内容(
+        布局, 指定排数安排, 座位约束.解析成对约束(成对约束), 学生属性=学生属性, 分组依据=分组依据))
+    return 学生名单, 布局, 内容
+
+
+def _检查(学生名单, 布局, 内容):
+    """检查指定排数安排能否满足，结果按名单和求解内容缓存
+
+    返回:
+        tuple: (可行, 错误信息)
+    """
+    键 = (种子安排.内容哈希(学生名单), 种子安排.内容哈希(内容))
+    return _检查缓存.获取(键, lambda: 引擎.验证特殊安排(学生名单, 布局, 内容["指定排数安排"]))
+
+
+def _分配(请求, 学生名单, 布局, 内容):
+    """按请求分配座位，已知无法满足时不再求解
+
+    返回:
+        tuple: (分配结果, 种子安排, 耗时)
+    """
+    可行, 错误信息 = _检查(学生名单, 布局, 内容)
+    if not 可行:
+        raise 引擎.分配失败错误(错误信息)
+    种子 = 请求.get("种子")
+    if 种子 is not None and (isinstance(种子, bool) or not isinstance(种子, int) or not 0 <= 种子 < 2 ** 32):
+        raise ValueError("种子必须是0到2^32-1之间的整数")
+    开始时间 = time.perf_counter()
+    分配结果, 记录 = 种子安排.生成(学生名单, 布局, 内容, 种子)
+    return 分配结果, 记录, time.perf_counter() - 开始时间
+
+
+def _接口检查(请求):
+    学生名单, 布局, 内容 = _整理输入(请求)
+    可行, 错误信息 = _检查(学生名单, 布局, 内容)
+    return {"可行": 可行, "错误": 错误信息}
+
+
+def _接口分配(请求):
+    学生名单, 布局, 内容 = _整理输入(请求)
+    分配结果, 记录, 耗时 = _分配(请求, 学生名单, 布局, 内容)
+    return {"座位": {学生: list(座位) for 学生, 座位 in 分配结果.items()},
+            "种子": 记录.种子, "种子记录": 记录.转为字典(), "耗时": 耗时}
+
+
+def _读取座位(数据, 布局):
+    """把请求中的 {学生: [行, 列]} 整理为座位分配表
+
+    异常:
+        ValueError: 格式错误、不是座位或座位重复
+    """
+    if not isinstance(数据, dict):
+        raise ValueError("座位必须是 {学生: [行, 列]}")
+    分配结果 = 座位分配表()
+    for 学生, 座位 in 数据.items():
+        行, 列 = 座位
+        if not (isinstance(行, int) and isinstance(列, int)
+                and 0 <= 行 < 布局.行数 and 0 <= 列 < 布局.列数 and 布局.是座位(行, 列)):
+            raise ValueError(f"{学生}的座位{座位}不是座位")
+        分配结果.放置(学生, (行, 列))
+    return 分配结果
+
+
+def _接口导出(请求):
+    """写出xlsx临时文件，返回文件路径，由连接线程发回后删除"""
+    import 座位表导出  # openpyxl为可选依赖，只在导出时导入
+
+    if 请求.get("座位") is not None:
+        布局 = _编译布局(请求.get("座位布局") or 默认布局配置)
+        分配结果 = _读取座位(请求["座位"], 布局)
+    else:
+        学生名单, 布局, 内容 = _整理输入(请求)
+        分配结果, _, _ = _分配(请求, 学生名单, 布局, 内容)
+    房间名 = 请求.get("房间名")
+    if 房间名 is not None and not isinstance(房间名, str):
+        raise ValueError("房间名必须是文本")
+
+    描述符, 路径 = tempfile.mkstemp(prefix="座位表_", suffix=".xlsx")
+    os.close(描述符)
+    try:
+        座位表导出.导出座位表(路径, [(房间名, 布局, 分配结果)])
+    except BaseException:
+        os.remove(路径)
+        raise
+    return 路径
+
+
+_接口 = {"/validate": _接口检查, "/allocate": _接口分配, "/export": _接口导出}
+
+
+def _处理请求(路径, 正文):
+    """工作池中执行的请求处理，必须是模块级函数以便序列化
+
+    JSON的解析和编码也在工作池中进行，连接线程只传递字节。
+
+    返回:
+        tuple: (状态码, JSON字节)；/export 成功时为 (200, 临时文件路径)
+    """
+    try:
+        请求 = json.loads(正文)
+        if not isinstance(请求, dict):
+            raise ValueError("请求内容应为JSON对象")
+        结果 = _接口[路径](请求)
+    except 引擎.分配失败错误 as e:
+        return 422, _编码({"错误": str(e)})
+    except ImportError as e:
+        return 501, _编码({"错误": f"导出需要openpyxl: {e}"})
+    except (ValueError, KeyError, TypeError) as e:
+        return 400, _编码({"错误": f"请求格式错误: {e}"})
+    if isinstance(结果, str):
+        return 200, 结果
+    return 200, _编码(结果)
+
+
+def _编码(数据):
+    return json.dumps(数据, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _请求处理(BaseHTTPRequestHandler):
+    """连接线程中的HTTP处理，只负责收发，工作交给 self.server.工作池"""
+    protocol_version = "HTTP/1.1"  # 保持连接，客户端可以在一个连接上连续发送请求
+    server_version = "SeatService/1.0"
+    disable_nagle_algorithm = True  # 响应头和正文分两次写出，不关闭Nagle算法时每个请求会多等约40毫秒
+
+    def log_message(self, 格式, *参数):
+        日志.debug("%s - %s", self.address_string(), 格式 % 参数)
+
+    def _发送(self, 状态码, 正文, 类型="application/json; charset=utf-8"):
+        self.send_response(状态码)
+        self.send_header("Content-Type", 类型)
+        self.send_header("Content-Length", str(len(正文)))
+        self.end_headers()
+        self.wfile.write(正文)
+
+    def do_GET(self):
+        self.server.计数()
+        if self.path != "/health":
+            self._发送(404, _编码({"错误": f"未知路径: {self.path}"}))
+            return
+        try:
+            状态 = self.server.状态()
+        except Exception as e:
+            日志.exception("读取服务状态失败")
+            状态 = {"状态": "异常", "错误": str(e)}
+        self._发送(200 if 状态["状态"] == "正常" else 503, _编码(状态))
+
+    def do_POST(self):
+        self.server.计数()
+        try:
+            长度 = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            长度 = -1
+        if not 0 <= 长度 <= 最大请求字节数:
+            self.close_connection = True
+            self._发送(413 if 长度 > 0 else 400, _编码({"错误": "请求长度不正确或过大"}))
+            return
+        正文 = self.rfile.read(长度)
+        if self.path not in _接口:
+            self._发送(404, _编码({"错误": f"未知路径: {self.path}"}))
+            return
+        try:
+            状态码, 结果 = self.server.执行(_处理请求, self.path, 正文)
+        except BrokenProcessPool as e:
+            日志.error("工作池不可用: %s", e)
+            self._发送(503, _编码({"错误": f"工作池不可用，请稍后重试: {e}"}))
+            return
+        except Exception as e:
+            日志.exception("处理请求失败: %s", self.path)
+            self._发送(500, _编码({"错误": f"服务内部错误: {e}"}))
+            return
+        if self.path == "/export" and 状态码 == 200:
+            self._发送文件(结果)
+        else:
+            self._发送(状态码, 结果)
+
+    def _发送文件(self, 路径):
+        """分块发回导出的临时文件，发完后删除"""
+        try:
+            with open(路径, "rb") as f:
+                self.send_response(200)
+                self.send_header("Content-Type", Excel类型)
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote('座位表.xlsx')}")
+                self.end_headers()
+                while 块 := f.read(读取块大小):
+                    self.wfile.write(块)
+        finally:
+            os.remove(路径)
+
+
+class 座位服务(ThreadingHTTPServer):
+    """座位分配HTTP服务
+
+    用法:
+        服务 = 座位服务(("127.0.0.1", 0), 工作数=4)
+        服务.后台运行()          # 或 服务.serve_forever()
+        print(服务.端口)
+        服务.停止()
+    """
+    daemon_threads = True
+    request_queue_size = 256  # 并发连接较多时，排队等待accept的连接数
+
+    def __init__(self, 地址=("127.0.0.1", 默认端口), 工作数=None, 使用线程=False, 缓存容量=默认缓存容量):
+        """
+        参数:
+            地址: (主机, 端口)，端口为0时自动选择
+            工作数: 工作池大小，默认为CPU核数
+            使用线程: 为True时用线程池代替进程池（求解受GIL限制，但没有进程启动和传输开销）
+            缓存容量: 每个工作进程中各LRU缓存的条数
+        """
+        super().__init__(地址, _请求处理)
+        self.工作数 = 工作数 or os.cpu_count() or 1
+        self.使用线程 = 使用线程
+        self.缓存容量 = 缓存容量
+        if 使用线程:
+            _初始化工作进程(缓存容量)
+            self.工作池 = ThreadPoolExecutor(max_workers=self.工作数)
+        else:
+            self.工作池 = self._创建进程池()
+        self.请求数 = 0
+        self.重建次数 = 0
+        self._锁 = threading.Lock()
+        self._工作池锁 = threading.Lock()
+        self._线程 = None
+
+    def _创建进程池(self):
+        return ProcessPoolExecutor(max_workers=self.工作数, initializer=_初始化工作进程,
+                                   initargs=(self.缓存容量,))
+
+    def 执行(self, 函数, *参数):
+        """在工作池中执行函数并等待结果
+
+        有工作进程异常退出时整个进程池不能再用：重建进程池后重试一次。
+        多个连接线程同时发现时只重建一次。
+
+        异常:
+            BrokenProcessPool: 重建后仍然失败
+        """
+        工作池 = self.工作池
+        try:
+            return 工作池.submit(函数, *参数).result()
+        except BrokenProcessPool:
+            日志.warning("工作进程异常退出，重建进程池")
+            with self._工作池锁:
+                if self.工作池 is 工作池:
+                    self.工作池 = self._创建进程池()
+                    self.重建次数 += 1
+                    工作池.shutdown(wait=False)
+            return self.工作池.submit(函数, *参数).result()
+
+    @property
+    def 端口(self):
+        return self.server_address[1]
+
+    def 计数(self):
+        with self._锁:
+            self.请求数 += 1
+
+    def 状态(self):
+        """服务状态；工作池不可用时 "状态" 为 "降级"，没有缓存统计"""
+        状态 = {"状态": "正常", "请求数": self.请求数, "工作数": self.工作数,
+              "工作池": "线程" if self.使用线程 else "进程"}
+        try:
+            状态["缓存"] = self.执行(_缓存统计)
+        except Exception as e:
+            状态.update({"状态": "降级", "错误": f"工作池不可用: {e}"})
+        状态["重建次数"] = self.重建次数  # 执行中可能刚刚重建过
+        return 状态
+
+    def 后台运行(self):
+        """在后台线程中处理请求（测试和嵌入其他程序时使用）"""
+        self._线程 = threading.Thread(target=self.serve_forever, name="座位服务", daemon=True)
+        self._线程.start()
+        return self._线程
+
+    def 停止(self):
+        """停止接受请求，关闭监听端口和工作池"""
+        if self._线程 is not None:
+            self.shutdown()
+            self._线程.join()
+            self._线程 = None
+        self.server_close()
+        self.工作池.shutdown()
+
+
+def 主程序(参数列表=None):
+    """命令行入口"""
+    解析器 = argparse.ArgumentParser(description="本机座位分配HTTP服务")
+    解析器.add_argument("--host", default="127.0.0.1", help="监听地址，默认只允许本机访问")
+    解析器.add_argument("--port", type=int, default=默认端口, help=f"监听端口，默认{默认端口}")
+    解析器.add_argument("--workers", type=int, default=None, help="工作进程数，默认为CPU核数")
+    解析器.add_argument("--threads", action="store_true", help="用线程池代替进程池")
+    解析器.add_argument("--cache", type=int, default=默认缓存容量, help="每个工作进程的缓存条数")
+    参数 = 解析器.parse_args(参数列表)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        服务 = 座位服务((参数.host, 参数.port), 参数.workers, 参数.threads, 参数.cache)
+    except OSError as e:
+        print(f"无法监听 {参数.host}:{参数.port}: {e}", file=sys.stderr)
+        return 1
+    print(f"座位分配服务已启动: http://{参数.host}:{服务.端口}（{服务.工作数}个工作"
+          f"{'线程' if 参数.threads else '进程'}），按Ctrl+C停止")
+    try:
+        服务.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        服务.停止()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 兼容PyInstaller打包后的多进程
+    sys.exit(主程序())
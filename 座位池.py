@@ -0,0 +1,78 @@
+"""按排索引的座位池
+
+分配过程中需要反复"随机取一个空座位"或"在某一排随机取一个空座位"。
+用列表的 remove() 删除座位需要线性扫描，这里改为：
+- 全部空座位放在一个列表中，另外按排各维护一个列表
+- 用字典记录每个座位在两个列表中的下标
+- 删除时把列表末尾的座位换到被删位置再弹出（交换删除），两个列表都是O(1)
+"""
+import random
+
+
+class 座位池:
+    """可按排随机抽取、O(1)删除的空座位集合
+
+    主要方法：
+    - 抽取(): 从全部空座位中随机取出一个
+    - 按排抽取(): 从指定排的空座位中随机取出一个
+    - 移除(): 删除指定座位
+    """
+    def __init__(self, 座位列表):
+        """初始化座位池
+
+        参数:
+            座位列表: 座位坐标列表 [(行, 列), ...]
+        """
+        self._全部 = list(座位列表)
+        self._位置 = {座位: 序号 for 序号, 座位 in enumerate(self._全部)}
+        self._按排 = {}
+        self._排内位置 = {}
+        for 座位 in self._全部:
+            排座位 = self._按排.setdefault(座位[0], [])
+            self._排内位置[座位] = len(排座位)
+            排座位.append(座位)
+
+    def __len__(self):
+        return len(self._全部)
+
+    def __contains__(self, 座位):
+        return 座位 in self._位置
+
+    def __iter__(self):
+        return iter(self._全部)
+
+    def 排剩余(self, 排):
+        """返回指定排剩余的空座位数"""
+        return len(self._按排.get(排, ()))
+
+    def 移除(self, 座位):
+        """从池中删除指定座位，O(1)"""
+        self._交换删除(self._全部, self._位置, 座位)
+        self._交换删除(self._按排[座位[0]], self._排内位置, 座位)
+
+    def 抽取(self, 随机源=random):
+        """从全部空座位中随机取出一个，O(1)"""
+        座位 = self._全部[随机源.randrange(len(self._全部))]
+        self.移除(座位)
+        return 座位
+
+    def 按排抽取(self, 排, 随机源=random):
+        """从指定排的空座位中随机取出一个，O(1)
+
+        异常:
+            IndexError: 该排没有空座位
+        """
+        排座位 = self._按排.get(排)
+        if not 排座位:
+            raise IndexError(f"第{排}排没有空座位")
+        座位 = 排座位[随机源.randrange(len(排座位))]
+        self.移除(座位)
+        return 座位
+
+    @staticmethod
+    def _交换删除(列表, 位置, 座位):
+        序号 = 位置.pop(座位)
+        末尾 = 列表.pop()
+        if 末尾 != 座位:
+            列表[序号] = 末尾
+            位置[末尾] = 序号
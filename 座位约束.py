@@ -0,0 +1,246 @@
+"""成对座位约束与局部搜索
+
+指定排数安排只能表达"某名学生坐某几排"。这里增加带权重的成对约束：
+- 同桌: 两名学生应当左右相邻，不相邻时罚分
+- 分开: 两名学生不能挨着（前后左右及斜对角），挨着时罚分
+- 分散: 一组学生（如个子高的学生）两两不能挨着，展开为组内每一对的"分开"约束
+
+特殊安排.json 中的格式:
+    "成对约束": [
+        {"类型": "分开", "学生": ["张三", "李四"], "权重": 5},
+        {"类型": "同桌", "学生": ["王五", "赵六"]},
+        {"类型": "分散", "学生": ["甲", "乙", "丙", "丁"], "权重": 2}
+    ]
+权重默认为1。相邻只看网格：中间隔着过道或空位的两个座位不算相邻。
+
+成对约束是软约束，用模拟退火从一次随机分配的结果出发优化：每一步随机选一名有约束的学生和一个座位，
+座位上有人则两人交换，空座位则移过去；指定排数仍是硬约束，违反的移动直接跳过。
+一次移动只影响两名学生，罚分变化只需计算这两人的约束，与约束总数和座位数无关。
+轮换约束（座位历史）中坐过的排和以前的同桌也作为罚分项一起优化。
+"""
+import math
+
+import 运行指标
+from 后台任务 import 检查取消
+
+同桌 = "同桌"
+分开 = "分开"
+分散 = "分散"
+约束类型 = (同桌, 分开, 分散)
+
+# 编译后的关系类型：违反条件分别为 不左右相邻、周围8格内、左右相邻
+_需同桌, _需分开, _不同桌 = 0, 1, 2
+
+进度报告间隔 = 4096  # 每隔多少步报告一次进度、检查取消并保存最好的结果
+降温间隔 = 256  # 每隔多少步更新一次温度
+
+
+def 解析成对约束(数据):
+    """把特殊安排.json中的成对约束列表整理为 [(类型, 学生1, 学生2, 权重), ...]
+
+    分散约束展开为组内每一对的分开约束。
+
+    异常:
+        ValueError: 类型未知、学生数不对或权重不是正数
+    """
+    约束列表 = []
+    for 序号, 项 in enumerate(数据 or [], 1):
+        if not isinstance(项, dict):
+            raise ValueError(f"第{序号}条成对约束格式错误")
+        类型 = 项.get("类型")
+        学生 = 项.get("学生")
+        权重 = 项.get("权重", 1)
+        if 类型 not in 约束类型:
+            raise ValueError(f"第{序号}条成对约束类型未知: {类型}（应为{'、'.join(约束类型)}）")
+        if not isinstance(学生, list) or len(set(学生)) < 2 or (类型 != 分散 and len(学生) != 2):
+            raise ValueError(f"第{序号}条成对约束的学生数不对: {学生}")
+        if isinstance(权重, bool) or not isinstance(权重, (int, float)) or 权重 <= 0:
+            raise ValueError(f"第{序号}条成对约束的权重必须是正数: {权重}")
+        if 类型 == 分散:
+            组 = list(dict.fromkeys(学生))
+            约束列表 += [(分开, 组[i], 组[j], 权重) for i in range(len(组)) for j in range(i + 1, len(组))]
+        else:
+            约束列表.append((类型, 学生[0], 学生[1], 权重))
+    return 约束列表
+
+
+def 违反(类型, 座位1, 座位2):
+    """判断两个座位上的学生是否违反一条成对约束"""
+    行差 = 座位1[0] - 座位2[0]
+    列差 = 座位1[1] - 座位2[1]
+    if 类型 == 同桌:
+        return 行差 != 0 or abs(列差) != 1
+    return -1 <= 行差 <= 1 and -1 <= 列差 <= 1
+
+
+def 计算罚分(分配结果, 约束列表):
+    """计算分配结果的成对约束罚分
+
+    返回:
+        tuple: (总罚分, 违反的约束列表)，不在分配结果中的学生的约束忽略
+    """
+    违反列表 = [(类型, 学生1, 学生2, 权重) for 类型, 学生1, 学生2, 权重 in 约束列表
+             if 学生1 in 分配结果 and 学生2 in 分配结果 and 学生1 != 学生2
+             and 违反(类型, 分配结果[学生1], 分配结果[学生2])]
+    return sum(约束[3] for 约束 in 违反列表), 违反列表
+
+
+def 优化(分配结果, 布局, 成对约束=None, 指定排数安排=None, 轮换=None, 随机源=None, 步数=None,
+       进度回调=None, 取消事件=None):
+    """用模拟退火减少成对约束和轮换约束的罚分
+
+    参数:
+        分配结果: 满足指定排数安排的初始分配（通常是 引擎.分配座位() 的结果）
+        布局: 座位布局
+        成对约束: 解析成对约束() 的结果
+        指定排数安排: {学生: 排数列表}，优化过程中始终满足
+        轮换: 可选，座位历史.轮换约束 对象，坐过的排和以前的同桌计入罚分
+        随机源: random.Random实例或random模块
+        步数: 最多尝试的移动次数，默认随座位数和约束数增长；罚分降到0时提前结束
+        进度回调: 可选，进度回调(说明, 完成, 总数)
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+
+    返回:
+        tuple: (新的座位分配表, 总罚分)
+    """
+    import random
+    from 座位分配表 import 座位分配表
+
+    随机源 = 随机源 or random
+    成对约束 = 成对约束 or []
+    指定排数安排 = 指定排数安排 or {}
+    学生列表 = list(分配结果)
+    编号 = {学生: i for i, 学生 in enumerate(学生列表)}
+    座位列表 = 布局.座位列表
+    座位数 = len(座位列表)
+    行 = [座位[0] for 座位 in 座位列表]
+    列 = [座位[1] for 座位 in 座位列表]
+    位置 = [布局.序号(*分配结果[学生]) for 学生 in 学生列表]
+    占用 = [-1] * 座位数
+    for i, p in enumerate(位置):
+        占用[p] = i
+
+    # 每名学生的关系列表 [(另一名学生, 关系类型, 权重), ...] 和坐各排的罚分
+    关系 = [[] for _ in 学生列表]
+
+    def 添加关系(学生1, 学生2, 类型, 权重):
+        i, j = 编号.get(学生1), 编号.get(学生2)
+        if i is not None and j is not None and i != j:
+            关系[i].append((j, 类型, 权重))
+            关系[j].append((i, 类型, 权重))
+
+    for 类型, 学生1, 学生2, 权重 in 成对约束:
+        添加关系(学生1, 学生2, _需同桌 if 类型 == 同桌 else _需分开, 权重)
+    排罚分 = [None] * len(学生列表)
+    if 轮换:
+        for (学生1, 学生2), 次数 in 轮换.同桌次数.items():
+            添加关系(学生1, 学生2, _不同桌, 次数 * 轮换.同桌权重)
+        for 学生, 次数 in 轮换.排次数.items():
+            if 学生 in 编号:
+                排罚分[编号[学生]] = {排: n * 轮换.排权重 for 排, n in 次数.items()}
+    允许 = [None] * len(学生列表)
+    for 学生, 排列表 in 指定排数安排.items():
+        if 学生 in 编号:
+            允许[编号[学生]] = set(排列表)
+
+    def 代价(i, p, 排除):
+        """学生i坐在座位p时自身的罚分，不计与学生 排除 之间的关系"""
+        总计 = 排罚分[i].get(行[p], 0) if 排罚分[i] else 0
+        行p, 列p = 行[p], 列[p]
+        # 热循环：与 _关系违反() 相同的判断，内联以减少函数调用
+        for j, 类型, 权重 in 关系[i]:
+            if j == 排除:
+                continue
+            q = 位置[j]
+            行差 = 行p - 行[q]
+            列差 = 列p - 列[q]
+            if 类型 == _需分开:
+                if -1 <= 行差 <= 1 and -1 <= 列差 <= 1:
+                    总计 += 权重
+            elif (行差 == 0 and (列差 == 1 or 列差 == -1)) != (类型 == _需同桌):
+                总计 += 权重
+        return 总计
+
+    # 只有有罚分项的学生移动才可能改变罚分，从这些学生中选择要移动的人
+    活跃学生 = [i for i in range(len(学生列表)) if 关系[i] or 排罚分[i]]
+    当前罚分 = _总罚分(位置, 行, 列, 关系, 排罚分)
+    最好罚分, 最好位置 = 当前罚分, list(位置)
+
+    关系数 = sum(len(列表) for 列表 in 关系) // 2
+    if 步数 is None:
+        步数 = min(50 * 座位数 + 500 * 关系数, 2000000)
+    权重列表 = [权重 for 列表 in 关系 for _, _, 权重 in 列表] + [
+        值 for 罚分 in 排罚分 if 罚分 for 值 in 罚分.values()]
+    if not 活跃学生 or 当前罚分 == 0:
+        步数 = 0
+    else:
+        起始温度 = max(权重列表)
+        结束温度 = 0.02 * min(权重列表)
+
+    随机数 = 随机源.random
+    指数 = math.exp
+    活跃数 = len(活跃学生)
+    温度 = 0
+    接受数 = 0
+    步 = 0
+    for 步 in range(步数):
+        if 步 % 降温间隔 == 0:
+            温度 = 起始温度 * (结束温度 / 起始温度) ** (步 / 步数)
+            if 步 % 进度报告间隔 == 0:
+                检查取消(取消事件)
+                if 进度回调:
+                    进度回调("局部搜索", 步, 步数)
+                if 当前罚分 < 最好罚分:
+                    最好罚分, 最好位置 = 当前罚分, list(位置)
+        a = 活跃学生[int(随机数() * 活跃数)]
+        B = int(随机数() * 座位数)
+        A = 位置[a]
+        if A == B or (允许[a] is not None and 行[B] not in 允许[a]):
+            continue
+        b = 占用[B]
+        if b < 0:
+            变化 = 代价(a, B, -1) - 代价(a, A, -1)
+        else:
+            if 允许[b] is not None and 行[A] not in 允许[b]:
+                continue
+            # 两人之间的关系在交换前后距离不变，不需要计算
+            变化 = 代价(a, B, b) + 代价(b, A, a) - 代价(a, A, b) - 代价(b, B, a)
+        if 变化 > 0 and 随机数() >= 指数(-变化 / 温度):
+            continue
+        位置[a] = B
+        占用[B] = a
+        if b < 0:
+            占用[A] = -1
+        else:
+            位置[b] = A
+            占用[A] = b
+        当前罚分 += 变化
+        接受数 += 1
+        if 当前罚分 <= 0:
+            break
+
+    if 当前罚分 <= 最好罚分:
+        最好罚分, 最好位置 = 当前罚分, 位置
+    运行指标.计数("局部搜索步数", 步 + 1 if 步数 else 0)
+    运行指标.计数("接受移动数", 接受数)
+    结果 = 座位分配表({学生: 座位列表[最好位置[i]] for i, 学生 in enumerate(学生列表)})
+    return 结果, 最好罚分
+
+
+def _关系违反(类型, 行差, 列差):
+    """编译后的关系是否违反（与 代价() 中的内联判断相同）"""
+    if 类型 == _需分开:
+        return -1 <= 行差 <= 1 and -1 <= 列差 <= 1
+    return (行差 == 0 and (列差 == 1 or 列差 == -1)) != (类型 == _需同桌)
+
+
+def _总罚分(位置, 行, 列, 关系, 排罚分):
+    """从头计算总罚分：每名学生的排罚分加上每对关系的罚分（每对只计一次）"""
+    总计 = 0
+    for i, p in enumerate(位置):
+        if 排罚分[i]:
+            总计 += 排罚分[i].get(行[p], 0)
+        for j, 类型, 权重 in 关系[i]:
+            if j > i and _关系违反(类型, 行[p] - 行[位置[j]], 列[p] - 列[位置[j]]):
+                总计 += 权重
+    return 总计
@@ -0,0 +1,152 @@
+"""座位表Excel导出
+
+使用openpyxl的只写（write_only）工作簿流式写出座位表：
+- 每个工作簿只创建一次命名样式（标题、讲台、座位、方位），所有单元格共用
+- 按行生成并立即写出，已写出的行不再保留在内存中
+- 一个工作簿可以包含任意多个房间，每个房间两个工作表（学生视角、讲台视角）
+
+房间用 (房间名, 布局, 分配结果) 表示，分配结果为 {学生: (行, 列)}。
+只有一个房间且房间名为None时，工作表名称与原来的单班级导出一致。
+"""
+import os
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+
+import 运行指标
+from 后台任务 import 检查取消
+
+学生视角 = "（学生视角）"
+讲台视角 = "（讲台视角）"
+工作表名最大长度 = 31
+非法字符 = str.maketrans({字符: "_" for 字符 in "[]:*?/\\"})
+
+
+def _注册样式(wb):
+    """在工作簿中注册命名样式，返回样式名"""
+    居中 = Alignment(horizontal='center', vertical='center')
+    细线 = Side(style='thin')
+
+    标题 = NamedStyle("座位表标题", font=Font(size=14, bold=True), alignment=居中)
+    讲台 = NamedStyle("座位表讲台", font=Font(bold=True), alignment=居中)
+    座位 = NamedStyle("座位表座位", alignment=居中,
+                    border=Border(left=细线, right=细线, top=细线, bottom=细线))
+    方位 = NamedStyle("座位表方位", font=Font(color="0000FF"))
+    for 样式 in (标题, 讲台, 座位, 方位):
+        wb.add_named_style(样式)
+    return 标题.name, 讲台.name, 座位.name, 方位.name
+
+
+def _单元格(ws, 值, 样式):
+    单元格 = WriteOnlyCell(ws, 值)
+    单元格.style = 样式
+    return 单元格
+
+
+def _工作表名(房间名, 视角, 已用名称):
+    """生成合法且不重复的工作表名"""
+    if 房间名 is None:
+        基础名 = "座位表"
+    else:
+        基础名 = str(房间名).translate(非法字符)[:工作表名最大长度 - len(视角)]
+    名称 = 基础名 + 视角
+    序号 = 2
+    while 名称 in 已用名称:
+        后缀 = f"_{序号}"
+        名称 = 基础名[:工作表名最大长度 - len(视角) - len(后缀)] + 后缀 + 视角
+        序号 += 1
+    已用名称.add(名称)
+    return 名称
+
+
+def _写入房间(wb, 房间名, 布局, 分配结果, 样式, 已用名称):
+    """把一个房间写成两个工作表"""
+    标题样式, 讲台样式, 座位样式, 方位样式 = 样式
+    行数, 列数 = 布局.行数, 布局.列数
+
+    # 座位网格 - 网格[行][列] 为学生姓名或None
+    网格 = [[None] * 列数 for _ in range(行数)]
+    for 学生, (行, 列) in 分配结果.items():
+        网格[行][列] = 学生
+
+    ws1 = wb.create_sheet(_工作表名(房间名, 学生视角, 已用名称))
+    ws2 = wb.create_sheet(_工作表名(房间名, 讲台视角, 已用名称))
+
+    # 设置列宽 - 只写模式下必须在写入行之前设置
+    for col in range(1, 列数 + 1):
+        ws1.column_dimensions[get_column_letter(col)].width = 15
+        ws2.column_dimensions[get_column_letter(col)].width = 15
+
+    # 学生视角：标题、讲台、座位、方向标识
+    标题 = "班级座位表" if 房间名 is None else f"{房间名}座位表"
+    ws1.merged_cells.add(f"A1:{get_column_letter(列数)}1")
+    ws1.append([_单元格(ws1, 标题, 标题样式)])
+
+    讲台起始列 = 布局.讲台起始列 + 1
+    讲台结束列 = 讲台起始列 + 布局.讲台列数 - 1
+    ws1.merged_cells.add(f"{get_column_letter(讲台起始列)}2:{get_column_letter(讲台结束列)}2")
+    ws1.append([None] * (讲台起始列 - 1) + [_单元格(ws1, "讲台", 讲台样式)])
+
+    for 行 in 网格:
+        ws1.append([None if 学生 is None else _单元格(ws1, 学生, 座位样式) for 学生 in 行])
+
+    方位行 = [None] * 列数
+    方位行[0] = _单元格(ws1, "窗户", 方位样式)
+    方位行[-1] = _单元格(ws1, "门", 方位样式)
+    ws1.append(方位行)
+
+    # 讲台视角：行列都翻转，不需要标题，讲台在座位下方
+    for 行 in reversed(网格):
+        ws2.append([None if 学生 is None else _单元格(ws2, 学生, 座位样式)
+                    for 学生 in reversed(行)])
+
+    翻转讲台起始列 = 列数 - 讲台结束列 + 1
+    翻转讲台结束列 = 翻转讲台起始列 + 布局.讲台列数 - 1
+    ws2.merged_cells.add(f"{get_column_letter(翻转讲台起始列)}{行数 + 1}:"
+                         f"{get_column_letter(翻转讲台结束列)}{行数 + 1}")
+    ws2.append([None] * (翻转讲台起始列 - 1) + [_单元格(ws2, "讲台", 讲台样式)])
+
+    # 写完立即关闭，避免几百个房间时同时占用上千个临时文件句柄
+    ws1.close()
+    ws2.close()
+
+
+def 导出座位表(文件路径, 房间列表, 进度回调=None, 取消事件=None):
+    """把一个或多个房间的座位表流式写入Excel文件
+
+    先写入同目录下的临时文件，保存完成后再替换目标文件，中途失败或取消不会留下半个文件。
+
+    参数:
+        文件路径: 输出的xlsx路径
+        房间列表: 可迭代对象，元素为 (房间名, 布局, 分配结果)；可以是生成器，
+                  房间会逐个写出，不需要同时保存在内存中
+        进度回调: 可选，进度回调(说明, 完成, 总数)，房间列表有长度时才报告总数
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+    """
+    总数 = len(房间列表) if hasattr(房间列表, "__len__") else 0
+    wb = openpyxl.Workbook(write_only=True)
+    样式 = _注册样式(wb)
+    已用名称 = set()
+    with 运行指标.阶段("写入工作表"):
+        for 序号, (房间名, 布局, 分配结果) in enumerate(房间列表):
+            检查取消(取消事件)
+            if 进度回调:
+                进度回调("写入工作表", 序号, 总数)
+            _写入房间(wb, 房间名, 布局, 分配结果, 样式, 已用名称)
+            运行指标.计数("写入房间数")
+
+    检查取消(取消事件)
+    if 进度回调:
+        进度回调("保存文件", 总数, 总数)
+    临时路径 = 文件路径 + ".tmp"
+    try:
+        with 运行指标.阶段("保存文件"):
+            wb.save(临时路径)
+        # 保存本身无法中断，保存期间被取消时丢弃临时文件
+        检查取消(取消事件)
+        os.replace(临时路径, 文件路径)
+    finally:
+        if os.path.exists(临时路径):
+            os.remove(临时路径)
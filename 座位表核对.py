@@ -0,0 +1,473 @@
+"""读回并核对导出的座位表
+
+导出的座位表经老师手工修改后，读回 "（学生视角）" 工作表并一次检查：
+- 读取: xlsx是zip包，这里不经过openpyxl，用zipfile和ElementTree.iterparse直接流式读出
+  学生视角工作表的单元格（共享字符串只在用到时读取），一个班级的工作簿约1 ms，
+  期末审计几百个考场的工作簿时还可以用多进程并行
+- 核对: 一遍扫描单元格，同时得到每名学生的座位、重复出现的学生、写在非座位格的姓名；
+  再对照学生名单找出缺少和多出的学生，对照指定排数安排和成对约束找出违反的约束
+- 对比: 与生成时的座位对比，列出移动过的学生。原座位可以是另一个导出的工作簿，也可以是
+  批量模式、多考场模式或座位服务输出的JSON
+
+一个工作簿中有多个房间（多考场导出）时按同一个布局核对每个房间，学生名单按整个工作簿统计。
+学生位置记为 (房间名, 行, 列)，单班级导出的房间名为None。
+
+命令行用法:
+    python 座位表核对.py 座位表.xlsx|目录 ... [--roster 学生名单.json] [--special 特殊安排.json]
+                         [--config 配置.json] [--baseline 原座位表.json|.xlsx|目录] [--jobs N] [-o 报告.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import 座位分配引擎 as 引擎
+import 座位约束
+from 座位分配表 import 座位分配表
+from 座位布局 import 座位布局
+
+_主 = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_关系编号 = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_包关系 = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_引用 = re.compile(r"([A-Z]+)(\d+)")
+学生视角 = "（学生视角）"  # 与 座位表导出.学生视角 相同，这里不导入openpyxl
+首个座位行 = 3  # 学生视角工作表中第1行为标题、第2行为讲台，第3行起为座位
+方位标识 = ("窗户", "门")
+
+
+def _文本(元素):
+    """共享字符串或行内字符串的文本，包括富文本的各段，不包括注音"""
+    文本 = []
+    for 子元素 in 元素:
+        if 子元素.tag == _主 + "t":
+            文本.append(子元素.text or "")
+        elif 子元素.tag == _主 + "r":
+            文本 += [t.text or "" for t in 子元素.iter(_主 + "t")]
+    return "".join(文本)
+
+
+def _工作表列表(包):
+    """返回工作簿中的 [(工作表名, 包内路径), ...]，按工作表顺序"""
+    关系 = {项.get("Id"): 项.get("Target")
+          for 项 in ET.fromstring(包.read("xl/_rels/workbook.xml.rels")).iter(_包关系)}
+    结果 = []
+    for 表 in ET.fromstring(包.read("xl/workbook.xml")).iter(_主 + "sheet"):
+        目标 = 关系.get(表.get(_关系编号)) or ""
+        结果.append((表.get("name"), 目标[1:] if 目标.startswith("/") else "xl/" + 目标))
+    return 结果
+
+
+def _读取共享字符串(包):
+    try:
+        数据 = 包.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    字符串 = []
+    with 数据:
+        for _, 元素 in ET.iterparse(数据):
+            if 元素.tag == _主 + "si":
+                字符串.append(_文本(元素))
+                元素.clear()
+    return 字符串
+
+
+def _列号(字母):
+    列号 = 0
+    for 字符 in 字母:
+        列号 = 列号 * 26 + ord(字符) - 64
+    return 列号
+
+
+def _读取单元格(包, 路径, 共享字符串):
+    """流式读取工作表中座位区域（第3行起）的非空文本
+
+    参数:
+        共享字符串: 列表，第一次遇到共享字符串单元格时才读入
+
+    返回:
+        dict: {(行, 列): 文本}，行列为座位坐标（工作表第3行、A列为 (0, 0)），按行优先顺序
+    """
+    单元格 = {}
+    行号 = 列号 = 0
+    with 包.open(路径) as 数据:
+        for 事件, 元素 in ET.iterparse(数据, events=("start", "end")):
+            标签 = 元素.tag
+            if 事件 == "start":
+                if 标签 == _主 + "row":
+                    行号 = int(元素.get("r") or 行号 + 1)
+                    列号 = 0
+                continue
+            if 标签 == _主 + "row":
+                元素.clear()  # 已读完的行不再保留
+                continue
+            if 标签 != _主 + "c":
+                continue
+            引用 = 元素.get("r")
+            匹配 = _引用.match(引用) if 引用 else None
+            列号 = _列号(匹配.group(1)) if 匹配 else 列号 + 1
+            if 行号 < 首个座位行:
+                continue
+            类型 = 元素.get("t")
+            if 类型 == "inlineStr":
+                内容 = 元素.find(_主 + "is")
+                值 = "" if 内容 is None else _文本(内容)
+            else:
+                值元素 = 元素.find(_主 + "v")
+                值 = None if 值元素 is None else 值元素.text
+                if 值 is None:
+                    continue
+                if 类型 == "s":
+                    if not 共享字符串:
+                        共享字符串 += _读取共享字符串(包)
+                    值 = 共享字符串[int(值)]
+                elif 类型 in (None, "n") and 值.endswith(".0"):
+                    值 = 值[:-2]  # 写成数字的学号等
+            值 = 值.strip()
+            if 值:
+                单元格[(行号 - 首个座位行, 列号 - 1)] = 值
+    return 单元格
+
+
+def 读取学生视角(文件路径):
+    """读取工作簿中全部 "（学生视角）" 工作表的座位区域
+
+    返回:
+        list: [(房间名, {(行, 列): 文本}), ...]；单班级导出的 "座位表（学生视角）" 房间名为None
+
+    异常:
+        ValueError: 不是xlsx文件、工作表损坏，或没有学生视角工作表
+        OSError: 文件无法读取
+    """
+    try:
+        包 = zipfile.ZipFile(文件路径)
+    except zipfile.BadZipFile:
+        raise ValueError(f"不是xlsx文件: {文件路径}") from None
+    with 包:
+        try:
+            工作表列表 = _工作表列表(包)
+        except (KeyError, ET.ParseError, zipfile.BadZipFile, zlib.error):
+            raise ValueError(f"不是xlsx文件: {文件路径}") from None
+        共享字符串 = []
+        结果 = []
+        for 名称, 路径 in 工作表列表:
+            if not 名称 or not 名称.endswith(学生视角):
+                continue
+            房间名 = 名称[:-len(学生视角)]
+            try:
+                单元格 = _读取单元格(包, 路径, 共享字符串)
+            except (KeyError, IndexError, ValueError, ET.ParseError, zipfile.BadZipFile, zlib.error, EOFError):
+                # 截断的XML、包中缺少的工作表、越界的共享字符串编号、损坏的压缩数据
+                raise ValueError(f"工作表损坏: {文件路径}") from None
+            结果.append((None if 房间名 == "座位表" else 房间名, 单元格))
+    if not 结果:
+        raise ValueError(f"没有{学生视角}工作表: {文件路径}")
+    return 结果
+
+
+class 核对结果:
+    """一个工作簿的核对结果
+
+    属性:
+    - 文件路径, 学生数
+    - 房间列表: [(房间名, 座位分配表), ...]，重复的学生取第一次出现的座位
+    - 重复: {学生: [(房间名, 行, 列), ...]}，出现两次以上的学生
+    - 非座位: [(学生, 房间名, 行, 列), ...]，写在布局中没有座位的格子里的姓名
+    - 缺少, 多出: 学生名单中没有出现的学生、不在学生名单中的姓名
+    - 违反排数: [(学生, 房间名, 行, 允许的排), ...]
+    - 违反成对约束: [(类型, 学生1, 学生2, 权重), ...]，只检查同一房间中的两名学生
+    - 移动: [(学生, 原位置, 新位置), ...]，有原座位时才计算，位置为 (房间名, 行, 列) 或 (行, 列)
+    """
+    def __init__(self, 文件路径):
+        self.文件路径 = 文件路径
+        self.学生数 = 0
+        self.房间列表 = []
+        self.重复 = {}
+        self.非座位 = []
+        self.缺少 = []
+        self.多出 = []
+        self.违反排数 = []
+        self.违反成对约束 = []
+        self.移动 = []
+
+    @property
+    def 有问题(self):
+        """是否有重复、非座位、缺少、多出或违反约束（移动不算问题）"""
+        return bool(self.重复 or self.非座位 or self.缺少 or self.多出
+                    or self.违反排数 or self.违反成对约束)
+
+    def 转为文本(self, 最多条数=10):
+        """逐项说明的文本行列表，每一项最多列出 最多条数 名学生"""
+        def 列出(项目):
+            文本 = "、".join(项目[:最多条数])
+            return 文本 + (f"等{len(项目)}项" if len(项目) > 最多条数 else "")
+
+        def 位置(*位置):
+            # 位置为 (房间名, 行, 列) 或原座位中的 (行, 列)；排和列与指定排数安排一样从0开始
+            房间名, 行, 列 = (None, *位置) if len(位置) == 2 else 位置
+            return (f"{房间名} " if 房间名 is not None else "") + f"第{行}排第{列}列"
+
+        行列表 = []
+        if self.重复:
+            行列表.append("重复: " + 列出([f"{学生}（{'、'.join(位置(*座位) for 座位 in 座位列表)}）"
+                                      for 学生, 座位列表 in self.重复.items()]))
+        if self.非座位:
+            行列表.append("写在非座位格: " + 列出([f"{学生}（{位置(房间名, 行, 列)}）"
+                                            for 学生, 房间名, 行, 列 in self.非座位]))
+        if self.缺少:
+            行列表.append("缺少: " + 列出(self.缺少))
+        if self.多出:
+            行列表.append("不在名单中: " + 列出(self.多出))
+        if self.违反排数:
+            行列表.append("不在指定的排: " + 列出([f"{学生}（第{行}排，应在{'、'.join(map(str, 允许))}排）"
+                                            for 学生, _, 行, 允许 in self.违反排数]))
+        if self.违反成对约束:
+            行列表.append("违反成对约束: " + 列出([f"{类型} {学生1}、{学生2}"
+                                            for 类型, 学生1, 学生2, _ in self.违反成对约束]))
+        if self.移动:
+            行列表.append(f"移动了{len(self.移动)}名学生: " + 列出(
+                [f"{学生}（{位置(*原)} → {位置(*新)}）" for 学生, 原, 新 in self.移动]))
+        return 行列表
+
+    def 转为字典(self):
+        return {
+            "文件": self.文件路径,
+            "学生数": self.学生数,
+            "有问题": self.有问题,
+            "重复": {学生: [list(座位) for 座位 in 座位列表] for 学生, 座位列表 in self.重复.items()},
+            "非座位": [list(项) for 项 in self.非座位],
+            "缺少": self.缺少,
+            "多出": self.多出,
+            "违反排数": [[学生, 房间名, 行, list(允许)] for 学生, 房间名, 行, 允许 in self.违反排数],
+            "违反成对约束": [list(约束) for 约束 in self.违反成对约束],
+            "移动": [[学生, list(原), list(新)] for 学生, 原, 新 in self.移动],
+        }
+
+    @classmethod
+    def 从字典(cls, 数据):
+        """由 转为字典() 的结果恢复（不含房间列表），用于汇总进程池返回的结果"""
+        结果 = cls(数据["文件"])
+        结果.学生数 = 数据["学生数"]
+        结果.重复 = {学生: [tuple(座位) for 座位 in 座位列表] for 学生, 座位列表 in 数据["重复"].items()}
+        结果.非座位 = [tuple(项) for 项 in 数据["非座位"]]
+        结果.缺少 = 数据["缺少"]
+        结果.多出 = 数据["多出"]
+        结果.违反排数 = [tuple(项) for 项 in 数据["违反排数"]]
+        结果.违反成对约束 = [tuple(约束) for 约束 in 数据["违反成对约束"]]
+        结果.移动 = [(学生, tuple(原), tuple(新)) for 学生, 原, 新 in 数据["移动"]]
+        return 结果
+
+
+def 核对(房间列表, 布局, 学生名单=None, 指定排数安排=None, 成对约束=None, 原座位=None, 文件路径=None):
+    """核对读回的座位
+
+    参数:
+        房间列表: 读取学生视角() 的结果
+        布局: 座位布局，各房间共用
+        学生名单: 可选，检查缺少和多出的学生；没有时用原座位中的学生
+        指定排数安排: 可选，{学生: 排数列表}
+        成对约束: 可选，座位约束.解析成对约束() 的结果
+        原座位: 可选，{学生: (行, 列) 或 (房间名, 行, 列)}，列出移动过的学生
+
+    返回:
+        核对结果
+    """
+    结果 = 核对结果(文件路径)
+    位置表 = {}  # 学生 -> 第一次出现的 (房间名, 行, 列)
+    for 房间名, 单元格 in 房间列表:
+        分配结果 = 座位分配表()
+        for (行, 列), 学生 in 单元格.items():
+            if not (0 <= 行 < 布局.行数 and 0 <= 列 < 布局.列数 and 布局.是座位(行, 列)):
+                if not (行 == 布局.行数 and 学生 in 方位标识):
+                    结果.非座位.append((学生, 房间名, 行, 列))
+                continue
+            if 学生 in 位置表:
+                结果.重复.setdefault(学生, [位置表[学生]]).append((房间名, 行, 列))
+                continue
+            位置表[学生] = (房间名, 行, 列)
+            分配结果.放置(学生, (行, 列))
+        结果.房间列表.append((房间名, 分配结果))
+        结果.学生数 += len(分配结果)
+        if 成对约束:
+            结果.违反成对约束 += 座位约束.计算罚分(分配结果, 成对约束)[1]
+
+    名单 = 学生名单 if 学生名单 is not None else (list(原座位) if 原座位 is not None else None)
+    if 名单 is not None:
+        名单集合 = set(名单)
+        结果.缺少 = [学生 for 学生 in dict.fromkeys(名单) if 学生 not in 位置表]
+        结果.多出 = [学生 for 学生 in 位置表 if 学生 not in 名单集合]
+    for 学生, 排数列表 in (指定排数安排 or {}).items():
+        位置 = 位置表.get(学生)
+        if 位置 is not None and 位置[1] not in 排数列表:
+            结果.违反排数.append((学生, 位置[0], 位置[1], sorted(排数列表)))
+    if 原座位 is not None:
+        for 学生, 原位置 in 原座位.items():
+            位置 = 位置表.get(学生)
+            if 位置 is None:
+                continue
+            新位置 = 位置[-len(原位置):]  # 原座位没有房间名时只比较行列
+            if tuple(原位置) != 新位置:
+                结果.移动.append((学生, tuple(原位置), 新位置))
+    return 结果
+
+
+def 读取原座位(路径, 布局):
+    """读取用于对比的原座位
+
+    参数:
+        路径: 导出的xlsx，或JSON：{"座位": {学生: [行, 列]}}（批量模式、座位服务，早期批量模式为 {学生: [行, 列]}）、
+              {"座位表": {学生: [考场, 行, 列]}}（多考场模式）
+        布局: 读取xlsx时用于排除非座位格
+
+    返回:
+        dict: {学生: (行, 列) 或 (房间名, 行, 列)}
+
+    异常:
+        ValueError: 格式错误
+        OSError: 文件无法读取
+    """
+    if os.path.splitext(路径)[1].lower() == ".json":
+        with open(路径, "r", encoding="utf-8") as f:
+            数据 = json.load(f)
+        if isinstance(数据, dict):
+            数据 = 数据.get("座位表", 数据.get("座位", 数据))
+        if not isinstance(数据, dict) or not all(isinstance(位置, list) and len(位置) in (2, 3)
+                                               for 位置 in 数据.values()):
+            raise ValueError(f"原座位格式错误，应为 {{学生: [行, 列]}}: {路径}")
+        return {学生: tuple(位置) for 学生, 位置 in 数据.items()}
+    结果 = 核对(读取学生视角(路径), 布局)
+    return {学生: (房间名, 行, 列) for 房间名, 分配结果 in 结果.房间列表 for 学生, (行, 列) in 分配结果.items()}
+
+
+def 核对文件(文件路径, 布局, 学生名单=None, 指定排数安排=None, 成对约束=None, 原座位路径=None):
+    """读取并核对一个工作簿，参数见 核对() 和 读取原座位()
+
+    异常:
+        ValueError, OSError: 文件无法读取或格式错误
+    """
+    原座位 = 读取原座位(原座位路径, 布局) if 原座位路径 else None
+    return 核对(读取学生视角(文件路径), 布局, 学生名单, 指定排数安排, 成对约束, 原座位, 文件路径)
+
+
+# 进程池中各工作进程共用的核对参数，由 _初始化工作进程() 设置，不随每个文件重复传送
+_上下文 = None
+
+
+def _初始化工作进程(上下文):
+    global _上下文
+    _上下文 = 上下文
+
+
+def _核对任务(任务):
+    """进程池中执行的单个文件核对，返回 (文件路径, 结果字典或None, 错误信息)"""
+    文件路径, 原座位路径 = 任务
+    布局, 学生名单, 指定排数安排, 成对约束 = _上下文
+    try:
+        结果 = 核对文件(文件路径, 布局, 学生名单, 指定排数安排, 成对约束, 原座位路径)
+    except (OSError, ValueError) as e:
+        return 文件路径, None, str(e)
+    return 文件路径, 结果.转为字典(), ""
+
+
+def 批量核对(文件列表, 布局, 学生名单=None, 指定排数安排=None, 成对约束=None, 原座位路径列表=None, 进程数=None):
+    """核对多个工作簿，文件较多时用进程池并行
+
+    参数:
+        原座位路径列表: 可选，与文件列表一一对应，没有原座位的为None
+        进程数: 默认为CPU核数；为1时在当前进程中依次核对
+
+    返回:
+        list: [(文件路径, 结果字典或None, 错误信息), ...]，顺序与文件列表一致；结果字典见 核对结果.转为字典()
+    """
+    任务列表 = list(zip(文件列表, 原座位路径列表 or [None] * len(文件列表)))
+    上下文 = (布局, 学生名单, 指定排数安排, 成对约束)
+    进程数 = 进程数 or os.cpu_count() or 1
+    if 进程数 == 1 or len(任务列表) < 2 * 进程数:
+        _初始化工作进程(上下文)
+        return [_核对任务(任务) for 任务 in 任务列表]
+    每批数量 = max(1, len(任务列表) // (进程数 * 4))
+    with ProcessPoolExecutor(max_workers=进程数, initializer=_初始化工作进程, initargs=(上下文,)) as 进程池:
+        return list(进程池.map(_核对任务, 任务列表, chunksize=每批数量))
+
+
+def _展开文件(路径列表):
+    """目录展开为其中的xlsx文件（不含Excel打开时生成的 ~$ 锁文件）"""
+    文件列表 = []
+    for 路径 in 路径列表:
+        if os.path.isdir(路径):
+            文件列表 += sorted(os.path.join(路径, 名称) for 名称 in os.listdir(路径)
+                           if 名称.lower().endswith(".xlsx") and not 名称.startswith("~$"))
+        else:
+            文件列表.append(路径)
+    return 文件列表
+
+
+def _原座位路径(基准, 文件路径):
+    """--baseline 为目录时，按文件名找同名的 .json 或 .xlsx"""
+    if not 基准 or not os.path.isdir(基准):
+        return 基准
+    名称 = os.path.splitext(os.path.basename(文件路径))[0]
+    for 扩展名 in (".json", ".xlsx"):
+        路径 = os.path.join(基准, 名称 + 扩展名)
+        if os.path.exists(路径):
+            return 路径
+    return None
+
+
+def 主程序(参数列表=None):
+    """命令行入口"""
+    解析器 = argparse.ArgumentParser(description="读回并核对导出的座位表")
+    解析器.add_argument("座位表", nargs="+", help="导出的xlsx文件或包含它们的目录")
+    解析器.add_argument("--roster", default=None, help="学生名单（.json、.xlsx或.csv），检查缺少和多出的学生")
+    解析器.add_argument("--special", default=None, help="特殊安排JSON文件，检查指定排数和成对约束")
+    解析器.add_argument("--config", default=引擎.配置文件, help="包含座位布局的配置文件")
+    解析器.add_argument("--baseline", default=None, metavar="原座位",
+                        help="生成时的座位（.json或.xlsx）；为目录时按文件名找同名的原座位")
+    解析器.add_argument("--jobs", type=int, default=None, help="并行进程数，默认为CPU核数")
+    解析器.add_argument("-o", "--output", default=None, metavar="报告.json", help="把核对结果保存为JSON")
+    参数 = 解析器.parse_args(参数列表)
+
+    try:
+        布局 = 座位布局.从文件加载(参数.config)
+        学生名单 = 引擎.读取学生名单(参数.roster) if 参数.roster else None
+        指定排数安排 = 引擎.读取特殊安排(参数.special) if 参数.special else None
+        成对约束 = 引擎.读取成对约束(参数.special) if 参数.special else None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"读取输入失败: {e}", file=sys.stderr)
+        return 1
+
+    文件列表 = _展开文件(参数.座位表)
+    原座位列表 = [_原座位路径(参数.baseline, 文件路径) for 文件路径 in 文件列表]
+    报告 = 批量核对(文件列表, 布局, 学生名单, 指定排数安排, 成对约束, 原座位列表, 参数.jobs)
+
+    问题数 = 0
+    for 文件路径, 结果字典, 错误信息 in 报告:
+        if 结果字典 is None:
+            问题数 += 1
+            print(f"{文件路径}: 读取失败 - {错误信息}", file=sys.stderr)
+            continue
+        结果 = 核对结果.从字典(结果字典)
+        问题数 += 结果.有问题
+        说明 = 结果.转为文本()
+        if not 说明:
+            continue  # 通过且没有移动的文件不逐个列出
+        print(f"{文件路径}: {结果.学生数}名学生，{'有问题' if 结果.有问题 else '通过'}")
+        for 行 in 说明:
+            print(f"  {行}")
+
+    if 参数.output:
+        with open(参数.output, "w", encoding="utf-8") as f:
+            json.dump([结果字典 or {"文件": 文件路径, "错误": 错误信息} for 文件路径, 结果字典, 错误信息 in 报告],
+                      f, ensure_ascii=False, indent=4)
+    print(f"共核对{len(报告)}个文件，{问题数}个有问题")
+    return 1 if 问题数 else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 兼容PyInstaller打包后的多进程
+    sys.exit(主程序())
@@ -0,0 +1,825 @@
+"""座位分配性能测试
+
+- allocate: 对比旧版"列表 remove + 重试"的单次分配尝试与座位池版分配引擎的耗时
+- export: 对比旧版逐单元格创建样式的普通工作簿与流式导出在1~500个房间时的耗时和峰值内存
+- multiroom: 15000名学生、375个考场的多考场分配在不同进程数下的吞吐量
+- candidates: 34名学生的班级一次生成K个候选方案，与逐个调用分配引擎K次对比
+- pairs: 数百条成对约束（同桌、分开、分散）时局部搜索每秒评估的移动数和罚分的下降
+- repair: 加入、离开几名学生并修改一条指定排数后，最少移动调整与重新分配的耗时和移动人数对比
+- exam: 34~2000座的考场按班级分组、座位几乎坐满时考试模式（同组不相邻）的求解耗时和尝试次数
+- memory: 保存多个座位安排时，每个安排用 座位分配表 与用 座位向量 的内存占用
+- service: 在本机启动座位服务，多个客户端并发请求 /allocate（34人的班级），测量每秒请求数和延迟
+- stages: 34~10万名学生时读取名单、验证特殊安排、分配、界面更新、导出各阶段的耗时，
+  结果可保存为JSON，并与保存的基准结果对比，发现性能退化
+
+用法:
+    python 性能测试.py [allocate] [--sizes 34 1000 10000 100000] [--legacy-limit 10000]
+    python 性能测试.py export [--rooms 1 10 100 500]
+    python 性能测试.py multiroom [--jobs 1 2 4 8]
+    python 性能测试.py candidates [--counts 1 100 10000]
+    python 性能测试.py pairs [--sizes 34 300 1000] [--rules 20 300 800]
+    python 性能测试.py repair [--sizes 34 1000 10000 100000]
+    python 性能测试.py exam [--sizes 34 600 2000] [--groups 4 10 20]
+    python 性能测试.py memory [--sizes 34 1000 10000 100000] [--counts 100]
+    python 性能测试.py service [--clients 1 8 32] [--counts 2000] [--jobs 4]
+    python 性能测试.py stages [--sizes ...] [-o 结果.json] [--baseline 基准.json] [--tolerance 0.25]
+
+旧算法每次尝试是O(座位数²)，规模超过 --legacy-limit 时只按较小规模的结果外推估算。
+
+stages 全程无界面运行：界面更新阶段优先使用隐藏的Tk根窗口，没有显示器时改用只记录
+config() 调用的替身控件，只测量界面代码本身的开销；导出阶段写入临时目录。
+与基准对比时，某阶段耗时超过基准的 (1 + tolerance) 倍且多出 --min-delta 秒以上即视为退化，
+此时程序返回1，可直接用于持续集成。
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import 座位分配引擎 as 引擎
+from 座位布局 import 座位布局, 默认布局
+
+默认规模 = [34, 1000, 10000, 100000]
+默认房间数 = [1, 10, 100, 500]
+
+
+def 生成教室(座位数):
+    """生成指定座位数的教室，34座使用默认教室布局，其余使用接近正方形的网格"""
+    if 座位数 == 34:
+        return 默认布局()
+    return 座位布局.网格(座位数)
+
+
+def 生成名单(人数):
+    """生成合成学生名单"""
+    return [f"学生{序号:06d}" for 序号 in range(人数)]
+
+
+def 生成特殊安排(学生名单, 布局, 比例=0.1, 随机源=random):
+    """为一部分学生随机指定2~3个可选排"""
+    排号列表 = 布局.排号列表
+    受限人数 = int(len(学生名单) * 比例)
+    return {学生: sorted(随机源.sample(排号列表, min(len(排号列表), 随机源.randint(2, 3))))
+            for 学生 in 随机源.sample(学生名单, 受限人数)}
+
+
+def 旧算法单次尝试(学生名单, 座位列表, 指定排数安排, 随机源=random):
+    """旧版随机分配座位()中的一次尝试，用于对比"""
+    剩余学生 = list(学生名单)
+    剩余座位 = list(座位列表)
+    分配结果 = {}
+    for 学生, 排数列表 in 指定排数安排.items():
+        if 学生 not in 剩余学生:
+            continue
+        可用座位 = [座位 for 座位 in 剩余座位 if 座位[0] in 排数列表]
+        if not 可用座位:
+            continue
+        座位 = 随机源.choice(可用座位)
+        分配结果[学生] = 座位
+        剩余座位.remove(座位)
+        剩余学生.remove(学生)
+    随机源.shuffle(剩余学生)
+    for 学生 in 剩余学生:
+        if not 剩余座位:
+            break
+        座位 = 随机源.choice(剩余座位)
+        分配结果[学生] = 座位
+        剩余座位.remove(座位)
+    return 分配结果
+
+
+def 计时(函数, 最少重复=3, 最短时间=0.2):
+    """多次运行取最快一次的耗时（秒）"""
+    最快 = float("inf")
+    总耗时 = 0.0
+    次数 = 0
+    while 次数 < 最少重复 or 总耗时 < 最短时间:
+        开始 = time.perf_counter()
+        函数()
+        耗时 = time.perf_counter() - 开始
+        最快 = min(最快, 耗时)
+        总耗时 += 耗时
+        次数 += 1
+    return 最快
+
+
+def 对比座位池(规模列表, 旧算法上限):
+    """逐个规模对比旧算法单次尝试与新分配引擎的耗时
+
+    返回:
+        list: [{"座位数", "旧算法", "旧算法为估算", "新算法", "加速比"}, ...]
+    """
+    随机源 = random.Random(0)
+    结果 = []
+    上一次旧耗时 = None
+    上一次规模 = None
+    for 座位数 in 规模列表:
+        布局 = 生成教室(座位数)
+        学生名单 = 生成名单(座位数)
+        指定排数安排 = 生成特殊安排(学生名单, 布局, 随机源=随机源)
+
+        新耗时 = 计时(lambda: 引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源))
+        if 座位数 <= 旧算法上限:
+            旧耗时 = 计时(lambda: 旧算法单次尝试(学生名单, 布局.座位列表, 指定排数安排, 随机源),
+                        最少重复=1)
+            估算 = False
+            上一次旧耗时, 上一次规模 = 旧耗时, 座位数
+        elif 上一次旧耗时 is not None:
+            # 按平方复杂度外推
+            旧耗时 = 上一次旧耗时 * (座位数 / 上一次规模) ** 2
+            估算 = True
+        else:
+            旧耗时, 估算 = None, True
+
+        结果.append({
+            "座位数": 座位数,
+            "旧算法": 旧耗时,
+            "旧算法为估算": 估算,
+            "新算法": 新耗时,
+            "加速比": 旧耗时 / 新耗时 if 旧耗时 else None,
+        })
+    return 结果
+
+
+def 打印对比(结果):
+    print(f"{'座位数':>8} {'旧算法单次尝试':>16} {'座位池分配':>12} {'加速比':>10}")
+    for 行 in 结果:
+        旧 = "-" if 行["旧算法"] is None else f"{行['旧算法'] * 1000:.2f} ms"
+        if 行["旧算法为估算"] and 行["旧算法"] is not None:
+            旧 = "~" + 旧
+        加速 = "-" if 行["加速比"] is None else f"{行['加速比']:.1f}x"
+        print(f"{行['座位数']:>8} {旧:>16} {行['新算法'] * 1000:>10.2f} ms {加速:>10}")
+
+
+def 旧版导出(文件路径, 房间列表):
+    """旧版导出到Excel()的写法：普通工作簿，每个单元格新建边框和对齐对象"""
+    import openpyxl
+    from openpyxl.styles import Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for 序号, (房间名, 布局, 分配结果) in enumerate(房间列表):
+        ws1 = wb.create_sheet(f"{序号}（学生视角）")
+        ws2 = wb.create_sheet(f"{序号}（讲台视角）")
+        for col in range(1, 布局.列数 + 1):
+            ws1.column_dimensions[get_column_letter(col)].width = 15
+            ws2.column_dimensions[get_column_letter(col)].width = 15
+        ws1.merge_cells(f'A1:{get_column_letter(布局.列数)}1')
+        ws1.cell(1, 1, "班级座位表").alignment = Alignment(horizontal='center', vertical='center')
+        for 学生, (行, 列) in 分配结果.items():
+            for ws, excel行, excel列 in ((ws1, 行 + 3, 列 + 1),
+                                         (ws2, 布局.行数 - 行, 布局.列数 - 列)):
+                单元格 = ws.cell(excel行, excel列, 学生)
+                单元格.alignment = Alignment(horizontal='center', vertical='center')
+                单元格.border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                                    top=Side(style='thin'), bottom=Side(style='thin'))
+    wb.save(文件路径)
+
+
+def 生成房间(房间数, 随机源=random):
+    """生成若干个默认教室的房间及其随机座位表"""
+    布局 = 默认布局()
+    学生名单 = 生成名单(布局.座位数)
+    return [(f"考场{序号 + 1:03d}", 布局, 引擎.分配座位(学生名单, 布局, 随机源=随机源))
+            for 序号 in range(房间数)]
+
+
+def 测量导出(导出函数, 房间列表):
+    """在临时目录中导出一次，返回 (耗时秒, 峰值内存字节, 文件大小字节)"""
+    with tempfile.TemporaryDirectory() as 临时目录:
+        路径 = os.path.join(临时目录, "座位表.xlsx")
+        开始 = time.perf_counter()
+        导出函数(路径, 房间列表)
+        耗时 = time.perf_counter() - 开始
+        文件大小 = os.path.getsize(路径)
+
+        # 峰值内存单独测一次，避免tracemalloc影响计时
+        tracemalloc.start()
+        导出函数(路径, 房间列表)
+        _, 峰值 = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return 耗时, 峰值, 文件大小
+
+
+def 对比导出(房间数列表):
+    """逐个房间数对比旧版导出与流式导出
+
+    返回:
+        list: [{"房间数", "旧版耗时", "旧版峰值内存", "流式耗时", "流式峰值内存", "文件大小"}, ...]
+    """
+    import 座位表导出
+
+    随机源 = random.Random(0)
+    结果 = []
+    for 房间数 in 房间数列表:
+        房间列表 = 生成房间(房间数, 随机源)
+        旧耗时, 旧峰值, _ = 测量导出(旧版导出, 房间列表)
+        新耗时, 新峰值, 文件大小 = 测量导出(座位表导出.导出座位表, 房间列表)
+        结果.append({
+            "房间数": 房间数,
+            "旧版耗时": 旧耗时,
+            "旧版峰值内存": 旧峰值,
+            "流式耗时": 新耗时,
+            "流式峰值内存": 新峰值,
+            "文件大小": 文件大小,
+        })
+    return 结果
+
+
+def 打印导出对比(结果):
+    print(f"{'房间数':>6} {'旧版耗时':>10} {'旧版峰值内存':>12} {'流式耗时':>10} {'流式峰值内存':>12} {'文件大小':>10}")
+    for 行 in 结果:
+        print(f"{行['房间数']:>6} {行['旧版耗时'] * 1000:>8.0f}ms {行['旧版峰值内存'] / 2**20:>10.1f}MB "
+              f"{行['流式耗时'] * 1000:>8.0f}ms {行['流式峰值内存'] / 2**20:>10.1f}MB "
+              f"{行['文件大小'] / 1024:>8.0f}KB")
+
+
+def 对比进程数(进程数列表, 学生数=15000, 考场座位数=40):
+    """多考场分配在不同进程数下的耗时
+
+    返回:
+        list: [{"进程数", "耗时", "每秒考场数"}, ...]
+    """
+    import 多考场分配
+
+    考场数 = -(-学生数 // 考场座位数)
+    考场列表 = [(f"{序号 + 1:03d}", 座位布局.网格(考场座位数)) for 序号 in range(考场数)]
+    学生名单 = 生成名单(学生数)
+    随机源 = random.Random(0)
+    指定排数安排 = {学生: [0, 1] for 学生 in 随机源.sample(学生名单, 学生数 // 20)}
+    结果 = []
+    for 进程数 in 进程数列表:
+        开始 = time.perf_counter()
+        多考场分配.多考场分配(学生名单, 考场列表, 指定排数安排, 种子=0, 进程数=进程数)
+        耗时 = time.perf_counter() - 开始
+        结果.append({"进程数": 进程数, "耗时": 耗时, "每秒考场数": 考场数 / 耗时})
+    return 结果
+
+
+def 打印进程数对比(结果):
+    print(f"{'进程数':>6} {'耗时':>10} {'每秒考场数':>10}")
+    for 行 in 结果:
+        print(f"{行['进程数']:>6} {行['耗时'] * 1000:>8.0f}ms {行['每秒考场数']:>10.0f}")
+
+
+def 对比候选方案(数量列表, 受限比例=0.3):
+    """默认教室、34名学生时批量生成K个方案与逐个分配K次的耗时
+
+    返回:
+        list: [{"方案数", "逐个分配", "批量生成", "加速比", "全部合法"}, ...]
+    """
+    import 候选方案
+
+    布局 = 默认布局()
+    学生名单 = list(引擎.默认学生名单)
+    指定排数安排 = 生成特殊安排(学生名单, 布局, 受限比例, random.Random(0))
+    随机源 = random.Random(0)
+    结果 = []
+    for 数量 in 数量列表:
+        开始 = time.perf_counter()
+        for _ in range(数量):
+            引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源)
+        逐个耗时 = time.perf_counter() - 开始
+        开始 = time.perf_counter()
+        方案 = 候选方案.生成候选方案(学生名单, 布局, 指定排数安排, 数量, 种子=0)
+        批量耗时 = time.perf_counter() - 开始
+        结果.append({
+            "方案数": 数量,
+            "逐个分配": 逐个耗时,
+            "批量生成": 批量耗时,
+            "加速比": 逐个耗时 / 批量耗时,
+            "全部合法": bool(候选方案.检查方案(方案, 学生名单, 布局, 指定排数安排).all()),
+        })
+    return 结果
+
+
+def 打印候选方案对比(结果):
+    print(f"{'方案数':>8} {'逐个分配':>10} {'批量生成':>10} {'加速比':>8} {'全部合法':>6}")
+    for 行 in 结果:
+        print(f"{行['方案数']:>8} {行['逐个分配'] * 1000:>10.1f}ms {行['批量生成'] * 1000:>10.1f}ms "
+              f"{行['加速比']:>8.1f}x {'是' if 行['全部合法'] else '否':>6}")
+
+
+def 生成成对约束(学生名单, 条数, 随机源=random):
+    """随机生成同桌、分开约束和一组分散约束（组内约占十分之一的约束条数）"""
+    数据 = []
+    组人数 = max(2, min(len(学生名单), int((条数 / 5) ** 0.5) + 1))
+    数据.append({"类型": "分散", "学生": 随机源.sample(学生名单, 组人数), "权重": 2})
+    已有 = 组人数 * (组人数 - 1) // 2
+    for _ in range(max(0, 条数 - 已有)):
+        类型 = "同桌" if 随机源.random() < 0.3 else "分开"
+        数据.append({"类型": 类型, "学生": 随机源.sample(学生名单, 2), "权重": 随机源.randint(1, 5)})
+    return 数据
+
+
+def 测量成对约束(规模列表, 条数列表):
+    """各规模下从一次随机分配出发做局部搜索，记录罚分和每秒移动数
+
+    返回:
+        list: [{"学生数", "约束数", "初始罚分", "最终罚分", "步数", "耗时", "每秒步数"}, ...]
+    """
+    import 座位约束
+    import 运行指标
+
+    结果 = []
+    for 学生数, 条数 in zip(规模列表, 条数列表):
+        布局 = 生成教室(学生数)
+        学生名单 = 生成名单(学生数)
+        随机源 = random.Random(0)
+        成对约束 = 座位约束.解析成对约束(生成成对约束(学生名单, 条数, 随机源))
+        初始 = 引擎.分配座位(学生名单, 布局, {}, 随机源)
+        with 运行指标.记录运行("成对约束") as 记录:
+            开始 = time.perf_counter()
+            _, 罚分 = 座位约束.优化(初始, 布局, 成对约束, 随机源=随机源)
+            耗时 = time.perf_counter() - 开始
+        步数 = 记录.计数器.get("局部搜索步数", 0)
+        结果.append({
+            "学生数": 学生数,
+            "约束数": len(成对约束),
+            "初始罚分": 座位约束.计算罚分(初始, 成对约束)[0],
+            "最终罚分": 罚分,
+            "步数": 步数,
+            "耗时": 耗时,
+            "每秒步数": 步数 / 耗时 if 耗时 else 0,
+        })
+    return 结果
+
+
+def 打印成对约束(结果):
+    print(f"{'学生数':>8} {'约束数':>8} {'初始罚分':>8} {'最终罚分':>8} {'步数':>10} {'耗时':>10} {'每分钟步数':>12}")
+    for 行 in 结果:
+        print(f"{行['学生数']:>8} {行['约束数']:>8} {行['初始罚分']:>8} {行['最终罚分']:>8} {行['步数']:>10} "
+              f"{行['耗时'] * 1000:>8.1f}ms {行['每秒步数'] * 60 / 1e6:>10.1f}M")
+
+
+def 对比修复(规模列表, 变化人数=3):
+    """各规模下从一次分配出发，加入、离开若干学生并修改一条指定排数，
+    对比 座位修复.修复座位() 与重新分配的耗时和换座人数
+
+    返回:
+        list: [{"座位数", "修复耗时", "修复移动数", "重新分配耗时", "重新分配移动数"}, ...]
+    """
+    import 座位修复
+
+    结果 = []
+    for 座位数 in 规模列表:
+        随机源 = random.Random(0)
+        布局 = 生成教室(座位数)
+        学生名单 = 生成名单(布局.座位数 - 变化人数)
+        指定排数安排 = 生成特殊安排(学生名单, 布局, 随机源=随机源)
+        分配结果 = 引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源)
+        原座位 = dict(分配结果)
+
+        离开 = 随机源.sample(学生名单, 变化人数)
+        加入 = [f"新学生{序号}" for 序号 in range(变化人数)]
+        变化学生 = 随机源.choice([学生 for 学生 in 学生名单 if 学生 not in 离开])
+        新安排 = dict(指定排数安排)
+        新安排[变化学生] = [布局.排号列表[0]]
+        新名单 = [学生 for 学生 in 学生名单 if 学生 not in 离开] + 加入
+
+        开始 = time.perf_counter()
+        移动列表 = 座位修复.修复座位(分配结果, 布局, 加入, 离开, 新安排, [变化学生], 随机源)
+        修复耗时 = time.perf_counter() - 开始
+        开始 = time.perf_counter()
+        重新分配 = 引擎.分配座位(新名单, 布局, 新安排, 随机源)
+        重新分配耗时 = time.perf_counter() - 开始
+        结果.append({
+            "座位数": 布局.座位数,
+            "修复耗时": 修复耗时,
+            "修复移动数": sum(新座位 is not None for _, _, 新座位 in 移动列表),
+            "重新分配耗时": 重新分配耗时,
+            "重新分配移动数": sum(原座位.get(学生) != 座位 for 学生, 座位 in 重新分配.items()),
+        })
+    return 结果
+
+
+def 打印修复对比(结果):
+    print(f"{'座位数':>8} {'修复耗时':>10} {'修复换座':>8} {'重新分配耗时':>12} {'重新分配换座':>12}")
+    for 行 in 结果:
+        print(f"{行['座位数']:>8} {行['修复耗时'] * 1000:>8.2f}ms {行['修复移动数']:>8} "
+              f"{行['重新分配耗时'] * 1000:>10.1f}ms {行['重新分配移动数']:>12}")
+
+
+def 测量考试模式(规模列表, 组数列表, 入座比例=0.95):
+    """各规模下按班级轮流分组生成名单，测量考试模式的求解耗时并检查相邻冲突
+
+    返回:
+        list: [{"座位数", "学生数", "组数", "尝试次数", "冲突数", "耗时"}, ...]，失败时耗时为None
+    """
+    import 考试模式
+    import 运行指标
+
+    结果 = []
+    for 座位数, 组数 in zip(规模列表, 组数列表):
+        布局 = 生成教室(座位数)
+        学生名单 = 生成名单(max(1, int(布局.座位数 * 入座比例)))
+        学生属性 = {学生: {"班级": f"{序号 % 组数}班"} for 序号, 学生 in enumerate(学生名单)}
+        with 运行指标.记录运行("考试模式") as 记录:
+            开始 = time.perf_counter()
+            try:
+                分配结果 = 考试模式.分配考试座位(学生名单, 布局, 学生属性, 随机源=random.Random(0))
+                耗时 = time.perf_counter() - 开始
+                冲突数 = len(考试模式.查找相邻冲突(分配结果, 布局, 学生属性))
+            except 引擎.分配失败错误:
+                耗时, 冲突数 = None, None
+        结果.append({"座位数": 布局.座位数, "学生数": len(学生名单), "组数": 组数,
+                   "尝试次数": 记录.计数器.get("尝试次数", 0), "冲突数": 冲突数, "耗时": 耗时})
+    return 结果
+
+
+def 打印考试模式(结果):
+    print(f"{'座位数':>8} {'学生数':>8} {'组数':>6} {'尝试次数':>8} {'冲突数':>6} {'耗时':>10}")
+    for 行 in 结果:
+        耗时 = f"{行['耗时'] * 1000:>8.1f}ms" if 行["耗时"] is not None else f"{'失败':>8}"
+        冲突数 = 行["冲突数"] if 行["冲突数"] is not None else "-"
+        print(f"{行['座位数']:>8} {行['学生数']:>8} {行['组数']:>6} {行['尝试次数']:>8} {冲突数:>6} {耗时}")
+
+
+def 测量安排内存(规模列表, 数量=100):
+    """各规模下保存若干个随机座位安排，用tracemalloc测量每个安排的平均内存
+
+    名单索引和布局由全部座位向量共用，只计一次，单独列出。
+
+    返回:
+        list: [{"学生数", "安排数", "分配表", "座位向量", "名单索引", "倍数"}, ...]，内存单位为字节
+    """
+    from 座位分配表 import 座位分配表
+    from 座位向量 import 名单索引, 座位向量
+
+    结果 = []
+    for 座位数 in 规模列表:
+        随机源 = random.Random(0)
+        布局 = 生成教室(座位数)
+        学生名单 = 生成名单(布局.座位数)
+        安排列表 = []
+        for _ in range(数量):
+            座位列表 = list(布局.座位列表)
+            随机源.shuffle(座位列表)
+            安排列表.append(座位列表)
+
+        tracemalloc.start()
+        开始 = tracemalloc.get_traced_memory()[0]
+        分配表列表 = [座位分配表(dict(zip(学生名单, 座位列表))) for 座位列表 in 安排列表]
+        分配表内存 = tracemalloc.get_traced_memory()[0] - 开始
+
+        开始 = tracemalloc.get_traced_memory()[0]
+        索引 = 名单索引(学生名单)
+        索引内存 = tracemalloc.get_traced_memory()[0] - 开始
+        开始 = tracemalloc.get_traced_memory()[0]
+        向量列表 = [座位向量.从分配表(分配表, 布局, 索引) for 分配表 in 分配表列表]
+        向量内存 = tracemalloc.get_traced_memory()[0] - 开始
+        tracemalloc.stop()
+        if any(dict(向量.items()) != dict(分配表) for 向量, 分配表 in zip(向量列表[:3], 分配表列表)):
+            raise AssertionError("座位向量与分配表内容不一致")
+        del 分配表列表, 向量列表
+
+        结果.append({"学生数": len(学生名单), "安排数": 数量, "分配表": 分配表内存 / 数量,
+                   "座位向量": 向量内存 / 数量, "名单索引": 索引内存, "倍数": 分配表内存 / 向量内存})
+    return 结果
+
+
+def 打印安排内存(结果):
+    print(f"{'学生数':>8} {'安排数':>6} {'分配表/个':>12} {'座位向量/个':>12} {'名单索引':>10} {'倍数':>6}")
+    for 行 in 结果:
+        print(f"{行['学生数']:>8} {行['安排数']:>6} {行['分配表'] / 1024:>10.1f}KB "
+              f"{行['座位向量'] / 1024:>10.1f}KB {行['名单索引'] / 1024:>8.1f}KB {行['倍数']:>6.1f}")
+
+
+def 测量服务(并发数列表, 请求数=2000, 工作数=None, 学生数=34):
+    """在本机启动座位服务，各并发数下用保持连接的客户端线程请求 /allocate
+
+    每个请求的种子不同，座位布局和约束相同（命中工作进程的缓存），并检查每个响应的座位数。
+
+    返回:
+        list: [{"并发数", "请求数", "耗时", "每秒请求数", "平均延迟", "最大延迟"}, ...]
+    """
+    import http.client
+    import threading
+
+    import 座位服务
+
+    布局 = 生成教室(学生数)
+    学生名单 = 生成名单(学生数)
+    请求 = {"学生名单": 学生名单, "座位布局": 布局.转为配置(),
+          "指定排数安排": 生成特殊安排(学生名单, 布局, 随机源=random.Random(0))}
+    服务 = 座位服务.座位服务(("127.0.0.1", 0), 工作数)
+    服务.后台运行()
+    结果 = []
+    try:
+        for 并发数 in 并发数列表:
+            延迟列表 = []
+            错误列表 = []
+            锁 = threading.Lock()
+
+            def 客户端(编号):
+                连接 = http.client.HTTPConnection("127.0.0.1", 服务.端口, timeout=60)
+                本线程延迟 = []
+                try:
+                    for 序号 in range(编号, 请求数, 并发数):
+                        正文 = json.dumps(dict(请求, 种子=序号), ensure_ascii=False).encode("utf-8")
+                        开始 = time.perf_counter()
+                        连接.request("POST", "/allocate", 正文, {"Content-Type": "application/json"})
+                        响应 = 连接.getresponse()
+                        数据 = json.loads(响应.read())
+                        本线程延迟.append(time.perf_counter() - 开始)
+                        if 响应.status != 200 or len(数据["座位"]) != 学生数:
+                            raise AssertionError(f"响应错误: {响应.status} {数据.get('错误')}")
+                except Exception as e:
+                    with 锁:
+                        错误列表.append(e)
+                finally:
+                    连接.close()
+                    with 锁:
+                        延迟列表.extend(本线程延迟)
+
+            线程列表 = [threading.Thread(target=客户端, args=(编号,)) for 编号 in range(并发数)]
+            开始 = time.perf_counter()
+            for 线程 in 线程列表:
+                线程.start()
+            for 线程 in 线程列表:
+                线程.join()
+            耗时 = time.perf_counter() - 开始
+            if 错误列表:
+                raise 错误列表[0]
+            结果.append({"并发数": 并发数, "请求数": len(延迟列表), "耗时": 耗时,
+                       "每秒请求数": len(延迟列表) / 耗时, "平均延迟": sum(延迟列表) / len(延迟列表),
+                       "最大延迟": max(延迟列表)})
+    finally:
+        服务.停止()
+    return 结果
+
+
+def 打印服务(结果):
+    print(f"{'并发数':>6} {'请求数':>8} {'每秒请求数':>10} {'平均延迟':>10} {'最大延迟':>10}")
+    for 行 in 结果:
+        print(f"{行['并发数']:>6} {行['请求数']:>8} {行['每秒请求数']:>10.0f} "
+              f"{行['平均延迟'] * 1000:>8.1f}ms {行['最大延迟'] * 1000:>8.1f}ms")
+
+
+阶段列表 = ["读取名单", "验证特殊安排", "分配座位", "界面更新", "导出Excel"]
+
+
+class _替身控件:
+    """没有显示器时代替tk控件，只接受config()调用"""
+    def config(self, **参数):
+        pass
+
+    configure = config
+
+
+def _创建界面(布局, 学生名单, 临时目录):
+    """创建用于测量界面更新的座位分配界面
+
+    参数:
+        临时目录: 修改日志（见 状态日志）写在这里，不改动程序目录中的特殊安排
+
+    返回:
+        tuple: (界面对象, 刷新函数, 模式)；模式为 "tk" 或 "stub"，没有tkinter时返回None
+    """
+    try:
+        import tkinter as tk
+        import 座位分配 as 界面
+        import 撤销记录
+        import 状态日志
+        from 座位分配表 import 座位分配表
+    except ImportError:
+        return None
+    特殊安排路径 = os.path.join(临时目录, 引擎.特殊安排文件)
+
+    class 测试界面(界面.座位分配):
+        """使用合成数据的界面，不读取也不创建任何配置文件"""
+        使用启动缓存 = False
+
+        def 加载学生名单(self):
+            return list(学生名单)
+
+        def 加载座位布局(self):
+            return 布局
+
+        def 加载特殊安排(self):
+            self.指定排数安排 = {}
+            self.状态日志 = 状态日志.状态日志(特殊安排路径)
+
+        def 加载管理员密码(self):
+            return "admin"
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        # 没有显示器：跳过控件创建，用替身控件执行同一段界面更新代码
+        应用 = 测试界面.__new__(测试界面)
+        应用.布局 = 布局
+        应用.座位标签 = [[_替身控件() if 布局.是座位(行, 列) else None for 列 in range(布局.列数)]
+                     for 行 in range(布局.行数)]
+        应用.状态标签 = _替身控件()
+        应用.指定排数安排 = {}
+        应用.成对约束 = []
+        应用.状态日志 = 状态日志.状态日志(特殊安排路径)
+        应用.撤销栈 = 撤销记录.撤销栈(座位分配表(), 布局)
+        应用.方案待记录 = False
+        return 应用, lambda: None, "stub"
+
+    root.withdraw()
+    应用 = 测试界面(root)
+    # 画布视图在空闲时才重绘，update_idletasks()把重绘计入界面更新的耗时
+    return 应用, root.update_idletasks, "tk"
+
+
+def 测量阶段(学生数, 重复次数=3, 随机源=None):
+    """测量一个规模下各阶段的耗时（秒），无法测量的阶段为None
+
+    返回:
+        dict: {"学生数", "座位数", "界面模式", "阶段": {阶段名: 耗时}}
+    """
+    随机源 = 随机源 or random.Random(0)
+    布局 = 生成教室(学生数)
+    学生名单 = 生成名单(学生数)
+    指定排数安排 = 生成特殊安排(学生名单, 布局, 随机源=随机源)
+    阶段 = dict.fromkeys(阶段列表)
+
+    def 测(函数):
+        return 计时(函数, 最少重复=重复次数)
+
+    with tempfile.TemporaryDirectory() as 临时目录:
+        名单路径 = os.path.join(临时目录, 引擎.学生名单文件)
+        特殊安排路径 = os.path.join(临时目录, 引擎.特殊安排文件)
+        with open(名单路径, "w", encoding="utf-8") as f:
+            json.dump(学生名单, f, ensure_ascii=False, indent=4)
+        with open(特殊安排路径, "w", encoding="utf-8") as f:
+            json.dump({"指定排数安排": 指定排数安排}, f, ensure_ascii=False, indent=4)
+
+        阶段["读取名单"] = 测(lambda: (引擎.读取学生名单(名单路径), 引擎.读取特殊安排(特殊安排路径)))
+        阶段["验证特殊安排"] = 测(lambda: 引擎.验证特殊安排(学生名单, 布局, 指定排数安排))
+        阶段["分配座位"] = 测(lambda: 引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源))
+        分配结果 = 引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源)
+
+        界面模式 = None
+        界面 = _创建界面(布局, 学生名单, 临时目录)
+        if 界面 is not None:
+            应用, 刷新, 界面模式 = 界面
+            try:
+                阶段["界面更新"] = 测(lambda: (应用.显示分配结果(分配结果, 0), 刷新()))
+            finally:
+                应用.状态日志.关闭()
+                if 界面模式 == "tk":
+                    应用.root.destroy()
+
+        try:
+            import 座位表导出
+        except ImportError:
+            pass
+        else:
+            导出路径 = os.path.join(临时目录, "座位表.xlsx")
+            阶段["导出Excel"] = 测(lambda: 座位表导出.导出座位表(导出路径, [(None, 布局, 分配结果)]))
+
+    return {"学生数": 学生数, "座位数": 布局.座位数, "界面模式": 界面模式, "阶段": 阶段}
+
+
+def 测量全部阶段(规模列表, 重复次数=3):
+    """逐个规模测量各阶段耗时，返回可直接保存为JSON的结果"""
+    return {
+        "时间": datetime.datetime.now().isoformat(timespec="seconds"),
+        "环境": {"python": platform.python_version(), "平台": platform.platform()},
+        "结果": [测量阶段(学生数, 重复次数) for 学生数 in 规模列表],
+    }
+
+
+def 对比基准(当前, 基准, 容差=0.25, 最小差值=0.001):
+    """与基准结果逐个规模、逐个阶段对比
+
+    参数:
+        当前, 基准: 测量全部阶段() 的结果
+        容差: 允许的相对变慢比例
+        最小差值: 绝对差值小于该秒数时不视为退化，避免毫秒以下的抖动误报
+
+    返回:
+        list: [{"学生数", "阶段", "基准", "当前", "比值", "退化"}, ...]，只包含两边都有的项
+    """
+    基准表 = {行["学生数"]: 行["阶段"] for 行 in 基准.get("结果", [])}
+    对比 = []
+    for 行 in 当前["结果"]:
+        基准阶段 = 基准表.get(行["学生数"])
+        if 基准阶段 is None:
+            continue
+        for 阶段名 in 阶段列表:
+            旧, 新 = 基准阶段.get(阶段名), 行["阶段"].get(阶段名)
+            if 旧 is None or 新 is None:
+                continue
+            对比.append({
+                "学生数": 行["学生数"],
+                "阶段": 阶段名,
+                "基准": 旧,
+                "当前": 新,
+                "比值": 新 / 旧 if 旧 else None,
+                "退化": 新 > 旧 * (1 + 容差) and 新 - 旧 > 最小差值,
+            })
+    return 对比
+
+
+def 打印阶段(结果):
+    print(f"{'学生数':>8} " + " ".join(f"{名:>10}" for 名 in 阶段列表))
+    for 行 in 结果["结果"]:
+        单元 = ["-" if 行["阶段"][名] is None else f"{行['阶段'][名] * 1000:.2f}ms" for 名 in 阶段列表]
+        print(f"{行['学生数']:>8} " + " ".join(f"{值:>14}" for 值 in 单元))
+    模式 = {行["界面模式"] for 行 in 结果["结果"]}
+    if "stub" in 模式:
+        print("（没有显示器，界面更新使用替身控件测量）")
+
+
+def 打印基准对比(对比):
+    print(f"{'学生数':>8} {'阶段':>10} {'基准':>12} {'当前':>12} {'比值':>8}")
+    for 行 in 对比:
+        比值 = "-" if 行["比值"] is None else f"{行['比值']:.2f}"
+        标记 = "  <-- 退化" if 行["退化"] else ""
+        print(f"{行['学生数']:>8} {行['阶段']:>10} {行['基准'] * 1000:>10.2f}ms "
+              f"{行['当前'] * 1000:>10.2f}ms {比值:>8}{标记}")
+
+
+def 主程序(参数列表=None):
+    解析器 = argparse.ArgumentParser(description="座位分配性能测试")
+    解析器.add_argument("suite", nargs="?",
+                        choices=["allocate", "export", "multiroom", "candidates", "pairs", "repair", "exam",
+                                 "memory", "service", "stages"],
+                        default="allocate",
+                        help="测试项目：allocate为分配算法，export为Excel导出，multiroom为多考场并行分配，"
+                             "candidates为批量生成候选方案，pairs为成对约束局部搜索，repair为最少移动调整，"
+                             "exam为考试模式，memory为保存座位安排的内存占用，service为本机HTTP服务吞吐量，"
+                             "stages为各阶段耗时及基准对比")
+    解析器.add_argument("--sizes", nargs="+", type=int, default=默认规模, help="测试的座位数（stages中为学生数）")
+    解析器.add_argument("--legacy-limit", type=int, default=10000,
+                        help="旧算法实际运行的最大座位数，更大的规模按平方复杂度估算")
+    解析器.add_argument("--rooms", nargs="+", type=int, default=默认房间数, help="导出测试的房间数")
+    解析器.add_argument("--jobs", nargs="+", type=int, default=[1, 2, 4, 8],
+                        help="多考场测试的进程数；service中只用第一个作为工作进程数，默认为CPU核数")
+    解析器.add_argument("--counts", nargs="+", type=int, default=None,
+                        help="candidates中的方案数，默认为 1 100 10000；memory和service中只用第一个，"
+                             "默认为100个安排和2000个请求")
+    解析器.add_argument("--rules", nargs="+", type=int, default=None,
+                        help="pairs中与 --sizes 一一对应的成对约束条数，默认为 20 300 800")
+    解析器.add_argument("--groups", nargs="+", type=int, default=None,
+                        help="exam中与 --sizes 一一对应的分组数，默认为 4 10 20")
+    解析器.add_argument("--clients", nargs="+", type=int, default=[1, 8, 32], help="service中的并发客户端数")
+    解析器.add_argument("--repeat", type=int, default=3, help="stages中每个阶段至少重复的次数，取最快一次")
+    解析器.add_argument("-o", "--output", default=None, metavar="结果.json", help="stages结果保存为JSON")
+    解析器.add_argument("--baseline", default=None, metavar="基准.json", help="与保存的stages结果对比")
+    解析器.add_argument("--tolerance", type=float, default=0.25, help="允许的相对变慢比例，默认0.25")
+    解析器.add_argument("--min-delta", type=float, default=0.001, help="视为退化的最小绝对差值（秒）")
+    参数 = 解析器.parse_args(参数列表)
+    if 参数.suite == "export":
+        打印导出对比(对比导出(参数.rooms))
+    elif 参数.suite == "multiroom":
+        打印进程数对比(对比进程数(参数.jobs))
+    elif 参数.suite == "candidates":
+        打印候选方案对比(对比候选方案(参数.counts or [1, 100, 10000]))
+    elif 参数.suite == "pairs":
+        规模列表 = [34, 300, 1000] if 参数.sizes == 默认规模 else 参数.sizes
+        条数列表 = 参数.rules or [20, 300, 800]
+        if len(条数列表) != len(规模列表):
+            解析器.error("--rules 的个数必须与 --sizes 相同")
+        打印成对约束(测量成对约束(规模列表, 条数列表))
+    elif 参数.suite == "repair":
+        打印修复对比(对比修复(参数.sizes))
+    elif 参数.suite == "exam":
+        规模列表 = [34, 600, 2000] if 参数.sizes == 默认规模 else 参数.sizes
+        组数列表 = 参数.groups or [4, 10, 20]
+        if len(组数列表) != len(规模列表):
+            解析器.error("--groups 的个数必须与 --sizes 相同")
+        打印考试模式(测量考试模式(规模列表, 组数列表))
+    elif 参数.suite == "memory":
+        打印安排内存(测量安排内存(参数.sizes, (参数.counts or [100])[0]))
+    elif 参数.suite == "service":
+        工作数 = None if 参数.jobs == [1, 2, 4, 8] else 参数.jobs[0]
+        打印服务(测量服务(参数.clients, (参数.counts or [2000])[0], 工作数))
+    elif 参数.suite == "stages":
+        结果 = 测量全部阶段(参数.sizes, 参数.repeat)
+        打印阶段(结果)
+        if 参数.output:
+            with open(参数.output, "w", encoding="utf-8") as f:
+                json.dump(结果, f, ensure_ascii=False, indent=4)
+            print(f"结果已保存到 {参数.output}")
+        if 参数.baseline:
+            with open(参数.baseline, "r", encoding="utf-8") as f:
+                基准 = json.load(f)
+            对比 = 对比基准(结果, 基准, 参数.tolerance, 参数.min_delta)
+            打印基准对比(对比)
+            退化数 = sum(行["退化"] for 行 in 对比)
+            if 退化数:
+                print(f"发现{退化数}项性能退化", file=sys.stderr)
+                return 1
+            print("没有发现性能退化")
+    else:
+        打印对比(对比座位池(参数.sizes, 参数.legacy_limit))
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # service测试使用进程池
+    sys.exit(主程序())
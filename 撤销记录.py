@@ -0,0 +1,210 @@
+"""座位修改的撤销和重做
+
+互换座位、调整座位都直接修改当前的分配表。这里把每次修改记成一个很小的增量，
+不保存整张座位表的副本：
+- 一次操作是 ((学生, 原座位序号, 新座位序号), ...)，座位序号为在 布局.座位列表 中的下标，
+  -1 表示没有座位；互换是两项，调整座位是移动过的那几名学生
+- 一步由一次或几次操作组成，组合() 中的全部操作合成一步，一次撤销
+- 撤销时倒序应用各次操作、原座位和新座位对调；跳到() 可以撤销或重做到任意一步，
+  耗时只与经过的操作大小成正比
+
+撤销栈不依赖界面，无界面的脚本也可以使用：
+
+    栈 = 撤销栈(分配结果, 布局)
+    栈.互换("张三", "李四")
+    with 栈.组合("两组同桌对调"):
+        栈.互换("王五", "赵六")
+        栈.互换("孙七", "周八")
+    栈.撤销()          # 撤销两组同桌对调
+    栈.跳到(0)         # 回到最初的座位
+"""
+from contextlib import contextmanager
+
+默认上限 = 1000  # 最多保留的步数，超过时丢弃最早的
+
+
+def 互换对(操作):
+    """操作恰好是两名学生互换座位时返回 (学生1, 学生2)，否则返回None
+
+    参数:
+        操作: [(学生, 原座位, 新座位), ...]
+    """
+    if len(操作) != 2:
+        return None
+    (学生1, 原1, 新1), (学生2, 原2, 新2) = 操作
+    if 原1 is None or 原2 is None or 原1 != 新2 or 原2 != 新1:
+        return None
+    return 学生1, 学生2
+
+
+class 撤销栈:
+    """记录分配表上的修改，支持撤销、重做和跳到任意一步
+
+    主要方法：
+    - 互换(): 互换两名学生并记录
+    - 修复座位(): 调用 座位修复.修复座位() 并记录
+    - 记录(): 记录已经在分配表上完成的修改
+    - 组合(): 把多次修改合成一步
+    - 撤销()、重做()、跳到()
+    """
+    def __init__(self, 分配结果, 布局, 上限=默认上限):
+        """
+        参数:
+            分配结果: 座位分配表或座位向量，撤销和重做直接修改它
+            布局: 座位布局
+            上限: 最多保留的步数
+        """
+        self.分配结果 = 分配结果
+        self.布局 = 布局
+        self.上限 = 上限
+        self._步骤 = []  # [(说明, (操作, ...)), ...]
+        self.位置 = 0  # 已应用的步数，撤销时减少，重做时增加
+        self._组合操作 = None  # 组合() 中收集的操作
+
+    def __len__(self):
+        return len(self._步骤)
+
+    @property
+    def 可以撤销(self):
+        return self.位置 > 0
+
+    @property
+    def 可以重做(self):
+        return self.位置 < len(self._步骤)
+
+    def 说明列表(self):
+        """每一步的说明，下标i为第i+1步"""
+        return [说明 for 说明, _ in self._步骤]
+
+    def 重置(self, 分配结果=None):
+        """清空全部步骤，换成新的座位时使用"""
+        if 分配结果 is not None:
+            self.分配结果 = 分配结果
+        self._步骤.clear()
+        self.位置 = 0
+        self._组合操作 = None
+
+    def _序号(self, 座位):
+        return -1 if 座位 is None else self.布局.序号(*座位)
+
+    def _座位(self, 序号):
+        return None if 序号 < 0 else self.布局.座位列表[序号]
+
+    def 记录(self, 移动列表, 说明=""):
+        """记录一次已经在分配表上完成的修改
+
+        参数:
+            移动列表: [(学生, 原座位, 新座位), ...]，座位为 (行, 列) 或None，
+                与 座位修复.修复座位() 的返回值相同
+            说明: 这一步的说明；在 组合() 中时忽略
+        """
+        操作 = tuple((学生, self._序号(原座位), self._序号(新座位)) for 学生, 原座位, 新座位 in 移动列表)
+        if not 操作:
+            return
+        if self._组合操作 is not None:
+            self._组合操作.append(操作)
+        else:
+            self._压入(说明, (操作,))
+
+    def _压入(self, 说明, 操作列表):
+        # 撤销之后再修改，被撤销的步骤不能再重做
+        del self._步骤[self.位置:]
+        self._步骤.append((说明, 操作列表))
+        if len(self._步骤) > self.上限:
+            del self._步骤[:len(self._步骤) - self.上限]
+        self.位置 = len(self._步骤)
+
+    def 互换(self, 学生1, 学生2, 说明=None):
+        """互换两名学生的座位并记录
+
+        返回:
+            tuple: (学生1的新座位, 学生2的新座位)
+        """
+        新座位1, 新座位2 = self.分配结果.互换(学生1, 学生2)
+        self.记录([(学生1, 新座位2, 新座位1), (学生2, 新座位1, 新座位2)], 说明 or f"互换{学生1}和{学生2}")
+        return 新座位1, 新座位2
+
+    def 修复座位(self, 加入=(), 离开=(), 指定排数安排=None, 变化学生=None, 随机源=None, 说明="调整座位"):
+        """调用 座位修复.修复座位() 并把移动记为一步，参数和返回值相同"""
+        import 座位修复
+        移动列表 = 座位修复.修复座位(self.分配结果, self.布局, 加入, 离开, 指定排数安排, 变化学生, 随机源)
+        self.记录(移动列表, 说明)
+        return 移动列表
+
+    @contextmanager
+    def 组合(self, 说明):
+        """其中的全部修改合成一步
+
+        嵌套使用时并入最外层；中途出错时撤销已经完成的部分，不记录。
+        """
+        if self._组合操作 is not None:
+            yield
+            return
+        self._组合操作 = 操作列表 = []
+        try:
+            yield
+        except BaseException:
+            self._组合操作 = None
+            self._应用(操作列表, 撤销=True)
+            raise
+        self._组合操作 = None
+        if 操作列表:
+            self._压入(说明, tuple(操作列表))
+
+    def _应用(self, 操作列表, 撤销=False):
+        """依次应用各次操作，撤销时倒序并把原座位和新座位对调
+
+        每次操作内的移动同时生效：先让所有移动的学生离座，再坐到目标座位。
+
+        返回:
+            list: 每次操作实际的 [(学生, 原座位, 新座位), ...]
+        """
+        分配结果 = self.分配结果
+        结果 = []
+        for 操作 in reversed(操作列表) if 撤销 else 操作列表:
+            移动列表 = [(学生, self._座位(新), self._座位(原)) if 撤销 else (学生, self._座位(原), self._座位(新))
+                    for 学生, 原, 新 in 操作]
+            for 学生, 原座位, _ in 移动列表:
+                if 原座位 is not None and 学生 in 分配结果:
+                    分配结果.移除(学生)
+            for 学生, _, 新座位 in 移动列表:
+                if 新座位 is not None:
+                    分配结果.放置(学生, 新座位)
+            结果.append(移动列表)
+        return 结果
+
+    def 撤销(self):
+        """撤销一步
+
+        返回:
+            list: 每次操作实际的 [(学生, 原座位, 新座位), ...]；没有可撤销的步骤时为空列表
+        """
+        if not self.可以撤销:
+            return []
+        self.位置 -= 1
+        return self._应用(self._步骤[self.位置][1], 撤销=True)
+
+    def 重做(self):
+        """重做一步，返回值同 撤销()"""
+        if not self.可以重做:
+            return []
+        self.位置 += 1
+        return self._应用(self._步骤[self.位置 - 1][1])
+
+    def 跳到(self, 位置):
+        """撤销或重做到第 位置 步之后的状态（0为最初的座位）
+
+        返回:
+            list: 经过的全部操作，格式同 撤销()
+
+        异常:
+            ValueError: 位置超出范围
+        """
+        if not 0 <= 位置 <= len(self._步骤):
+            raise ValueError(f"位置应在0到{len(self._步骤)}之间")
+        结果 = []
+        while self.位置 > 位置:
+            结果 += self.撤销()
+        while self.位置 < 位置:
+            结果 += self.重做()
+        return 结果
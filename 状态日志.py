@@ -0,0 +1,214 @@
+"""特殊安排和当前座位的追加日志
+
+原来每次修改特殊安排都重写整个 特殊安排.json，关闭程序后当前座位也会丢失。
+现在把 特殊安排.json 作为快照，另用一个只追加的日志文件（JSON Lines，每行一次修改）：
+- 设置排数、添加成对约束、导入或清除约束、分配座位、互换座位、调整座位都只追加一行
+- 日志达到一定行数或程序关闭时压缩：把当前状态写成新的快照（先写临时文件再替换），再清空日志
+- 启动时读取快照，只重放日志中序号大于快照中 "日志序号" 的记录
+
+每条记录带递增的序号。压缩时先替换快照、后清空日志，两步之间中断也不会重复应用：
+旧记录的序号不大于新快照的日志序号，重放时会跳过。写到一半的最后一行（程序中途被关闭）
+在读取时忽略，并在下次追加前截掉。
+
+打包为单文件exe时程序目录是每次启动都不同、退出时删除的临时解压目录，快照和日志改为保存在
+用户数据目录（见 数据目录()），打包附带的 特殊安排.json 只作为第一次运行时的初始内容。
+
+快照（特殊安排.json）中除原有的 "指定排数安排"、"成对约束" 外，还有：
+    "当前座位": {学生: [行, 列]}, "日志序号": 最后一条已并入快照的记录序号
+"""
+import json
+import os
+import sys
+
+import 座位分配引擎 as 引擎
+
+日志文件名 = "特殊安排日志.jsonl"
+默认压缩阈值 = 200  # 日志达到多少行时压缩为快照
+
+# 操作类型
+设置排数 = "设置排数"
+添加成对约束 = "添加成对约束"
+替换约束 = "替换约束"
+设置座位 = "设置座位"
+互换 = "互换"
+移动 = "移动"
+
+
+def 数据目录():
+    """保存快照和日志的可写目录
+
+    打包为exe时为用户数据目录（与 座位历史.默认历史路径() 相同），否则为程序所在目录
+    """
+    if not getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(__file__))
+    if sys.platform == "win32":
+        基础目录 = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        基础目录 = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(基础目录, "座位分配系统")
+
+
+def 默认快照路径():
+    """界面和 约束导入 命令行默认使用的 特殊安排.json 路径"""
+    return os.path.join(数据目录(), 引擎.特殊安排文件)
+
+
+def 日志路径(快照路径):
+    """快照文件对应的日志文件，放在同一目录"""
+    return os.path.join(os.path.dirname(os.path.abspath(快照路径)), 日志文件名)
+
+
+def 初始状态(快照数据):
+    """从快照内容得到状态字典 {"指定排数安排", "成对约束", "当前座位"}"""
+    return {
+        "指定排数安排": dict(快照数据.get("指定排数安排", {})),
+        "成对约束": list(快照数据.get("成对约束", [])),
+        "当前座位": {学生: tuple(座位) for 学生, 座位 in 快照数据.get("当前座位", {}).items()},
+    }
+
+
+def 应用(状态, 记录):
+    """把一条日志记录应用到状态字典上"""
+    操作 = 记录["操作"]
+    座位表 = 状态["当前座位"]
+    if 操作 == 设置排数:
+        状态["指定排数安排"][记录["学生"]] = 记录["排数"]
+    elif 操作 == 添加成对约束:
+        状态["成对约束"].append(记录["约束"])
+    elif 操作 == 替换约束:
+        状态["指定排数安排"] = dict(记录["指定排数安排"])
+        状态["成对约束"] = list(记录["成对约束"])
+    elif 操作 == 设置座位:
+        状态["当前座位"] = {学生: tuple(座位) for 学生, 座位 in 记录["座位"].items()}
+    elif 操作 == 互换:
+        学生1, 学生2 = 记录["学生"]
+        if 学生1 in 座位表 and 学生2 in 座位表:
+            座位表[学生1], 座位表[学生2] = 座位表[学生2], 座位表[学生1]
+    elif 操作 == 移动:
+        for 学生, _, 新座位 in 记录["移动"]:
+            if 新座位 is None:
+                座位表.pop(学生, None)
+            else:
+                座位表[学生] = tuple(新座位)
+    else:
+        raise ValueError(f"未知的日志操作: {操作}")
+
+
+def 读取日志(路径, 起始序号=0):
+    """读取日志中序号大于起始序号的记录
+
+    返回:
+        tuple: (记录列表, 行数, 有效长度)
+        - 行数: 日志中完整记录的总行数（含已并入快照的旧记录），用于判断何时压缩
+        - 有效长度: 最后一条完整记录结束处的字节数，之后是写到一半的内容
+    """
+    记录列表 = []
+    行数 = 0
+    有效长度 = 0
+    if not os.path.exists(路径):
+        return 记录列表, 行数, 有效长度
+    with open(路径, "rb") as f:
+        for 行 in f:
+            if not 行.endswith(b"\n"):
+                break  # 写到一半的最后一行
+            try:
+                记录 = json.loads(行)
+            except ValueError:
+                break
+            有效长度 += len(行)
+            行数 += 1
+            if 记录.get("序号", 0) > 起始序号:
+                记录列表.append(记录)
+    return 记录列表, 行数, 有效长度
+
+
+class 状态日志:
+    """特殊安排快照加追加日志
+
+    主要方法：
+    - 打开(): 读取快照之后的日志记录并准备追加
+    - 追加(): 追加一条修改记录，立即写入磁盘
+    - 压缩(): 把当前状态写成快照并清空日志
+    """
+    def __init__(self, 快照路径, 序号=0, 行数=0, 有效长度=None, 压缩阈值=默认压缩阈值):
+        """
+        参数:
+            快照路径: 特殊安排.json 的路径，日志放在同一目录
+            序号: 最后一条记录的序号
+            行数: 日志中已有的行数
+            有效长度: 日志有效内容的字节数，之后的残缺内容在第一次追加前截掉
+            压缩阈值: 日志达到多少行时 需要压缩 为True
+        """
+        self.快照路径 = 快照路径
+        self.日志路径 = 日志路径(快照路径)
+        self.序号 = 序号
+        self.行数 = 行数
+        self.压缩阈值 = 压缩阈值
+        self.有效长度 = 有效长度
+        self._文件 = None
+
+    @classmethod
+    def 打开(cls, 快照路径, 快照数据, 压缩阈值=默认压缩阈值):
+        """读取快照之后的日志记录
+
+        参数:
+            快照数据: 已读取的快照内容（特殊安排.json 解析后的字典）
+
+        返回:
+            tuple: (状态日志, 需要重放的记录列表)
+        """
+        起始序号 = 快照数据.get("日志序号", 0)
+        记录列表, 行数, 有效长度 = 读取日志(日志路径(快照路径), 起始序号)
+        序号 = 记录列表[-1]["序号"] if 记录列表 else 起始序号
+        return cls(快照路径, 序号, 行数, 有效长度, 压缩阈值), 记录列表
+
+    @property
+    def 需要压缩(self):
+        return self.行数 >= self.压缩阈值
+
+    def 追加(self, 操作, **内容):
+        """追加一条记录并立即写入磁盘
+
+        异常:
+            OSError: 日志文件无法写入
+        """
+        if self._文件 is None:
+            os.makedirs(os.path.dirname(self.日志路径), exist_ok=True)
+            self._文件 = open(self.日志路径, "ab")
+            if self.有效长度 is not None and self._文件.tell() > self.有效长度:
+                self._文件.truncate(self.有效长度)
+                self._文件.seek(self.有效长度)
+        记录 = {"序号": self.序号 + 1, "操作": 操作, **内容}
+        self._文件.write(json.dumps(记录, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._文件.flush()
+        os.fsync(self._文件.fileno())
+        self.序号 += 1
+        self.行数 += 1
+        self.有效长度 = self._文件.tell()
+
+    def 压缩(self, 指定排数安排, 成对约束, 当前座位=None):
+        """把当前状态写成快照（原子替换），然后清空日志
+
+        参数:
+            当前座位: {学生: (行, 列)}，为空时不保存座位
+
+        异常:
+            OSError: 快照或日志无法写入；快照替换成功前原文件保持不变
+        """
+        os.makedirs(os.path.dirname(self.日志路径), exist_ok=True)
+        附加 = {"日志序号": self.序号}
+        if 当前座位:
+            附加["当前座位"] = {学生: list(座位) for 学生, 座位 in 当前座位.items()}
+        引擎.写入特殊安排(self.快照路径, 指定排数安排, 成对约束, 附加)
+        self.关闭()
+        # 快照已包含全部记录，此后即使清空失败，重放时也会按序号跳过旧记录
+        if os.path.exists(self.日志路径):
+            with open(self.日志路径, "wb"):
+                pass
+        self.行数 = 0
+        self.有效长度 = None
+
+    def 关闭(self):
+        if self._文件 is not None:
+            self._文件.close()
+            self._文件 = None
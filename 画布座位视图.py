@@ -0,0 +1,197 @@
+"""基于Canvas的座位视图
+
+大教室（上千个座位）如果每个座位一个tk.Label，创建和刷新都要好几秒。这里改为：
+- 整个座位区只用一个tk.Canvas，只绘制当前可见区域内的座位
+- 支持滚动条、鼠标滚轮滚动，Ctrl+滚轮或按钮缩放
+- 座位的文字和颜色保存在字典中，多次修改合并为一次重绘（after_idle）
+- 点击位置通过坐标计算得到行列，不需要为每个座位绑定事件
+
+为了与原来的标签网格兼容，标签(行, 列) 返回一个带 config() 方法的轻量对象，
+界面代码可以照常写 self.座位标签[行][列].config(text=..., bg=...)。
+"""
+import tkinter as tk
+
+格宽 = 80
+格高 = 36
+间距 = 4
+边距 = 10
+讲台高度 = 30
+最小缩放 = 0.3
+最大缩放 = 3.0
+默认字体 = ("微软雅黑", 9)
+
+
+class _座位格:
+    """单个座位的显示状态，接口与tk.Label.config()兼容"""
+    __slots__ = ("_视图", "_座位", "文本", "背景", "字体")
+
+    def __init__(self, 视图, 座位):
+        self._视图 = 视图
+        self._座位 = 座位
+        self.文本 = "空座位"
+        self.背景 = "white"
+        self.字体 = 默认字体
+
+    def config(self, text=None, bg=None, font=None, **_):
+        if text is not None:
+            self.文本 = text
+        if bg is not None:
+            self.背景 = bg
+        if font is not None:
+            self.字体 = font
+        self._视图.安排重绘()
+
+    configure = config
+
+
+class 画布座位视图:
+    """在单个Canvas上按需绘制座位网格
+
+    主要方法：
+    - 标签(): 返回某个座位的显示对象
+    - 缩放(): 按倍数缩放视图
+    - 安排重绘(): 在空闲时重绘一次可见区域
+    """
+    def __init__(self, 父容器, 布局, 点击回调, 宽=760, 高=420):
+        """创建画布视图
+
+        参数:
+            父容器: 放置视图的tk容器
+            布局: 座位布局对象
+            点击回调: 点击座位时调用 点击回调(行, 列)
+            宽, 高: 画布初始大小（像素）
+        """
+        self.布局 = 布局
+        self.点击回调 = 点击回调
+        self.缩放比例 = 1.0
+        self._已安排重绘 = False
+        self._座位格 = {座位: _座位格(self, 座位) for 座位 in 布局.座位列表}
+
+        self.框架 = tk.Frame(父容器)
+        self.画布 = tk.Canvas(self.框架, width=宽, height=高, bg="#f4f4f4", highlightthickness=0)
+        横向滚动条 = tk.Scrollbar(self.框架, orient=tk.HORIZONTAL, command=self._横向滚动)
+        纵向滚动条 = tk.Scrollbar(self.框架, orient=tk.VERTICAL, command=self._纵向滚动)
+        self.画布.config(xscrollcommand=横向滚动条.set, yscrollcommand=纵向滚动条.set)
+
+        self.画布.grid(row=0, column=0, sticky="nsew")
+        纵向滚动条.grid(row=0, column=1, sticky="ns")
+        横向滚动条.grid(row=1, column=0, sticky="ew")
+        self.框架.grid_rowconfigure(0, weight=1)
+        self.框架.grid_columnconfigure(0, weight=1)
+
+        # 所有交互只绑定在画布上，座位由坐标计算得到
+        self.画布.bind("<Button-1>", self._处理点击)
+        self.画布.bind("<Configure>", lambda e: self.安排重绘())
+        self.画布.bind("<MouseWheel>", self._处理滚轮)
+        self.画布.bind("<Control-MouseWheel>", self._处理缩放滚轮)
+        self.画布.bind("<Button-4>", lambda e: self._滚动一步(-1))  # Linux滚轮
+        self.画布.bind("<Button-5>", lambda e: self._滚动一步(1))
+
+        self._更新滚动区域()
+
+    def pack(self, **参数):
+        self.框架.pack(**参数)
+
+    def grid(self, **参数):
+        self.框架.grid(**参数)
+
+    def 标签(self, 行, 列):
+        """返回座位的显示对象，非座位返回None"""
+        return self._座位格.get((行, 列))
+
+    def 缩放(self, 倍数):
+        """按倍数缩放视图，缩放比例限制在最小缩放和最大缩放之间"""
+        self.缩放比例 = min(最大缩放, max(最小缩放, self.缩放比例 * 倍数))
+        self._更新滚动区域()
+        self.安排重绘()
+
+    def 安排重绘(self):
+        """在空闲时重绘一次，多次修改只触发一次重绘"""
+        if not self._已安排重绘:
+            self._已安排重绘 = True
+            self.画布.after_idle(self._重绘)
+
+    def _尺寸(self):
+        return (格宽 * self.缩放比例, 格高 * self.缩放比例, 间距 * self.缩放比例)
+
+    def _更新滚动区域(self):
+        宽, 高, 隔 = self._尺寸()
+        总宽 = 2 * 边距 + self.布局.列数 * (宽 + 隔)
+        总高 = 2 * 边距 + 讲台高度 * self.缩放比例 + self.布局.行数 * (高 + 隔)
+        self.画布.config(scrollregion=(0, 0, 总宽, 总高))
+
+    def _可见范围(self):
+        """返回当前可见的 (起始行, 结束行, 起始列, 结束列)，结束不含"""
+        宽, 高, 隔 = self._尺寸()
+        左 = self.画布.canvasx(0)
+        上 = self.画布.canvasy(0)
+        右 = 左 + self.画布.winfo_width()
+        下 = 上 + self.画布.winfo_height()
+        顶部 = 边距 + 讲台高度 * self.缩放比例
+        起始列 = max(0, int((左 - 边距) // (宽 + 隔)))
+        结束列 = min(self.布局.列数, int((右 - 边距) // (宽 + 隔)) + 1)
+        起始行 = max(0, int((上 - 顶部) // (高 + 隔)))
+        结束行 = min(self.布局.行数, int((下 - 顶部) // (高 + 隔)) + 1)
+        return 起始行, 结束行, 起始列, 结束列
+
+    def _重绘(self):
+        """清除旧的图形，只绘制可见区域内的座位"""
+        self._已安排重绘 = False
+        self.画布.delete("all")
+        宽, 高, 隔 = self._尺寸()
+        顶部 = 边距 + 讲台高度 * self.缩放比例
+
+        # 讲台
+        讲台左 = 边距 + self.布局.讲台起始列 * (宽 + 隔)
+        讲台右 = 讲台左 + self.布局.讲台列数 * (宽 + 隔) - 隔
+        self.画布.create_rectangle(讲台左, 边距, 讲台右, 顶部 - 隔, fill="#dddddd")
+        self.画布.create_text((讲台左 + 讲台右) / 2, (边距 + 顶部 - 隔) / 2, text="讲台",
+                            font=("微软雅黑", max(1, round(10 * self.缩放比例)), "bold"))
+
+        起始行, 结束行, 起始列, 结束列 = self._可见范围()
+        for 行 in range(起始行, 结束行):
+            for 列 in range(起始列, 结束列):
+                座位格 = self._座位格.get((行, 列))
+                if 座位格 is None:
+                    continue
+                x = 边距 + 列 * (宽 + 隔)
+                y = 顶部 + 行 * (高 + 隔)
+                self.画布.create_rectangle(x, y, x + 宽, y + 高, fill=座位格.背景)
+                字体 = (座位格.字体[0], max(1, round(座位格.字体[1] * self.缩放比例))) + tuple(座位格.字体[2:])
+                self.画布.create_text(x + 宽 / 2, y + 高 / 2, text=座位格.文本, font=字体)
+
+    def _座位位置(self, x, y):
+        """把画布坐标换算为 (行, 列)，不在座位上返回None"""
+        宽, 高, 隔 = self._尺寸()
+        顶部 = 边距 + 讲台高度 * self.缩放比例
+        列, 列内 = divmod(x - 边距, 宽 + 隔)
+        行, 行内 = divmod(y - 顶部, 高 + 隔)
+        if 列 < 0 or 行 < 0 or 列内 > 宽 or 行内 > 高:
+            return None
+        行, 列 = int(行), int(列)
+        if 行 >= self.布局.行数 or 列 >= self.布局.列数 or not self.布局.是座位(行, 列):
+            return None
+        return 行, 列
+
+    def _处理点击(self, 事件):
+        位置 = self._座位位置(self.画布.canvasx(事件.x), self.画布.canvasy(事件.y))
+        if 位置 is not None:
+            self.点击回调(*位置)
+
+    def _横向滚动(self, *参数):
+        self.画布.xview(*参数)
+        self.安排重绘()
+
+    def _纵向滚动(self, *参数):
+        self.画布.yview(*参数)
+        self.安排重绘()
+
+    def _滚动一步(self, 方向):
+        self.画布.yview_scroll(方向, "units")
+        self.安排重绘()
+
+    def _处理滚轮(self, 事件):
+        self._滚动一步(-1 if 事件.delta > 0 else 1)
+
+    def _处理缩放滚轮(self, 事件):
+        self.缩放(1.1 if 事件.delta > 0 else 1 / 1.1)
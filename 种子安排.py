@@ -0,0 +1,212 @@
+"""可复现的座位安排：用 (种子, 名单哈希, 约束哈希, 互换列表) 表示一次座位
+
+原来界面分配时使用全局 random，结果无法复现，只能保存整张 {学生: 座位} 表。
+现在每次分配先取一个32位种子，用 random.Random(种子) 求解，并记下：
+- 名单哈希: 学生名单（去重后按顺序）的哈希
+- 约束哈希: 求解内容的哈希。求解内容包括座位布局、指定排数安排、成对约束、轮换计数的快照、
+  考试分组，以及分配算法的版本
+- 互换列表: 分配之后手动互换的学生编号对（编号为学生在名单中的下标）
+转为字节() 后一次座位只有21字节，每次互换再加4或8字节。需要显示或导出时用 展开() 按种子
+重新求解，再依次应用互换，得到与当初逐位相同的结果。
+
+名单和求解内容另外保存（座位历史中按哈希去重），展开前先核对哈希，不一致时拒绝展开。
+求解内容在生成时做一次JSON规范化（键排序），生成和展开使用的输入完全相同。
+分配算法改变后同一种子会得到不同的结果，修改 座位分配引擎、考试模式 等的求解过程时应把
+算法版本 加1，旧记录会提示无法逐位重现，而不是给出错误的座位。
+"""
+import hashlib
+import json
+import random
+import struct
+import sys
+from array import array
+
+import 座位分配引擎 as 引擎
+from 座位向量 import 名单索引
+from 座位布局 import 座位布局
+
+算法版本 = 1
+_头部 = struct.Struct("<IB8s8s")  # 种子、每个编号的字节数、名单哈希、约束哈希
+
+
+def 新种子():
+    """取一个新的32位随机种子"""
+    return random.randrange(2 ** 32)
+
+
+def 规范文本(数据):
+    """JSON规范化文本：键排序、无多余空白，相同内容得到相同文本"""
+    return json.dumps(数据, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def 内容哈希(数据):
+    """规范文本的SHA-256的前16位十六进制"""
+    return hashlib.sha256(规范文本(数据).encode("utf-8")).hexdigest()[:16]
+
+
+def 求解内容(布局, 指定排数安排=None, 成对约束=None, 轮换=None, 学生属性=None, 分组依据=None):
+    """把一次求解除学生名单外的全部输入整理为可JSON序列化的字典
+
+    参数:
+        布局: 座位布局
+        指定排数安排: {学生: 排数列表}
+        成对约束: 座位约束.解析成对约束() 的结果
+        轮换: 座位历史.轮换约束 对象，保存其计数的快照
+        学生属性, 分组依据: 分组依据不为None时按考试模式求解（不使用成对约束和轮换）
+
+    返回:
+        dict: 求解内容，键已排序，可直接交给 生成() 和 展开()
+    """
+    内容 = {
+        "算法版本": 算法版本,
+        "座位布局": 布局.转为配置(),
+        "指定排数安排": {学生: sorted(set(排数列表)) for 学生, 排数列表 in (指定排数安排 or {}).items()},
+        "成对约束": [list(约束) for 约束 in 成对约束 or []],
+    }
+    if 分组依据 is not None:
+        内容["考试"] = {"分组依据": list(分组依据), "学生属性": dict(学生属性 or {})}
+    elif 轮换:
+        内容["轮换"] = {
+            "排次数": {学生: {str(排): 次数 for 排, 次数 in 次数表.items()}
+                    for 学生, 次数表 in 轮换.排次数.items()},
+            "同桌次数": sorted([学生1, 学生2, 次数] for (学生1, 学生2), 次数 in 轮换.同桌次数.items()),
+            "排权重": 轮换.排权重,
+            "同桌权重": 轮换.同桌权重,
+        }
+    # 经过一次规范化，字典顺序与从保存的文本读回时相同
+    return json.loads(规范文本(内容))
+
+
+def _求解(学生名单, 布局, 内容, 随机源, 进度回调=None, 取消事件=None):
+    """按求解内容调用分配引擎或考试模式"""
+    指定排数安排 = 内容["指定排数安排"]
+    考试 = 内容.get("考试")
+    if 考试 is not None:
+        import 考试模式
+        return 考试模式.分配考试座位(学生名单, 布局, 考试["学生属性"], 考试["分组依据"], 指定排数安排,
+                              随机源, 进度回调=进度回调, 取消事件=取消事件)
+    轮换 = None
+    if 内容.get("轮换"):
+        import 座位历史  # sqlite3只在用到轮换时导入
+        数据 = 内容["轮换"]
+        轮换 = 座位历史.轮换约束(
+            {学生: {int(排): 次数 for 排, 次数 in 次数表.items()} for 学生, 次数表 in 数据["排次数"].items()},
+            {(学生1, 学生2): 次数 for 学生1, 学生2, 次数 in 数据["同桌次数"]},
+            数据["排权重"], 数据["同桌权重"])
+    成对约束 = [tuple(约束) for 约束 in 内容["成对约束"]]
+    return 引擎.分配座位(学生名单, 布局, 指定排数安排, 随机源, 进度回调, 取消事件, 轮换, 成对约束)
+
+
+class 种子安排:
+    """一次座位的种子地址
+
+    属性:
+    - 种子: 32位整数
+    - 名单哈希, 约束哈希: 16位十六进制文本
+    - 互换: [(编号1, 编号2), ...]，分配后依次互换座位的两名学生的编号
+    """
+    __slots__ = ("种子", "名单哈希", "约束哈希", "互换")
+
+    def __init__(self, 种子, 名单哈希, 约束哈希, 互换=()):
+        self.种子 = 种子
+        self.名单哈希 = 名单哈希
+        self.约束哈希 = 约束哈希
+        self.互换 = [tuple(对) for 对 in 互换]
+
+    def __eq__(self, 其他):
+        if not isinstance(其他, 种子安排):
+            return NotImplemented
+        return self.转为字典() == 其他.转为字典()
+
+    def __repr__(self):
+        return f"种子安排(种子={self.种子}, 名单={self.名单哈希}, 约束={self.约束哈希}, 互换{len(self.互换)}次)"
+
+    def 添加互换(self, 编号1, 编号2):
+        self.互换.append((编号1, 编号2))
+
+    def 转为字节(self):
+        """紧凑的二进制形式：21字节的头部，加上每次互换2个编号"""
+        编号列表 = [编号 for 对 in self.互换 for 编号 in 对]
+        编号数组 = array("H" if max(编号列表, default=0) <= 0xFFFF else "I", 编号列表)
+        if sys.byteorder == "big":
+            编号数组.byteswap()
+        return _头部.pack(self.种子, 编号数组.itemsize, bytes.fromhex(self.名单哈希),
+                        bytes.fromhex(self.约束哈希)) + 编号数组.tobytes()
+
+    @classmethod
+    def 从字节(cls, 数据):
+        """
+        异常:
+            ValueError: 数据格式错误
+        """
+        try:
+            种子, 字节数, 名单哈希, 约束哈希 = _头部.unpack_from(数据)
+        except struct.error:
+            raise ValueError("种子记录格式错误") from None
+        类型码 = {2: "H", 4: "I"}.get(字节数)
+        正文 = bytes(数据[_头部.size:])
+        if 类型码 is None or len(正文) % (字节数 * 2):
+            raise ValueError("种子记录格式错误")
+        编号数组 = array(类型码)
+        编号数组.frombytes(正文)
+        if sys.byteorder == "big":
+            编号数组.byteswap()
+        互换 = list(zip(编号数组[::2], 编号数组[1::2]))
+        return cls(种子, 名单哈希.hex(), 约束哈希.hex(), 互换)
+
+    def 转为字典(self):
+        return {"种子": self.种子, "名单哈希": self.名单哈希, "约束哈希": self.约束哈希,
+                "互换": [list(对) for 对 in self.互换]}
+
+    @classmethod
+    def 从字典(cls, 数据):
+        return cls(数据["种子"], 数据["名单哈希"], 数据["约束哈希"], 数据.get("互换", ()))
+
+
+def 生成(学生名单, 布局, 内容, 种子=None, 进度回调=None, 取消事件=None):
+    """用一个种子求解座位
+
+    参数:
+        学生名单: 学生姓名列表，重复的姓名只保留第一个
+        布局: 座位布局，应与求解内容中的座位布局相同
+        内容: 求解内容() 的结果
+        种子: 32位整数，默认取新种子
+
+    返回:
+        tuple: (分配结果, 种子安排)
+
+    异常:
+        分配失败错误, 任务已取消: 同 引擎.分配座位()
+    """
+    名单 = 名单索引(学生名单)
+    种子 = 新种子() if 种子 is None else 种子
+    分配结果 = _求解(名单.姓名, 布局, 内容, random.Random(种子), 进度回调, 取消事件)
+    return 分配结果, 种子安排(种子, 内容哈希(名单.姓名), 内容哈希(内容))
+
+
+def 展开(记录, 学生名单, 内容, 布局=None):
+    """按种子重新求解并依次应用互换，得到与当初相同的座位
+
+    参数:
+        记录: 种子安排
+        学生名单, 内容: 当初的学生名单和求解内容，哈希必须与记录一致
+        布局: 可选，默认按求解内容中的座位布局创建
+
+    返回:
+        座位分配表
+
+    异常:
+        ValueError: 名单或求解内容与记录不一致，或记录来自不同版本的分配算法
+    """
+    名单 = 名单索引(学生名单)
+    if 内容哈希(名单.姓名) != 记录.名单哈希:
+        raise ValueError("学生名单与种子记录不一致，无法重现")
+    if 内容哈希(内容) != 记录.约束哈希:
+        raise ValueError("求解内容与种子记录不一致，无法重现")
+    if 内容.get("算法版本") != 算法版本:
+        raise ValueError(f"记录使用第{内容.get('算法版本')}版分配算法，当前为第{算法版本}版，无法逐位重现")
+    布局 = 布局 or 座位布局.从配置创建(内容["座位布局"])
+    分配结果 = _求解(名单.姓名, 布局, 内容, random.Random(记录.种子))
+    for 编号1, 编号2 in 记录.互换:
+        分配结果.互换(名单.姓名[编号1], 名单.姓名[编号2])
+    return 分配结果
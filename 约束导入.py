@@ -0,0 +1,257 @@
+"""批量导入特殊安排
+
+"设置指定排数"每次只能输入一名学生，并且每条都重写一次特殊安排文件。
+这里从CSV、JSON或Excel文件一次读入全部约束：
+- 按学生名单建立集合索引，一遍检查所有行，收集全部错误后一起报告
+- 有任何错误时不做修改；没有错误时与现有安排合并，检查能否满足后一次性写入文件
+
+表格（CSV、Excel的第一个工作表）第一行为表头，可用的列：
+    类型: 指定排数（默认）、同桌、分开、分散
+    学生: 学生姓名；同桌、分开、分散可在同一格写多名学生，用空格、逗号或顿号分隔（也可用"姓名"列）
+    排数: 指定排数时的排号，从0开始，多个排用空格、逗号或顿号分隔
+    权重: 成对约束的权重，默认为1
+JSON文件可以是同样字段的对象列表，也可以是与 特殊安排.json 相同的格式。
+
+命令行用法:
+    python 约束导入.py 约束.csv [--roster 学生名单.json] [--special 特殊安排.json] [--config 配置.json]
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+import 运行指标
+import 状态日志
+import 座位分配引擎 as 引擎
+import 座位约束
+from 座位布局 import 座位布局
+
+指定排数 = "指定排数"
+_分隔符 = re.compile(r"[\s,，、;；]+")
+
+
+def 读取约束文件(路径):
+    """按扩展名读取CSV、JSON或Excel文件
+
+    返回:
+        list: [(位置说明, {列名: 值}), ...]，位置说明如 "第3行"
+
+    异常:
+        ValueError: 文件格式不支持或内容格式错误
+        OSError: 文件无法读取
+    """
+    扩展名 = os.path.splitext(路径)[1].lower()
+    with 运行指标.阶段("读取约束文件"):
+        if 扩展名 == ".csv":
+            # utf-8-sig 兼容Excel另存的带BOM的CSV
+            with open(路径, "r", encoding="utf-8-sig", newline="") as f:
+                return [(f"第{序号}行", 行) for 序号, 行 in enumerate(csv.DictReader(f), 2)]
+        if 扩展名 == ".json":
+            with open(路径, "r", encoding="utf-8") as f:
+                return _整理JSON(json.load(f))
+        if 扩展名 in (".xlsx", ".xlsm"):
+            return _读取Excel(路径)
+    raise ValueError(f"不支持的文件类型: {扩展名 or 路径}（支持 .csv、.json、.xlsx）")
+
+
+def _整理JSON(数据):
+    """JSON可以是记录列表，也可以是特殊安排.json格式"""
+    if isinstance(数据, dict):
+        记录列表 = [(f"指定排数安排中的{学生}", {"学生": 学生, "排数": 排数列表})
+                for 学生, 排数列表 in 数据.get("指定排数安排", {}).items()]
+        for 序号, 约束 in enumerate(数据.get("成对约束", []), 1):
+            记录列表.append((f"第{序号}条成对约束", 约束 if isinstance(约束, dict) else {"学生": 约束}))
+        return 记录列表
+    if isinstance(数据, list):
+        return [(f"第{序号}条", 项 if isinstance(项, dict) else {"学生": 项}) for 序号, 项 in enumerate(数据, 1)]
+    raise ValueError("JSON文件应为约束列表或特殊安排格式")
+
+
+def _读取Excel(路径):
+    """读取第一个工作表，第一行为表头"""
+    try:
+        import openpyxl  # 可选依赖，只在导入Excel时需要
+    except ImportError:
+        raise ValueError("读取Excel文件需要安装openpyxl") from None
+    wb = openpyxl.load_workbook(路径, read_only=True, data_only=True)
+    try:
+        行迭代 = wb.worksheets[0].iter_rows(values_only=True)
+        表头 = [str(值).strip() if 值 is not None else "" for 值 in next(行迭代, ())]
+        记录列表 = []
+        for 序号, 行 in enumerate(行迭代, 2):
+            if all(值 is None or 值 == "" for 值 in 行):
+                continue
+            记录列表.append((f"第{序号}行", {列名: 值 for 列名, 值 in zip(表头, 行) if 列名}))
+        return 记录列表
+    finally:
+        wb.close()
+
+
+def _拆分(值):
+    """把单元格拆成字符串列表：列表原样使用，数字转为整数文本，其余按分隔符拆开"""
+    if 值 is None:
+        return []
+    if isinstance(值, (list, tuple)):
+        return [str(项).strip() for 项 in 值 if str(项).strip()]
+    if isinstance(值, float) and 值.is_integer():
+        值 = int(值)
+    return [项 for 项 in _分隔符.split(str(值).strip()) if 项]
+
+
+def 检查约束(记录列表, 学生名单, 布局):
+    """一遍检查全部记录
+
+    参数:
+        记录列表: 读取约束文件() 的结果
+        学生名单: 学生姓名列表
+        布局: 座位布局，排号必须是有座位的排
+
+    返回:
+        tuple: (指定排数安排, 成对约束, 错误列表)
+        - 指定排数安排: {学生: 排数列表}
+        - 成对约束: 特殊安排.json 格式的成对约束列表
+        - 错误列表: ["第3行: ...", ...]，为空表示全部正确
+    """
+    名单索引 = set(学生名单)
+    有效排 = set(布局.排号列表)
+    指定排数安排 = {}
+    设置位置 = {}
+    成对约束 = []
+    错误列表 = []
+
+    with 运行指标.阶段("检查约束"):
+        for 位置, 记录 in 记录列表:
+            类型 = str(记录.get("类型") or 指定排数).strip()
+            学生列表 = _拆分(记录.get("学生", 记录.get("姓名")))
+            if not 学生列表:
+                错误列表.append(f"{位置}: 缺少学生姓名")
+                continue
+            不在名单 = [学生 for 学生 in 学生列表 if 学生 not in 名单索引]
+            if 不在名单:
+                错误列表.append(f"{位置}: 学生不在名单中：{'、'.join(不在名单)}")
+
+            if 类型 == 指定排数:
+                if len(学生列表) != 1:
+                    错误列表.append(f"{位置}: 指定排数每行只能有一名学生")
+                    continue
+                学生 = 学生列表[0]
+                排数列表 = []
+                for 文本 in _拆分(记录.get("排数")):
+                    try:
+                        排 = int(文本)
+                    except ValueError:
+                        错误列表.append(f"{位置}: 排数必须是数字：{文本}")
+                        break
+                    if 排 not in 有效排:
+                        错误列表.append(f"{位置}: 第{排}排没有座位（排数从0开始）")
+                        break
+                    排数列表.append(排)
+                else:
+                    if not 排数列表:
+                        错误列表.append(f"{位置}: 缺少排数")
+                    elif 学生 in 设置位置:
+                        错误列表.append(f"{位置}: {学生}已在{设置位置[学生]}设置过指定排数")
+                    else:
+                        设置位置[学生] = 位置
+                        指定排数安排[学生] = sorted(set(排数列表))
+                continue
+
+            # 成对约束沿用 座位约束.解析成对约束() 的检查，只替换错误信息中的位置
+            权重 = 记录.get("权重")
+            if 权重 is None or 权重 == "":
+                权重 = 1
+            elif isinstance(权重, str):
+                try:
+                    权重 = float(权重)
+                    权重 = int(权重) if 权重.is_integer() else 权重
+                except ValueError:
+                    pass
+            约束 = {"类型": 类型, "学生": 学生列表, "权重": 权重}
+            try:
+                座位约束.解析成对约束([约束])
+            except ValueError as e:
+                错误列表.append(f"{位置}: {str(e).replace('第1条', '')}")
+                continue
+            成对约束.append(约束)
+
+    运行指标.计数("导入记录数", len(记录列表))
+    运行指标.计数("导入错误数", len(错误列表))
+    return 指定排数安排, 成对约束, 错误列表
+
+
+def 导入约束(路径, 学生名单, 布局, 指定排数安排=None, 成对约束=None):
+    """读取并检查约束文件，与现有安排合并
+
+    同一名学生的指定排数以文件中的为准；合并后的指定排数安排用最大匹配检查能否满足。
+
+    参数:
+        指定排数安排: 现有的 {学生: 排数列表}
+        成对约束: 现有的特殊安排.json格式成对约束列表
+
+    返回:
+        tuple: (合并后的指定排数安排, 合并后的成对约束, 导入的条数, 错误列表)；
+        有错误时前两项为现有安排的副本
+
+    异常:
+        ValueError, OSError: 文件无法读取或格式错误
+    """
+    合并安排 = dict(指定排数安排 or {})
+    合并成对约束 = list(成对约束 or [])
+    新安排, 新成对约束, 错误列表 = 检查约束(读取约束文件(路径), 学生名单, 布局)
+    if 错误列表:
+        return 合并安排, 合并成对约束, 0, 错误列表
+
+    试合并 = dict(合并安排)
+    试合并.update(新安排)
+    可行, 错误信息 = 引擎.验证特殊安排(学生名单, 布局, 试合并)
+    if not 可行:
+        return 合并安排, 合并成对约束, 0, [f"导入后特殊安排无法满足: {错误信息}"]
+    return 试合并, 合并成对约束 + 新成对约束, len(新安排) + len(新成对约束), []
+
+
+def 主程序(参数列表=None):
+    """命令行入口：检查约束文件并合并写入特殊安排文件"""
+    解析器 = argparse.ArgumentParser(description="从CSV、JSON或Excel批量导入特殊安排")
+    解析器.add_argument("约束文件", help="约束文件（.csv、.json、.xlsx）")
+    解析器.add_argument("--roster", default=引擎.学生名单文件, help="学生名单JSON文件")
+    解析器.add_argument("--special", default=状态日志.默认快照路径(),
+                        help="要合并写入的特殊安排JSON文件，默认为界面使用的文件")
+    解析器.add_argument("--config", default=引擎.配置文件, help="包含座位布局的配置文件")
+    解析器.add_argument("--check", action="store_true", help="只检查，不写入")
+    参数 = 解析器.parse_args(参数列表)
+
+    try:
+        学生名单 = 引擎.读取学生名单(参数.roster)
+        布局 = 座位布局.从文件加载(参数.config)
+        # 现有安排为快照加上界面修改日志中尚未压缩的记录（见 状态日志）
+        快照数据 = {}
+        if os.path.exists(参数.special):
+            with open(参数.special, "r", encoding="utf-8") as f:
+                快照数据 = json.load(f)
+        状态 = 状态日志.初始状态(快照数据)
+        日志, 记录列表 = 状态日志.状态日志.打开(参数.special, 快照数据)
+        for 记录 in 记录列表:
+            状态日志.应用(状态, 记录)
+        指定排数安排, 成对约束, 条数, 错误列表 = 导入约束(
+            参数.约束文件, 学生名单, 布局, 状态["指定排数安排"], 状态["成对约束"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"读取失败: {e}", file=sys.stderr)
+        return 1
+    if 错误列表:
+        print(f"发现{len(错误列表)}处错误，没有写入：", file=sys.stderr)
+        for 错误 in 错误列表:
+            print(f"  {错误}", file=sys.stderr)
+        return 1
+    if 参数.check:
+        print(f"检查通过，共{条数}条约束")
+        return 0
+    # 压缩为新快照：保留日志序号和上次的座位，已并入的日志记录不会在界面启动时再次重放
+    日志.压缩(指定排数安排, 成对约束, 状态["当前座位"])
+    print(f"已导入{条数}条约束 -> {参数.special}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(主程序())
@@ -0,0 +1,258 @@
+"""考试模式：同组学生互不相邻
+
+考试时要求同一个班级（或同一套试卷）的学生前后左右、斜对角都不相邻。
+学生的分组来自扩展后的 学生名单.json：
+    [{"姓名": "张三", "班级": "1班", "试卷": "A"}, "李四", ...]
+按 分组依据 中的每个属性，两名学生只要有一个属性值相同就不能相邻；没有该属性的学生不受限制。
+
+座位相邻关系用位掩码表示（座位布局.邻座掩码()，第k位为座位序号k）：
+- 每个分组维护一个"禁止掩码"，即该组已放置学生的所有邻座
+- 一名学生能否坐某座位，只需看座位位是否落在其各分组禁止掩码的并集中
+- 某类学生还剩多少可坐的座位，是 (空座位 & 允许 & ~禁止) 的位数
+判断都是整数位运算，不逐个遍历邻座。
+
+求解是贪心着色：按行依次处理座位，每个座位在能坐的学生类型中选"剩余人数/可坐座位数"最大的
+（最急需座位的类型），都不能坐时空着。空座位用完仍有学生没有座位时，换一种座位顺序和随机扰动重试；
+每隔一次改为按行列奇偶分组处理座位、一个组放完再放下一组，适合座位几乎坐满的情况。
+属性和指定排数都相同的学生可以互换，先按类型求解，最后在类型内随机分配到具体学生。
+"""
+import math
+import random
+
+import 运行指标
+import 种子安排
+import 座位分配引擎 as 引擎
+from 后台任务 import 检查取消
+from 座位分配表 import 座位分配表
+
+默认尝试次数 = 50
+
+# 位数统计：Python 3.10起整数有 bit_count()
+if hasattr(int, "bit_count"):
+    _位数 = int.bit_count
+else:
+    def _位数(掩码):
+        return bin(掩码).count("1")
+
+
+def 分组字段(学生属性):
+    """返回名单中出现过的全部属性名（按名称排序），作为默认的分组依据"""
+    return sorted({字段 for 属性 in 学生属性.values() for 字段 in 属性})
+
+
+def _学生标签(属性, 分组依据):
+    """学生的分组标签 ((字段, 值), ...)，值为空的字段不参与
+
+    列表、对象等值（如 "科目": ["数学", "英语"]）转为JSON规范化文本，内容相同即为同一组。
+    """
+    标签 = []
+    for 字段 in 分组依据:
+        值 = 属性.get(字段)
+        if 值 in (None, "", [], {}):
+            continue
+        if isinstance(值, (list, dict)):
+            值 = 种子安排.规范文本(值)
+        标签.append((字段, 值))
+    return tuple(标签)
+
+
+def _贪心放置(布局, 顺序, 类型标签, 允许掩码, 数量, 标签数, 随机源, 集中=False):
+    """按座位顺序贪心放置各类型学生
+
+    每个座位默认选最急需座位的类型；集中时按固定的优先级（所在组人数多的在前，人数相同时随机）
+    选择，先把一个组放完再放下一组。
+
+    返回:
+        list: 每个类型分到的座位序号列表；空座位不够时返回None
+    """
+    邻座 = 布局.邻座掩码()
+    剩余 = list(数量)
+    禁止 = [0] * 标签数
+    空座位 = (1 << 布局.座位数) - 1
+    可空座位数 = 布局.座位数 - sum(数量)
+    类型座位 = [[] for _ in 数量]
+    待放类型 = [t for t, n in enumerate(数量) if n]
+    if 集中:
+        # 同组的类型排在一起，组内限定了排的类型在前，能坐的座位少
+        组人数 = [0] * 标签数
+        for t, n in enumerate(数量):
+            for 标签 in 类型标签[t]:
+                组人数[标签] += n
+        随机键 = {}
+        全部座位 = 空座位
+
+        def 排序键(t):
+            标签 = tuple(类型标签[t])
+            return (max((组人数[l] for l in 标签), default=0),
+                    随机键.setdefault(标签, 随机源.random()), 允许掩码[t] != 全部座位)
+
+        优先级 = {t: 序号 for 序号, t in enumerate(sorted(range(len(数量)), key=排序键))}
+
+    for s in 顺序:
+        位 = 1 << s
+        最好类型, 最好分数 = -1, -math.inf
+        for t in 待放类型:
+            if not 允许掩码[t] & 位:
+                continue
+            禁止并集 = 0
+            for 标签 in 类型标签[t]:
+                禁止并集 |= 禁止[标签]
+            if 禁止并集 & 位:
+                continue
+            if 集中:
+                分数 = 优先级[t]
+            else:
+                # 剩余人数相对可坐座位越多越急需；乘以随机扰动打破平局，每次重试得到不同的安排
+                分数 = 剩余[t] / _位数(空座位 & 允许掩码[t] & ~禁止并集) * (1 + 0.05 * 随机源.random())
+            if 分数 > 最好分数:
+                最好类型, 最好分数 = t, 分数
+        if 最好类型 < 0:
+            可空座位数 -= 1
+            if 可空座位数 < 0:
+                return None
+            continue
+        类型座位[最好类型].append(s)
+        空座位 &= ~位
+        for 标签 in 类型标签[最好类型]:
+            禁止[标签] |= 邻座[s]
+        剩余[最好类型] -= 1
+        if not 剩余[最好类型]:
+            待放类型.remove(最好类型)
+    return 类型座位 if not 待放类型 else None
+
+
+def _座位顺序(布局, 随机源, 按奇偶=False):
+    """逐行处理座位，随机决定从前排还是后排开始、每排从左还是从右开始
+
+    按奇偶时按行号、列号的奇偶把座位分成四组，座位多的组先处理。
+    同一组内的座位两两不相邻，配合集中放置，同组学生会连续占满同一组座位，
+    形成隔行隔列的排布；座位很满时逐行顺序往往做不到这一点。
+    """
+    行列表 = {}
+    for 序号, (行, _) in enumerate(布局.座位列表):
+        行列表.setdefault(行, []).append(序号)
+    排列表 = sorted(行列表, reverse=随机源.random() < 0.5)
+    从右开始 = 随机源.random() < 0.5
+    顺序 = []
+    for 排 in 排列表:
+        顺序.extend(reversed(行列表[排]) if 从右开始 else 行列表[排])
+    if 按奇偶:
+        座位列表 = 布局.座位列表
+        奇偶 = [(行 % 2, 列 % 2) for 行, 列 in 座位列表]
+        组大小 = {组: 奇偶.count(组) for 组 in set(奇偶)}
+        组序 = sorted(组大小, key=lambda 组: (-组大小[组], 随机源.random()))
+        组序 = {组: 序号 for 序号, 组 in enumerate(组序)}
+        顺序.sort(key=lambda 序号: 组序[奇偶[序号]])
+    return 顺序
+
+
+def 分配考试座位(学生名单, 布局, 学生属性, 分组依据=None, 指定排数安排=None, 随机源=None,
+             尝试次数=默认尝试次数, 进度回调=None, 取消事件=None):
+    """分配考试座位，分组依据中任一属性相同的学生互不相邻
+
+    参数:
+        学生名单: 学生姓名列表
+        布局: 座位布局
+        学生属性: {姓名: {属性: 值}}，见 引擎.整理学生名单()
+        分组依据: 属性名列表，默认为名单中出现过的全部属性
+        指定排数安排: {学生: 排数列表}，同时满足
+        随机源: random.Random实例，可选，用于复现结果
+        尝试次数: 贪心失败时最多重试的次数
+        进度回调: 可选，进度回调(说明, 完成, 总数)
+        取消事件: 可选，threading.Event，设置后抛出 任务已取消
+
+    返回:
+        座位分配表: 学生 <-> (行, 列)
+
+    异常:
+        分配失败错误: 座位不足或多次尝试都找不到同组不相邻的安排
+    """
+    随机源 = 随机源 or random
+    指定排数安排 = 指定排数安排 or {}
+    分组依据 = 分组字段(学生属性) if 分组依据 is None else list(分组依据)
+    学生名单 = list(dict.fromkeys(学生名单))
+    if len(学生名单) > 布局.座位数:
+        raise 引擎.分配失败错误(f"学生人数({len(学生名单)})超过可用座位数({布局.座位数})")
+
+    # 属性和指定排数都相同的学生归为一类
+    with 运行指标.阶段("整理分组"):
+        类型学生 = {}
+        for 学生 in 学生名单:
+            标签 = _学生标签(学生属性.get(学生, {}), 分组依据)
+            排 = tuple(sorted(set(指定排数安排[学生]))) if 学生 in 指定排数安排 else None
+            类型学生.setdefault((标签, 排), []).append(学生)
+        标签编号 = {}
+        类型标签 = []
+        允许掩码 = []
+        全部座位 = (1 << 布局.座位数) - 1
+        for 标签, 排 in 类型学生:
+            类型标签.append([标签编号.setdefault(项, len(标签编号)) for 项 in 标签])
+            允许 = 全部座位
+            if 排 is not None:
+                允许 = 0
+                for 行 in 排:
+                    允许 |= 布局.排掩码(行)
+            允许掩码.append(允许)
+        数量 = [len(名单) for 名单 in 类型学生.values()]
+        布局.邻座掩码()
+
+    with 运行指标.阶段("贪心着色"):
+        for 尝试 in range(尝试次数):
+            检查取消(取消事件)
+            if 进度回调:
+                进度回调("贪心着色", 尝试, 尝试次数)
+            运行指标.计数("尝试次数")
+            # 逐行顺序和奇偶顺序交替尝试，奇偶顺序时集中放置
+            按奇偶 = 尝试 % 2 == 1
+            顺序 = _座位顺序(布局, 随机源, 按奇偶)
+            类型座位 = _贪心放置(布局, 顺序, 类型标签, 允许掩码, 数量, len(标签编号), 随机源, 按奇偶)
+            if 类型座位 is not None:
+                break
+        else:
+            最大组 = max(((项, sum(n for 类型, n in zip(类型学生, 数量) if 项 in 类型[0]))
+                       for 项 in 标签编号), key=lambda 项: 项[1], default=None)
+            说明 = f"（人数最多的是{最大组[0][0]}为{最大组[0][1]}的{最大组[1]}人）" if 最大组 else ""
+            raise 引擎.分配失败错误(f"尝试{尝试次数}次仍找不到同组学生互不相邻的安排{说明}，"
+                               "请增加座位或考场，或减少分组依据")
+
+    # 同一类型的学生可以互换，随机对应到该类型分到的座位
+    分配结果 = 座位分配表()
+    座位列表 = 布局.座位列表
+    for 名单, 座位序号列表 in zip(类型学生.values(), 类型座位):
+        名单 = list(名单)
+        随机源.shuffle(名单)
+        for 学生, 序号 in zip(名单, 座位序号列表):
+            分配结果.放置(学生, 座位列表[序号])
+    运行指标.计数("扫描座位数", 布局.座位数 * (尝试 + 1))
+    return 分配结果
+
+
+def 查找相邻冲突(分配结果, 布局, 学生属性, 分组依据=None):
+    """找出分组依据中属性相同却相邻的学生
+
+    返回:
+        list: [(学生1, 学生2, 属性), ...]，每对只列一次
+    """
+    分组依据 = 分组字段(学生属性) if 分组依据 is None else list(分组依据)
+    邻座 = 布局.邻座掩码()
+    座位学生 = {}
+    标签座位 = {}
+    for 学生, (行, 列) in 分配结果.items():
+        序号 = 布局.序号(行, 列)
+        座位学生[序号] = 学生
+        for 标签 in _学生标签(学生属性.get(学生, {}), 分组依据):
+            标签座位[标签] = 标签座位.get(标签, 0) | (1 << 序号)
+    冲突 = []
+    for 标签, 掩码 in 标签座位.items():
+        剩余 = 掩码
+        while 剩余:
+            低位 = 剩余 & -剩余
+            s = 低位.bit_length() - 1
+            剩余 ^= 低位
+            # 只看序号更大的同组邻座，每对只列一次
+            相邻 = 邻座[s] & 掩码 & ~((低位 << 1) - 1)
+            while 相邻:
+                位 = 相邻 & -相邻
+                相邻 ^= 位
+                冲突.append((座位学生[s], 座位学生[位.bit_length() - 1], 标签[0]))
+    return 冲突
@@ -0,0 +1,340 @@
+"""运行指标
+
+记录一次运行（随机分配、导出、批量任务等）中各阶段的耗时和计数，用于排查"慢在哪里、为什么失败"。
+
+- 阶段(): 计时区间，可以嵌套，记录开始时间、耗时和层级
+- 计数() / 追加(): 计数器（如尝试次数、扫描座位数）和按尝试记录的列表（如每次尝试的违例数）
+- 可选的性能分析：分析="cprofile" 时用cProfile记录热点函数；分析为函数时，
+  后台线程按 采样间隔 采样被记录线程的调用栈，并调用 分析(调用栈)
+- 运行结束后记录转为字典/JSON，写入 "座位分配.指标" 日志（每次运行一行JSON），
+  并通知 添加监听() 注册的回调；最近记录() 返回最后一次结束的运行
+
+引擎和导出代码只调用模块级的 阶段()、计数()、追加()：当前线程没有激活的记录时它们什么也不做，
+因此不开启记录时几乎没有额外开销。一次运行可以跨线程（如界面在工作线程中分配、在主线程中更新标签），
+在每个线程中用 记录.激活() 即可把该线程的阶段计入同一条记录。
+
+本模块在界面启动时就会导入，logging、cProfile、pstats只在真正用到时才导入，避免拖慢启动。
+
+用法:
+    with 运行指标.记录运行("批量分配") as 记录:
+        ...
+    print(记录.转为JSON())
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+日志名称 = "座位分配.指标"
+
+_线程状态 = threading.local()
+_监听列表 = []
+_最近记录 = None
+_锁 = threading.Lock()
+
+
+class 运行记录:
+    """一次运行的阶段耗时、计数器和性能分析结果
+
+    主要方法：
+    - 激活(): 在当前线程中把阶段和计数记到本记录
+    - 阶段(): 计时区间
+    - 计数() / 追加(): 记录计数器和列表
+    - 结束(): 结束记录并发布
+    - 转为字典() / 转为JSON() / 转为文本(): 导出记录
+    """
+    def __init__(self, 名称, 分析=None, 采样间隔=0.005):
+        """创建运行记录
+
+        参数:
+            名称: 运行名称，如 "随机分配"
+            分析: None不做性能分析；"cprofile"使用cProfile；
+                  函数则按采样间隔调用 分析(调用栈)，调用栈为 [(文件, 函数, 行号), ...]，最外层在前
+            采样间隔: 采样分析的间隔（秒）
+        """
+        self.名称 = 名称
+        self.分析 = 分析
+        self.采样间隔 = 采样间隔
+        self.开始时间 = time.time()
+        self._起点 = time.perf_counter()
+        self.总耗时 = None
+        self.阶段列表 = []  # [{"名称", "开始", "耗时", "层级", "线程"}, ...]
+        self.计数器 = {}
+        self.列表 = {}
+        self.错误 = None
+        self.分析结果 = None
+        self._分析器列表 = []
+        self._锁 = threading.Lock()
+
+    @contextmanager
+    def 激活(self):
+        """在当前线程中激活本记录，期间模块级的 阶段()、计数() 都记到本记录"""
+        原记录 = getattr(_线程状态, "记录", None)
+        原层级 = getattr(_线程状态, "层级", 0)
+        _线程状态.记录 = self
+        _线程状态.层级 = 0
+        停止分析 = self._开始分析()
+        try:
+            yield self
+        finally:
+            停止分析()
+            _线程状态.记录 = 原记录
+            _线程状态.层级 = 原层级
+
+    @contextmanager
+    def 阶段(self, 名称):
+        """记录一个阶段的耗时，阶段可以嵌套"""
+        层级 = getattr(_线程状态, "层级", 0)
+        _线程状态.层级 = 层级 + 1
+        开始 = time.perf_counter()
+        try:
+            yield
+        finally:
+            耗时 = time.perf_counter() - 开始
+            _线程状态.层级 = 层级
+            with self._锁:
+                self.阶段列表.append({"名称": 名称, "开始": 开始 - self._起点, "耗时": 耗时,
+                                   "层级": 层级, "线程": threading.current_thread().name})
+
+    def 计数(self, 名称, 增量=1):
+        """计数器 名称 增加 增量"""
+        with self._锁:
+            self.计数器[名称] = self.计数器.get(名称, 0) + 增量
+
+    def 追加(self, 名称, 值):
+        """在列表 名称 末尾追加一个值，如每次尝试的违例数"""
+        with self._锁:
+            self.列表.setdefault(名称, []).append(值)
+
+    def 结束(self, 错误=None):
+        """结束记录：汇总性能分析结果，写入日志并通知监听者
+
+        参数:
+            错误: 运行失败时的异常或说明文字
+        """
+        global _最近记录
+        self.总耗时 = time.perf_counter() - self._起点
+        if 错误 is not None:
+            self.错误 = str(错误) or type(错误).__name__
+        if self._分析器列表:
+            import io
+            import pstats
+            统计 = pstats.Stats(self._分析器列表[0], stream=io.StringIO())
+            for 分析器 in self._分析器列表[1:]:
+                统计.add(分析器)
+            统计.sort_stats("cumulative").print_stats(25)
+            self.分析结果 = 统计.stream.getvalue()
+            self._分析器列表 = []
+        # 阶段按开始时间排列，跨线程的阶段也能按时间顺序阅读
+        self.阶段列表.sort(key=lambda 阶段: 阶段["开始"])
+
+        with _锁:
+            _最近记录 = self
+            监听列表 = list(_监听列表)
+        # 没有导入过logging时不可能配置了日志处理器，不必为此导入logging
+        logging = sys.modules.get("logging")
+        if logging is not None:
+            日志 = logging.getLogger(日志名称)
+            if 日志.isEnabledFor(logging.INFO):
+                日志.info(self.转为JSON(indent=None))
+        for 回调 in 监听列表:
+            回调(self)
+
+    def _开始分析(self):
+        """按 分析 设置开始性能分析，返回停止函数"""
+        if self.分析 == "cprofile":
+            import cProfile
+            分析器 = cProfile.Profile()
+            try:
+                分析器.enable()
+            except ValueError:
+                # 同一线程已有其他分析器在运行（如外层也开启了cProfile），本次不重复分析
+                return lambda: None
+            self._分析器列表.append(分析器)
+            return 分析器.disable
+        if callable(self.分析):
+            return _采样(threading.get_ident(), self.分析, self.采样间隔)
+        return lambda: None
+
+    def 转为字典(self):
+        """返回可直接序列化为JSON的字典"""
+        with self._锁:
+            return {
+                "名称": self.名称,
+                "开始时间": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.开始时间)),
+                "总耗时": self.总耗时,
+                "错误": self.错误,
+                "阶段": [dict(阶段) for 阶段 in self.阶段列表],
+                "计数": dict(self.计数器),
+                "列表": {名称: list(值) for 名称, 值 in self.列表.items()},
+                "分析结果": self.分析结果,
+            }
+
+    def 转为JSON(self, indent=4):
+        return json.dumps(self.转为字典(), ensure_ascii=False, indent=indent)
+
+    def 转为文本(self):
+        """返回便于阅读的多行文本，用于调试面板"""
+        行列表 = [f"{self.名称}  {'' if self.总耗时 is None else f'{self.总耗时 * 1000:.2f} ms'}"]
+        if self.错误:
+            行列表.append(f"错误: {self.错误}")
+        行列表.append("")
+        行列表.append("阶段:")
+        for 阶段 in self.阶段列表:
+            缩进 = "  " * (阶段["层级"] + 1)
+            行列表.append(f"{缩进}{阶段['名称']}: {阶段['耗时'] * 1000:.2f} ms"
+                       f"  (+{阶段['开始'] * 1000:.1f} ms, {阶段['线程']})")
+        if self.计数器:
+            行列表.append("")
+            行列表.append("计数:")
+            行列表.extend(f"  {名称}: {值}" for 名称, 值 in self.计数器.items())
+        if self.列表:
+            行列表.append("")
+            行列表.append("列表:")
+            行列表.extend(f"  {名称}: {值}" for 名称, 值 in self.列表.items())
+        if self.分析结果:
+            行列表.append("")
+            行列表.append("性能分析:")
+            行列表.append(self.分析结果)
+        return "\n".join(行列表)
+
+
+def _采样(线程标识, 回调, 间隔):
+    """启动采样线程，按间隔把目标线程的调用栈交给回调，返回停止函数"""
+    停止事件 = threading.Event()
+
+    def 采样():
+        while not 停止事件.wait(间隔):
+            帧 = sys._current_frames().get(线程标识)
+            调用栈 = []
+            while 帧 is not None:
+                调用栈.append((帧.f_code.co_filename, 帧.f_code.co_name, 帧.f_lineno))
+                帧 = 帧.f_back
+            调用栈.reverse()
+            回调(调用栈)
+
+    线程 = threading.Thread(target=采样, name="运行指标采样", daemon=True)
+    线程.start()
+
+    def 停止():
+        停止事件.set()
+        线程.join()
+    return 停止
+
+
+def 当前记录():
+    """返回当前线程激活的记录，没有时返回None"""
+    return getattr(_线程状态, "记录", None)
+
+
+@contextmanager
+def 阶段(名称):
+    """在当前记录中计时一个阶段，没有激活的记录时不做任何事"""
+    记录 = getattr(_线程状态, "记录", None)
+    if 记录 is None:
+        yield
+        return
+    with 记录.阶段(名称):
+        yield
+
+
+def 计数(名称, 增量=1):
+    """当前记录的计数器增加，没有激活的记录时不做任何事"""
+    记录 = getattr(_线程状态, "记录", None)
+    if 记录 is not None:
+        记录.计数(名称, 增量)
+
+
+def 追加(名称, 值):
+    """在当前记录的列表中追加一个值，没有激活的记录时不做任何事"""
+    记录 = getattr(_线程状态, "记录", None)
+    if 记录 is not None:
+        记录.追加(名称, 值)
+
+
+@contextmanager
+def 记录运行(名称, 分析=None, 采样间隔=0.005):
+    """创建并激活一条记录，退出时结束记录；运行中抛出的异常会记录在 错误 中后继续抛出"""
+    记录 = 运行记录(名称, 分析, 采样间隔)
+    try:
+        with 记录.激活():
+            yield 记录
+    except BaseException as e:
+        记录.结束(e)
+        raise
+    记录.结束()
+
+
+def 最近记录():
+    """返回最后一次结束的运行记录，没有时返回None"""
+    return _最近记录
+
+
+def 添加监听(回调):
+    """注册回调，每次运行结束时以 回调(记录) 调用（在结束记录的线程中）"""
+    with _锁:
+        _监听列表.append(回调)
+
+
+def 移除监听(回调):
+    with _锁:
+        _监听列表.remove(回调)
+
+
+def 启用JSON日志(路径):
+    """把每次运行的记录以一行JSON追加写入文件，返回添加的日志处理器"""
+    import logging
+    日志 = logging.getLogger(日志名称)
+    处理器 = logging.FileHandler(路径, encoding="utf-8")
+    处理器.setFormatter(logging.Formatter("%(message)s"))
+    日志.addHandler(处理器)
+    日志.setLevel(logging.INFO)
+    return 处理器
+
+
+def 开始记录导入():
+    """记录此后每个新模块的导入耗时，效果与 python -X importtime 类似，打包后的exe中也可使用
+
+    通过替换 builtins.__import__ 实现，只记录调用时尚未导入的模块。
+
+    返回:
+        function: 停止函数，调用后恢复原来的导入函数，
+                  并返回 [(模块名, 自身耗时, 累计耗时, 层级), ...]，按导入完成的顺序排列
+    """
+    import builtins
+    原导入 = builtins.__import__
+    导入列表 = []
+    子模块耗时 = []  # 栈：每一层已完成的子模块累计耗时
+    线程标识 = threading.get_ident()
+
+    def 计时导入(名称, globals=None, locals=None, fromlist=(), level=0):
+        if level or 名称 in sys.modules or threading.get_ident() != 线程标识:
+            return 原导入(名称, globals, locals, fromlist, level)
+        开始 = time.perf_counter()
+        子模块耗时.append(0.0)
+        try:
+            return 原导入(名称, globals, locals, fromlist, level)
+        finally:
+            累计 = time.perf_counter() - 开始
+            子模块 = 子模块耗时.pop()
+            if 子模块耗时:
+                子模块耗时[-1] += 累计
+            导入列表.append((名称, 累计 - 子模块, 累计, len(子模块耗时)))
+
+    builtins.__import__ = 计时导入
+
+    def 停止():
+        builtins.__import__ = 原导入
+        return 导入列表
+    return 停止
+
+
+def 导入耗时文本(导入列表, 数量=20):
+    """把 开始记录导入() 的结果整理为文本，列出累计耗时最多的模块"""
+    顶层合计 = sum(累计 for _, _, 累计, 层级 in 导入列表 if 层级 == 0)
+    行列表 = [f"导入模块: {len(导入列表)}个，共{顶层合计 * 1000:.1f} ms",
+           f"  {'自身':>9} {'累计':>10}  模块"]
+    for 名称, 自身, 累计, 层级 in sorted(导入列表, key=lambda 项: -项[2])[:数量]:
+        行列表.append(f"  {自身 * 1000:>7.1f}ms {累计 * 1000:>8.1f}ms  {'  ' * 层级}{名称}")
+    return "\n".join(行列表)